@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Live Packet Flow Statistics
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Follows the tx and rx pcap files of an experiment while tshark is still
+writing them, and prints per-flow statistics (packets, loss, out-of-order,
+latency percentiles, jitter) every `interval` seconds, so that a broken setup
+is seen during the run instead of after the tshark conversion.
+Only the bytes appended since the last poll are parsed (a partially written
+packet at the end of a capture is parsed on the next poll), and the statistics
+are updated incrementally with the streaming accumulators (txrx_stream.py).
+
+Usage:
+1. Start the captures (Section 1a/3 of the txrx scripts), writing /tmp/tmpexp/expt-{tx,rx}N.pcap
+2. Run the script, flows are picked up as their capture files appear
+3. Stop it with Ctrl-C (or set duration), the final statistics are printed
+"""
+
+import os
+import time
+from txrx_pcap import CaptureFollower
+from txrx_stream import LiveFlow
+from txrx_flows import discover_flows
+
+# Directory of the experiment's pcap files
+capture_directory = "/tmp/tmpexp/"
+# Flows to follow, e.g. [1, 2] for expt-tx1.pcap/expt-rx1.pcap and expt-tx2.pcap/expt-rx2.pcap
+# None follows every flow whose capture files appear in capture_directory
+flows = None
+
+# Latency mode
+# 'txrx'  : latency = rx capture - tx capture (both captures needed)
+# 'rxonly': latency = rx capture - iperf tx time (rx capture only)
+latency_mode = 'txrx'  # 'txrx', 'rxonly'
+
+# Seconds between summaries, and total seconds to run (None: until Ctrl-C)
+interval = 1.0
+duration = None
+# Reorder buffer (in sequence numbers) of the loss and out-of-order counters
+reorder_depth = 10_000
+# Seconds an rx packet waits for its tx packet, beyond the newest tx packet read
+max_lag = 1.0
+
+
+def find_flows():
+    directions = ('tx', 'rx') if latency_mode == 'txrx' else ('rx',)
+    if flows is not None:
+        return [flow for flow in flows
+                if all(os.path.exists(os.path.join(capture_directory, f'expt-{direction}{flow}.pcap'))
+                       for direction in directions)]
+    return discover_flows(capture_directory, 'pcap', directions)
+
+
+def follow(followers, live_flows):
+    """
+    Adds newly appeared flows, and reads the new packets of every capture.
+    """
+    for flow in find_flows():
+        if flow in live_flows:
+            continue
+        live_flows[flow] = LiveFlow(latency_mode == 'txrx', reorder_depth, max_lag)
+        followers[flow] = {direction: CaptureFollower(os.path.join(capture_directory, f'expt-{direction}{flow}.pcap'))
+                           for direction in (('tx', 'rx') if latency_mode == 'txrx' else ('rx',))}
+    for flow, live_flow in live_flows.items():
+        if 'tx' in followers[flow]:
+            df_tx = followers[flow]['tx'].poll()
+            if df_tx is not None:
+                live_flow.add_tx(df_tx)
+        df_rx = followers[flow]['rx'].poll()
+        if df_rx is not None:
+            live_flow.add_rx(df_rx)
+        live_flow.update()
+
+
+def print_statistics(live_flows, elapsed):
+    print(f"--- {elapsed:.1f} s ---")
+    for flow, live_flow in live_flows.items():
+        summary = live_flow.summary()
+        latency = live_flow.accumulator.latency
+        tx = f"tx {summary['tx_rows']:>10} " if live_flow.with_tx else ''
+        print(f"Flow {flow}: {tx}rx {summary['rows']:>10} lost {summary['lost']:>8} "
+              f"out-of-order {summary['out-of-order']:>8} "
+              f"latency p50 {latency.quantile(0.5):9.2f} p99 {latency.quantile(0.99):9.2f} "
+              f"max {summary['latency']['max']:9.2f} us jitter {summary['jitter']['mean']:7.2f} us")
+
+
+def main():
+    followers, live_flows = {}, {}
+    start = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - start < duration:
+            follow(followers, live_flows)
+            print_statistics(live_flows, time.monotonic() - start)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    # Read what was written since the last poll, and release all pending packets
+    follow(followers, live_flows)
+    for live_flow in live_flows.values():
+        live_flow.finish()
+    print("Final statistics")
+    print_statistics(live_flows, time.monotonic() - start)
+    for flow, live_flow in live_flows.items():
+        print(f"Flow {flow}: tx-only (lost) {live_flow.tx_only}")
+
+
+if __name__ == "__main__":
+    main()
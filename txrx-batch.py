@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""
+Batch Analysis of Archived Experiments
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Analyses every archived experiment under archive_directory (e.g. the run
+directories copied from /tmp/tmpexp/ after each archive-txrx-pcap.sh run) with
+txrx_analyzer.py, and writes one summary table across runs: one row per run
+and flow with loss, reordering, latency percentiles and jitter.
+
+- An experiment (run) is any directory with flow files (expt-txN/expt-rxN, as
+  found by txrx_flows.discover_flows()) or, with capture_mode = 'interface',
+  the expt-tx/expt-rx captures.
+- Runs are analysed in parallel worker processes, one run per worker.
+- The summary rows of each run are kept in a manifest (json), keyed by a
+  fingerprint of the run's input files (path, size, mtime and sampled content,
+  as in txrx_cache.py) and of the analysis settings. The size and mtime of each
+  file are kept with its fingerprint, only files whose size or mtime changed are
+  read again. On later runs of the batch only new or changed experiments are
+  analysed, the others are taken from the manifest; experiments no longer in
+  the archive are dropped from it.
+- With capture_mode = 'interface', the captures of a run are parsed once and
+  split into all its flows.
+- Experiments which fail (e.g. a truncated capture) are recorded with their
+  error and retried only once their files change.
+
+Usage:
+1. Set archive_directory and the analysis settings below
+2. Run the script, the summary is printed and written to summary_file
+"""
+
+import os
+import json
+import time
+import hashlib
+import datetime
+import traceback
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from txrx_cache import fingerprint
+from txrx_flows import FLOW_FILE, discover_flows
+
+file_date = datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+
+# Directory tree of the archived experiments
+archive_directory = os.path.expanduser('~/Documents/archive-pcap-txrx')
+# Directories not searched for experiments (besides hidden ones)
+skip_directories = ['histograms', 'windows', 'plots']
+
+# Analysis of each experiment (latency_mode of txrx_analyzer.py)
+# 'txrx'  : tx and rx captures, as txrx-analysis.py
+# 'rxonly': rx captures and iperf tx time, as txrx-analysis-rxonly.py
+analysis = 'txrx'  # 'txrx', 'rxonly'
+input_format = 'csv'  # 'csv', 'pcap', 'pktgen'
+capture_mode = 'flow'  # 'flow', 'interface'
+demux_keys = ['udp.dstport']  # 'udp.dstport', 'vlan.id', 'ip.src'
+analysis_mode = 'memory'  # 'memory', 'streaming'
+# Number of worker processes, one experiment each (None: one per cpu core)
+workers = None
+
+# Manifest of the analysed experiments, and the summary table across experiments
+manifest_file = os.path.join(archive_directory, '.txrx-batch-manifest.json')
+summary_file = os.path.join(archive_directory, f'txrx-batch-summary-{file_date}.csv')
+# Experiments analysed between two writes of the manifest
+manifest_interval = 10
+
+# Version of the summary rows, the manifest entries of other versions are recomputed
+BATCH_VERSION = 1
+
+
+def settings():
+    """
+    Returns the analysis settings which the summary rows depend on.
+    """
+    return {'version': BATCH_VERSION, 'analysis': analysis, 'input_format': input_format,
+            'capture_mode': capture_mode, 'demux_keys': list(demux_keys), 'analysis_mode': analysis_mode}
+
+
+def directions():
+    return ('rx',) if analysis == 'rxonly' else ('tx', 'rx')
+
+
+def run_files(directory, file_names):
+    """
+    Returns the input files of the experiment in directory (empty if it is not an experiment).
+    """
+    extension = 'pcap' if input_format in ('pcap', 'pktgen') else 'csv'
+    if capture_mode == 'interface':
+        files = [f'expt-{direction}.{extension}' for direction in directions()]
+        return files if all(name in file_names for name in files) else []
+    if not any(FLOW_FILE.match(name) for name in file_names):
+        return []
+    flows = discover_flows(directory, input_format, directions())
+    return [f'expt-{direction}{flow}.{extension}' for flow in flows for direction in directions()]
+
+
+def find_runs(directory):
+    """
+    Returns {run: input files} of the experiments under directory, runs as paths relative to it.
+    """
+    runs = {}
+    for root, dirs, file_names in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.') and name not in skip_directories)
+        files = run_files(root, set(file_names))
+        if files:
+            runs[os.path.relpath(root, directory)] = files
+    return runs
+
+
+def file_fingerprints(directory, files, known=None):
+    """
+    Returns {name: [size, mtime_ns, fingerprint]} of the run's input files.
+    The fingerprints of known (of the manifest) are kept for files with the same size and mtime,
+    the others are computed (reading samples of the file).
+    """
+    known = known or {}
+    result = {}
+    for name in files:
+        path = os.path.join(directory, name)
+        stat = os.stat(path)
+        previous = known.get(name)
+        if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+            result[name] = previous
+        else:
+            result[name] = [stat.st_size, stat.st_mtime_ns, fingerprint(path)]
+    return result
+
+
+def run_fingerprint(fingerprints):
+    """
+    Returns a hex digest of the analysis settings and the fingerprints of the run's input files.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(settings(), sort_keys=True).encode())
+    for name, (_, _, file_digest) in fingerprints.items():
+        digest.update(f"{name}:{file_digest}".encode())
+    return digest.hexdigest()
+
+
+def load_manifest():
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f).get('runs', {})
+
+
+def save_manifest(runs):
+    """
+    Writes the manifest atomically, an interrupted batch keeps the experiments analysed so far.
+    """
+    tmp = manifest_file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'settings': settings(), 'runs': runs}, f)
+    os.replace(tmp, manifest_file)
+
+
+def load_analysis_script(directory):
+    """
+    Imports the analyzer (txrx_analyzer.py) as a new module, set up to analyse the experiment in directory.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'txrx_analyzer.py')
+    spec = importlib.util.spec_from_file_location('txrx_analysis', script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.latency_mode = analysis
+    module.csv_directory = directory
+    module.input_format = input_format
+    module.capture_mode = capture_mode
+    module.demux_keys = list(demux_keys)
+    module.analysis_mode = analysis_mode
+    # One experiment per worker process, nothing written into the archive
+    module.workers = 1
+    module.use_cache = False
+    module.histogram_directory = None
+    module.window_sizes = []
+    module.window_directory = None
+    module.stats_only = True
+    return module
+
+
+def _value(value):
+    """
+    JSON-compatible value of a summary field (None for NaN).
+    """
+    value = float(value) if value is not None else np.nan
+    return None if np.isnan(value) else value
+
+
+def flow_row(flow, result, streaming):
+    """
+    Returns the summary row of one flow, from analyze_flow() or stream_flow() of the analysis script.
+    """
+    if streaming:
+        row = {'flow': flow, 'packets': result['rows'], 'lost': result['lost'], 'out-of-order': result['out-of-order'],
+               'reordered': None, 'jitter': result['jitter']['mean'], 'jitter-rfc3550': None,
+               'tx-only': result.get('tx-only')}
+        histogram = result['latency-histogram']
+    else:
+        stats = result['stats']
+        row = {
+            'flow': flow,
+            'packets': len(stats),
+            'lost': int(stats['lost'].max()) if len(stats) else 0,
+            'out-of-order': int(stats['out-of-order'].max()) if len(stats) else 0,
+            'reordered': int(np.count_nonzero(stats['reorder-extent'].to_numpy())),
+            'jitter': np.nanmean(stats['jitter'].to_numpy(np.float64)) if len(stats) else None,
+            'jitter-rfc3550': np.nanmean(stats['jitter-rfc3550'].to_numpy(np.float64)) if len(stats) else None,
+            'tx-only': result.get('join', {}).get('tx-only'),
+        }
+        histogram = result['histogram']
+    row['loss-ratio'] = row['lost'] / max(row['packets'] + row['lost'], 1)
+    for key, value in histogram.summary().items():
+        row[f'latency-{key}'] = value
+    return {key: value if isinstance(value, (str, int)) else _value(value) for key, value in row.items()}
+
+
+def analyze_run(run):
+    """
+    Analyses the experiment run (relative to archive_directory) in a worker process.
+    Returns the summary rows of its flows, or the error.
+    """
+    start = time.perf_counter()
+    module = None
+    try:
+        module = load_analysis_script(os.path.join(archive_directory, run))
+        streaming = analysis_mode == 'streaming'
+        rows = []
+        for flow in module.get_flows():
+            result = module.stream_flow(flow) if streaming else module.analyze_flow(flow)
+            rows.append(flow_row(flow, result, streaming))
+        return {'rows': rows, 'seconds': round(time.perf_counter() - start, 3)}
+    except Exception:
+        return {'error': traceback.format_exc(limit=3), 'seconds': round(time.perf_counter() - start, 3)}
+    finally:
+        # Captures of all flows (capture_mode = 'interface'), read once for the run, released on errors too
+        if module is not None:
+            module.read_captures.cache_clear()
+
+
+def analyze_runs(runs):
+    """
+    Analyses the experiments whose fingerprint is not in the manifest, in parallel.
+    Returns the manifest entries of all runs.
+    """
+    manifest = load_manifest()
+    entries, pending = {}, []
+    for run, files in runs.items():
+        entry = manifest.get(run)
+        fingerprints = file_fingerprints(os.path.join(archive_directory, run), files,
+                                         entry.get('files') if entry is not None else None)
+        digest = run_fingerprint(fingerprints)
+        if entry is not None and entry.get('fingerprint') == digest:
+            entries[run] = {**entry, 'files': fingerprints}
+        else:
+            entries[run] = {'fingerprint': digest, 'files': fingerprints}
+            pending.append(run)
+    print(f"Experiments: {len(runs)}, up to date: {len(runs) - len(pending)}, to analyse: {len(pending)}")
+
+    if pending:
+        pool = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(pending)))
+        with pool:
+            for i, (run, result) in enumerate(zip(pending, pool.map(analyze_run, pending)), 1):
+                entries[run].update(result, date=file_date)
+                status = f"error, {result['error'].strip().splitlines()[-1]}" if 'error' in result else \
+                    f"{len(result['rows'])} flows"
+                print(f"[{i}/{len(pending)}] {run}: {status} ({result['seconds']:.1f} s)")
+                if i % manifest_interval == 0:
+                    save_manifest(entries)
+    save_manifest(entries)
+    return entries
+
+
+def summary_table(entries):
+    """
+    Returns the summary table of all experiments, one row per experiment and flow.
+    """
+    rows = [{'run': run, **row} for run, entry in sorted(entries.items()) for row in entry.get('rows', [])]
+    return pd.DataFrame(rows)
+
+
+def main():
+    runs = find_runs(archive_directory)
+    entries = analyze_runs(runs)
+    failed = [run for run, entry in entries.items() if 'error' in entry]
+    if failed:
+        print(f"Failed experiments (retried when their files change): {', '.join(failed)}")
+
+    summary = summary_table(entries)
+    if len(summary):
+        summary.to_csv(summary_file, index=False)
+        with pd.option_context('display.max_rows', 50, 'display.max_columns', None, 'display.width', 200):
+            print(summary[['run', 'flow', 'packets', 'loss-ratio', 'out-of-order', 'jitter',
+                           'latency-p50', 'latency-p99', 'latency-p99.999', 'latency-max']])
+        print(f"Summary written to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+"""
+Analysis Pipeline Benchmark
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Benchmarks the analysis scripts on synthetic iperf flows, so that performance
+regressions are seen before a real experiment takes too long.
+
+- 'join'    : the tx/rx join of extract_statistics(), the previous pd.merge on
+              ['iperf.id', 'iperf.id2'] against the sequence-indexed join in
+              txrx_join.py (direct indexing and sorted merge), checking that both
+              give the same latency for every rx packet.
+- 'pipeline': synthetic captures (txrx_synthetic.py) are written as pcap files
+              (packet layout of wireshark-dissector-iperf.lua) and csv files (tshark
+              field list of the capture scripts), with loss, reordering, duplicates
+              and a latency distribution. Each stage of the analysis script,
+              read_csv_files(), extract_statistics(), plot_statistics() (and the
+              decimated renderer and streaming mode), is timed and memory-profiled
+              separately for each flow size and input format.
+- 'ingest'  : reading the synthetic csv files, pd.read_csv() without dtypes and
+              the previous read_csv_flow() against the typed reader of
+              txrx_ingest.py with each available engine, checking that the
+              readers give the same columns, and that each reader's flow read
+              back from the cache (txrx_cache.py) has the same columns.
+              Also the dataframe memory, and the speedup over pd.read_csv().
+
+Per stage: wall time, cpu time, and the process' resident memory (RSS) at the
+start of the stage and its peak during the stage (sampled by a thread every few
+milliseconds, so that the measurement does not slow the stage down).
+Results are written to a json file, to compare runs over time.
+
+Usage:
+1. Set the benchmarks, flow sizes and synthetic flow parameters below
+   (the 100M packet flow needs about 45 GB of disk in benchmark_directory, and the
+   in-memory stages need tens of GB of memory)
+2. Run the script, synthetic captures are generated once and reused by later runs
+"""
+
+import os
+import sys
+import shutil
+import gc
+import json
+import time
+import datetime
+import platform
+import subprocess
+import importlib.util
+import numpy as np
+import pandas as pd
+import matplotlib
+from txrx_join import flow_keys, join_sequences, join_frames
+from txrx_synthetic import write_flow
+from txrx_render import render_statistics
+from txrx_cache import read_csv_flow, cached_read, cacheable_column
+from txrx_ingest import read_tshark_csv, pa
+from txrx_profile import resident_memory, MemorySampler
+
+file_date = datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+
+# Benchmarks to run
+benchmarks = ['join', 'pipeline']  # 'join', 'pipeline', 'ingest'
+
+# Number of tx packets per synthetic flow
+sizes = [100_000, 1_000_000, 10_000_000]
+loss = 0.01  # fraction of packets lost
+reorder = 0.001  # fraction of packets reordered
+repeats = 3  # best-of repeats of each measurement
+
+# Pipeline benchmark
+pipeline_sizes = [1_000_000, 10_000_000, 100_000_000]
+pipeline_formats = ['csv', 'pcap']
+# Stages after reading the files: 'extract', 'render', 'plot' (seaborn), 'streaming'
+pipeline_stages = ['extract', 'render', 'plot', 'streaming']
+# plot_statistics() draws every packet, skipped above this many packets
+plot_max_packets = 1_000_000
+
+# Flow sizes and engines of the csv ingest benchmark (pyarrow is skipped if not installed)
+ingest_sizes = [1_000_000, 10_000_000]
+ingest_engines = ['numpy', 'pyarrow', 'pandas']
+# Synthetic flow parameters (see txrx_synthetic.flow_chunks)
+synthetic_parameters = {
+    'rate': 100_000,               # packets per second
+    'loss': loss,
+    'reorder': reorder,
+    'reorder_delay_ns': 100_000,   # extra delay of reordered packets
+    'duplicates': 0.0001,          # fraction of rx packets received twice
+    'latency': 'gamma',            # 'constant', 'exponential', 'gamma', 'normal', 'pareto'
+    'latency_mean_ns': 40_000,
+    'seed': 0,
+}
+# Analyzer benchmarked (as txrx-analysis.py), and the directory of the synthetic captures
+analysis_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'txrx_analyzer.py')
+benchmark_directory = "/tmp/txrx-benchmark/"
+results_file = os.path.join(benchmark_directory, f'benchmark-{file_date}.json')
+
+
+def synthetic_flow(n, seed=0):
+    """
+    Returns tx and rx dataframes of a synthetic iperf flow with loss and reordering.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n, dtype=np.int64)
+    time_tx = 1.7e9 + ids * 1e-5
+    df_tx = pd.DataFrame({'frame.time_epoch': time_tx, 'iperf.id': ids, 'iperf.id2': np.zeros(n, dtype=np.int64),
+                          'iperf.sec': time_tx.astype(np.int64), 'iperf.usec': ((time_tx % 1) * 1e6).astype(np.int64)})
+    received = rng.random(n) > loss
+    time_rx = time_tx + rng.gamma(2, 20e-6, n) + (rng.random(n) < reorder) * 1e-4
+    order = np.argsort(time_rx[received], kind='stable')
+    df_rx = pd.DataFrame({'frame.time_epoch': time_rx[received][order], 'iperf.id': ids[received][order],
+                          'iperf.id2': np.zeros(len(order), dtype=np.int64)})
+    return df_tx, df_rx
+
+
+def best_of(function):
+    """
+    Returns the result and the minimum wall time of `repeats` calls.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def measure(function):
+    """
+    Runs function once, returns its result and the stage measurements.
+    """
+    gc.collect()
+    start_rss = resident_memory()
+    sampler = MemorySampler()
+    sampler.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = function()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak_rss = sampler.stop()
+    return result, {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(cpu, 4),
+        'start_rss_mb': round(start_rss / 2 ** 20, 1),
+        'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+    }
+
+
+def benchmark_join():
+    results = []
+    print(f"{'packets':>12} {'pd.merge (s)':>14} {'dense (s)':>12} {'sorted (s)':>12} {'speedup':>9}")
+    for n in sizes:
+        df_tx, df_rx = synthetic_flow(n)
+        merged, time_merge = best_of(lambda: pd.merge(df_tx, df_rx, on=['iperf.id', 'iperf.id2'], how='right'))
+        joined, time_dense = best_of(lambda: join_frames(df_tx, df_rx, join_sequences(flow_keys(df_tx), flow_keys(df_rx))))
+        _, time_sorted = best_of(lambda: join_frames(df_tx, df_rx, join_sequences(flow_keys(df_tx), flow_keys(df_rx),
+                                                                                  dense_factor=0)))
+
+        latency_merge = (merged['frame.time_epoch_y'] - merged['frame.time_epoch_x']).to_numpy()
+        latency_join = (joined['frame.time_epoch_y'] - joined['frame.time_epoch_x']).to_numpy()
+        assert np.array_equal(latency_merge, latency_join, equal_nan=True)
+        print(f"{n:>12} {time_merge:>14.3f} {time_dense:>12.3f} {time_sorted:>12.3f} {time_merge / time_dense:>8.1f}x")
+        results.append({'benchmark': 'join', 'packets': n, 'merge_s': round(time_merge, 4),
+                        'dense_s': round(time_dense, 4), 'sorted_s': round(time_sorted, 4)})
+    return results
+
+
+def load_analysis_script(directory, input_format):
+    """
+    Imports the analyzer as a new module, set up to read the synthetic flow in directory.
+    """
+    spec = importlib.util.spec_from_file_location('txrx_analysis', analysis_script)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so that the worker processes of the script can import it
+    sys.modules['txrx_analysis'] = module
+    spec.loader.exec_module(module)
+    module.latency_mode = 'txrx'
+    module.csv_directory = directory
+    module.input_format = input_format
+    module.use_cache = False
+    module.workers = 1
+    module.histogram_directory = None
+    module.window_directory = None
+    return module
+
+
+def generate_flow(n):
+    """
+    Writes the synthetic flow of n packets (once), returns its directory and the generation measurements.
+    """
+    directory = os.path.join(benchmark_directory, f'{n}')
+    parameters_file = os.path.join(directory, 'parameters.json')
+    parameters = dict(synthetic_parameters, packets=n)
+    if os.path.exists(parameters_file):
+        with open(parameters_file) as f:
+            if json.load(f) == parameters:
+                return directory, None
+    os.makedirs(directory, exist_ok=True)
+    _, record = measure(lambda: write_flow(directory, 1, n, formats=pipeline_formats, **synthetic_parameters))
+    with open(parameters_file, 'w') as f:
+        json.dump(parameters, f)
+    return directory, record
+
+
+def benchmark_pipeline():
+    import matplotlib.pyplot as plt
+    results = []
+    print(f"{'packets':>12} {'format':>7} {'stage':>10} {'wall (s)':>10} {'cpu (s)':>10} "
+          f"{'start rss (MB)':>15} {'peak rss (MB)':>14}")
+
+    def report(n, input_format, stage, record, rows=None):
+        record = {'benchmark': 'pipeline', 'packets': n, 'format': input_format, 'stage': stage, 'rows': rows,
+                  **record}
+        results.append(record)
+        print(f"{n:>12} {input_format:>7} {stage:>10} {record['wall_s']:>10.3f} {record['cpu_s']:>10.3f} "
+              f"{record['start_rss_mb']:>15.1f} {record['peak_rss_mb']:>14.1f}")
+
+    for n in pipeline_sizes:
+        directory, record = generate_flow(n)
+        if record is not None:
+            report(n, '+'.join(pipeline_formats), 'generate', record, n)
+        for input_format in pipeline_formats:
+            module = load_analysis_script(directory, input_format)
+            df_dict, record = measure(lambda: module.read_csv_files([1]))
+            report(n, input_format, 'read', record, sum(len(df) for df in df_dict.values()))
+            if 'extract' not in pipeline_stages:
+                continue
+            stats_dict, record = measure(lambda: module.extract_statistics(df_dict))
+            report(n, input_format, 'extract', record, sum(len(df) for df in stats_dict.values()))
+            del df_dict
+            if 'render' in pipeline_stages:
+                _, record = measure(lambda: render_statistics(stats_dict, os.path.join(directory, 'plots'),
+                                                              date=file_date))
+                report(n, input_format, 'render', record)
+            if 'plot' in pipeline_stages and n <= plot_max_packets:
+                _, record = measure(lambda: module.plot_statistics(stats_dict))
+                plt.close('all')
+                report(n, input_format, 'plot', record)
+            del stats_dict
+            if 'streaming' in pipeline_stages:
+                summary, record = measure(lambda: module.stream_flow(1))
+                report(n, input_format, 'streaming', record, summary['rows'])
+    return results
+
+
+def check_cache(reader, file_path, df):
+    """
+    Checks that the flow read through the cache (stored, then memory-mapped) has the columns of df.
+    """
+    cache_directory = os.path.join(benchmark_directory, '.cache-check')
+    shutil.rmtree(cache_directory, ignore_errors=True)
+    cached = cached_read(file_path, reader, cache_directory, max_bytes=1 << 40)
+    assert list(cached.columns) == list(df.columns), (reader, list(cached.columns))
+    for column in df.columns:
+        assert np.array_equal(cacheable_column(column, df[column].to_numpy()), cached[column].to_numpy(),
+                              equal_nan=True), (reader, column)
+    del cached
+    shutil.rmtree(cache_directory, ignore_errors=True)
+
+
+def benchmark_ingest():
+    results = []
+    print(f"{'packets':>12} {'reader':>20} {'wall (s)':>10} {'cpu (s)':>10} {'peak rss (MB)':>14} "
+          f"{'rss added (MB)':>15} {'frame (MB)':>11} {'speedup':>9}")
+    readers = {'pd.read_csv': pd.read_csv, 'read_csv_flow': read_csv_flow}
+    for engine in ingest_engines:
+        if engine == 'pyarrow' and pa is None:
+            continue
+        readers[f'read_tshark_csv/{engine}'] = lambda file_path, engine=engine: read_tshark_csv(file_path, engine)
+    for n in ingest_sizes:
+        directory, _ = generate_flow(n)
+        file_path = os.path.join(directory, 'expt-rx1.csv')
+        reference = None
+        baseline = None
+        for name, reader in readers.items():
+            df, record = measure(lambda: reader(file_path))
+            frame_mb = df.memory_usage(deep=True).sum() / 2 ** 20
+            if name == 'read_csv_flow':
+                reference = df
+            elif reference is not None:
+                for column in reference.columns:
+                    assert np.array_equal(reference[column].to_numpy(), df[column].to_numpy()), (name, column)
+            check_cache(reader, file_path, df)
+            del df
+            baseline = baseline or record['wall_s']
+            # Speedup over pd.read_csv(), rss added over the frames kept for the comparison
+            print(f"{n:>12} {name:>20} {record['wall_s']:>10.3f} {record['cpu_s']:>10.3f} "
+                  f"{record['peak_rss_mb']:>14.1f} {record['peak_rss_mb'] - record['start_rss_mb']:>15.1f} "
+                  f"{frame_mb:>11.1f} {baseline / record['wall_s']:>8.2f}x")
+            results.append({'benchmark': 'ingest', 'packets': n, 'reader': name, 'frame_mb': round(frame_mb, 1),
+                            **record})
+        del reference
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(analysis_script)).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'date': file_date,
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    # Plots are drawn without a display
+    matplotlib.use('Agg')
+    os.makedirs(benchmark_directory, exist_ok=True)
+    results = []
+    if 'join' in benchmarks:
+        results += benchmark_join()
+    if 'pipeline' in benchmarks:
+        results += benchmark_pipeline()
+    if 'ingest' in benchmarks:
+        results += benchmark_ingest()
+    with open(results_file, 'w') as f:
+        json.dump({'environment': environment(), 'synthetic_parameters': synthetic_parameters,
+                   'results': results}, f, indent=1)
+    print(f"Results written to {results_file}")
+
+
+if __name__ == "__main__":
+    main()
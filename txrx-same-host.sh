@@ -109,6 +109,10 @@ ip netns exec ns0 tshark -i $INTERFACE0.10 -f "udp dst port 5010" -a duration:15
 ip netns exec ns0 tshark -i $INTERFACE0.11 -f "udp dst port 5011" -a duration:15 -s 128 -w /tmp/tmpexp/expt-rx2.pcap &
 ip netns exec ns1 tshark -i $INTERFACE1.10 -f "udp dst port 5010" -a duration:15 -s 128 -w /tmp/tmpexp/expt-tx1.pcap &
 ip netns exec ns1 tshark -i $INTERFACE1.11 -f "udp dst port 5011" -a duration:15 -s 128 -w /tmp/tmpexp/expt-tx2.pcap &
+# Or one capture per interface for all flows (fewer capture processes, less kernel drops),
+# split into flows by the analysis scripts with capture_mode = 'interface' (txrx_demux.py)
+#ip netns exec ns0 tshark -i $INTERFACE0 -f "vlan and udp" -a duration:15 -s 128 -w /tmp/tmpexp/expt-rx.pcap &
+#ip netns exec ns1 tshark -i $INTERFACE1 -f "vlan and udp" -a duration:15 -s 128 -w /tmp/tmpexp/expt-tx.pcap &
 # iperf server and client - both tx from same port ns1
 ip netns exec ns0 iperf -s -B 192.168.10.10 -u -p 5010 -i 1 -t 12 -z > /tmp/tmpexp/server1_stats.txt &
 ip netns exec ns0 iperf -s -B 192.168.11.10 -u -p 5011 -i 1 -t 12 -z > /tmp/tmpexp/server2_stats.txt &
@@ -154,10 +158,12 @@ ip netns delete ns1
 # Section 4a: If capture was needed for fine-grained analysis
 # ------------------------------------
 # Convert pcap to csv for analysis using python script
+# (Not needed if the analysis script reads the pcaps directly with input_format = 'pcap')
 args="-T fields -E header=y -E separator=, \
 -e udp.dstport -e frame.time_epoch -e frame.len \
 -e iperf.tos -e iperf.id -e iperf.id2 -e iperf.sec -e iperf.usec"
 # -e iperf.mport -e ip.src -e ip.dst -e ip.id -e vlan.id -e vlan.priority -e udp.srcport \
+# For captures of all flows (expt-tx.pcap, expt-rx.pcap), add -e vlan.id -e ip.src if flows are split by them
 
 # Each flow's tx and rx should be put into {tx1,rx1,tx2,rx2,..}.csv
 eval tshark -r /tmp/tmpexp/expt-tx1.pcap $args > /tmp/tmpexp/expt-tx1.csv &
@@ -0,0 +1,820 @@
+"""
+Packet Flow Statistics Analyzer
+
+Author        : Joydeep Pal
+Date Created  : Nov-2022
+Date Modified : May-2023, Nov-2023, 06-Dec-2023, 05-Jun-2024, Jul-2024, Oct-2026
+
+Description:
+Analysis of txrx-analysis.py (tx and rx captures) and txrx-analysis-rxonly.py
+(rx captures only), selected by latency_mode, with a command line interface.
+Reads csv files containing packet dump data for unique flows.
+Iperf sends packets with sequence numbers and timestamps.
+Packets captured in tx and/or rx, and converted to csv (or read directly from pcap).
+It extracts statistics related to latency, jitter, packet loss, and out-of-order packets.
+The statistics are presented in numerical format and plotted with seaborn
+(or rendered to files, plot_mode = 'render').
+Flows can be ST and BE flows.
+
+matplotlib and seaborn are only imported when plots are made, a statistics-only
+run (--stats-only) needs no display and starts in a fraction of the time.
+
+Usage:
+1. Place the tx and rx CSV files (rx only for --latency-mode rxonly) in /tmp/tmpexp/.
+   Or the pcap files, with input_format = 'pcap' (no tshark conversion needed).
+   Or the pcap files of a Pktgen-DPDK run, with input_format = 'pktgen'.
+2. Run txrx-analysis.py or txrx-analysis-rxonly.py (or python -m txrx_analyzer), e.g.
+   ./txrx-analysis.py --directory /tmp/tmpexp/ --flows 1 2 --stats-only
+   The settings below are the defaults of the command line options.
+3. It infers the no_of_flows and proceeds accordingly.
+"""
+
+import os
+import argparse
+import datetime
+import functools
+import pandas as pd
+import numpy as np
+from txrx_pcap import read_pcap
+from txrx_pktgen import read_pktgen
+from txrx_cache import cached_read
+from txrx_ingest import read_tshark_csv, trim_rows
+from txrx_stream import stream_flow_statistics, stream_rx_statistics, iter_flow_file
+from txrx_flows import discover_flows, run_parallel, compact_stats
+from txrx_join import flow_keys, join_sequences, join_frames
+from txrx_metrics import flow_metrics
+from txrx_hdr import LatencyHistogram
+from txrx_demux import flow_codes, common_flows, scan_flows, split_flows, flow_label
+from txrx_windows import flow_windows, write_windows
+from txrx_profile import StageProfiler
+from txrx_clock import estimate_clock, correct_latency, clock_summary
+
+file_date = datetime.datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+
+# Latency mode
+# 'txrx'  : latency = rx capture - tx capture, tx and rx captures joined on the sequence number (txrx-analysis.py)
+# 'rxonly': latency = rx capture - iperf tx time, rx captures only (txrx-analysis-rxonly.py)
+latency_mode = 'txrx'  # 'txrx', 'rxonly'
+
+# Input format of the captures
+# 'csv' : csv files converted from the pcaps by tshark (Section 4a of the txrx scripts)
+# 'pcap': pcap/pcapng files read directly, the tshark conversion step can be skipped
+# 'pktgen': pcap/pcapng files of Pktgen-DPDK latency packets (txrx-dpdk.sh), read as in txrx_pktgen.py
+input_format = 'csv'  # 'csv', 'pcap', 'pktgen'
+
+# Directory of the experiment's csv (or pcap) files
+csv_directory = "/tmp/tmpexp/"
+# Flows to analyse, e.g. [1, 2] for expt-tx1.csv/expt-rx1.csv and expt-tx2.csv/expt-rx2.csv
+# None finds every flow in csv_directory
+flows = None
+# Number of worker processes the flows are analysed in (None: one per cpu core)
+workers = None
+
+# Captures
+# 'flow'     : one capture per flow and direction, expt-txN/expt-rxN (a tshark -f "udp dst port 501N" per flow)
+# 'interface': one capture of all flows per direction, expt-tx/expt-rx, split into flows by demux_keys (txrx_demux.py)
+capture_mode = 'flow'  # 'flow', 'interface'
+demux_keys = ['udp.dstport']  # 'udp.dstport', 'vlan.id', 'ip.src'
+
+# Cache of parsed files, memory-mapped on later runs instead of parsing the files again
+# Capped in size (least recently used entries are evicted) as /tmp/tmpexp is on a small tmpfs
+use_cache = True
+cache_directory = os.path.join(csv_directory, '.cache')
+cache_max_bytes = 256 << 20
+
+# Analysis mode
+# 'memory'   : each flow is loaded fully into a dataframe, statistics and plots
+# 'streaming': captures are read in chunks with bounded memory (for long soak tests), statistics only
+analysis_mode = 'memory'  # 'memory', 'streaming'
+chunk_size = 1_000_000  # rows read per chunk in streaming mode
+reorder_depth = 10_000  # sequence numbers a packet may be reordered by in streaming mode
+
+# Latency histograms (txrx_hdr.py), mergeable across flows and runs, for the tail percentiles
+histogram_digits = 3  # significant digits of the histogram buckets
+histogram_directory = os.path.join(csv_directory, 'histograms')  # None to not save them
+
+# Time-window statistics (txrx_windows.py): latency percentiles, loss, reordering and throughput
+# per tumbling window of the tx time, written as csv files (one per window size) for dashboards
+window_sizes = ['10ms', '100ms', '1s']  # multiples of the smallest, [] to not compute them
+window_directory = os.path.join(csv_directory, 'windows')  # None to not write them
+
+# Clock correction of separate-host runs (txrx_clock.py), in memory mode: offset and drift between the tx and
+# rx host clocks, estimated from the minimum latency per clock_window over the tx time (lower envelope)
+# None    : latency as measured (same host, or clocks trusted)
+# 'drift' : drift removed, the latency keeps its value at the start of the run
+# 'offset': offset and drift removed, the minimum latency (lower envelope) set to clock_min_latency
+clock_correction = None  # None, 'drift', 'offset'
+clock_window = '100ms'
+clock_segments = 1  # >1 for a piecewise linear drift, one line per segment of the run
+clock_min_latency = 0.0  # us, e.g. the propagation and transmission delay of the path, for 'offset'
+
+# Stage profiling (txrx_profile.py): wall and cpu time, peak RSS and rows (packets) per second of each stage
+# (read, join, latency, clock, metrics, histogram, windows, report, plot) and flow, written as a json report
+profile = False
+profile_directory = csv_directory
+profile_cprofile = None  # None, a stage name e.g. 'join', 'hottest' (cProfile dump of the slowest stage)
+
+# Plots
+# 'seaborn': plots of every packet, shown in a window (needs a display, e.g. ssh -X)
+# 'render' : decimated plots (per pixel column envelopes, histogram CDFs) written to plot_directory,
+#            render time independent of the number of packets, no display needed
+plot_mode = 'seaborn'  # 'seaborn', 'render'
+plot_directory = os.path.join(csv_directory, 'plots')
+plot_formats = ('png',)  # 'png', 'svg'
+# Statistics only: no plots, matplotlib and seaborn are not imported (quick checks after each run of a sweep)
+stats_only = False
+
+# Settings read by the worker processes, passed to them with each flow: a worker started by spawn or
+# forkserver (not fork) imports this module afresh, with the settings above instead of the changed ones
+WORKER_SETTINGS = (
+    'latency_mode', 'input_format', 'csv_directory', 'flows', 'capture_mode', 'demux_keys',
+    'use_cache', 'cache_directory', 'cache_max_bytes', 'analysis_mode', 'chunk_size', 'reorder_depth',
+    'histogram_digits', 'window_sizes', 'clock_correction', 'clock_window', 'clock_segments', 'clock_min_latency',
+    'profile', 'profile_cprofile',
+)
+
+# Configured in main(), before the worker processes are started
+profiler = StageProfiler()
+
+
+def worker_settings():
+    """
+    Returns the settings of this process read by the workers, {name: value}.
+    """
+    return {name: globals()[name] for name in WORKER_SETTINGS}
+
+
+def apply_settings(settings):
+    """
+    Sets the settings of worker_settings() in a worker process (None keeps this process' settings),
+    and configures the profiler with them.
+    """
+    if settings is not None and settings != worker_settings():
+        globals().update(settings)
+        # Flows of the captures of other settings
+        capture_flows.cache_clear()
+        read_captures.cache_clear()
+    profiler.enabled = profile
+    profiler.cprofile = profile_cprofile
+
+
+def directions():
+    """
+    Returns the capture directions of latency_mode.
+    """
+    return ('tx', 'rx') if latency_mode == 'txrx' else ('rx',)
+
+
+def flow_name(flow):
+    """
+    Returns the name of a flow's statistics, df_tx1, df_tx2 etc. (df_rx1, df_rx2 etc. in latency_mode 'rxonly').
+    """
+    return f'df_{directions()[0]}{flow}'
+
+
+def time_column():
+    """
+    Returns the capture time column of the statistics (the tx capture in latency_mode 'txrx').
+    """
+    return 'frame.time_epoch_x' if latency_mode == 'txrx' else 'frame.time_epoch'
+
+
+def read_flow_file(file_path):
+    """
+    Returns the dataframe of a flow's csv (or pcap) file, using the cache if enabled.
+    """
+    if input_format in ('pcap', 'pktgen'):
+        file_path = file_path.replace('.csv', '.pcap')
+        reader = read_pktgen if input_format == 'pktgen' else read_pcap
+    else:
+        # Typed, multi-threaded csv parsing into compact dtypes (txrx_ingest.py)
+        reader = read_tshark_csv
+    if use_cache:
+        return cached_read(file_path, reader, cache_directory, cache_max_bytes)
+    return reader(file_path)
+
+
+def capture_file(direction):
+    """
+    Returns the path of the capture of all flows in one direction (capture_mode = 'interface').
+    """
+    extension = 'pcap' if input_format in ('pcap', 'pktgen') else 'csv'
+    return os.path.join(csv_directory, f'expt-{direction}.{extension}')
+
+
+@functools.lru_cache(maxsize=None)
+def read_captures():
+    """
+    Returns the dataframes of the captures of all flows, by direction (capture_mode = 'interface').
+    Read once, for capture_flows() and the flows of every read_csv_files() call.
+    """
+    # Remove the last two rows (views, not copies)
+    return {direction: trim_rows(read_flow_file(capture_file(direction)), 2) for direction in directions()}
+
+
+@functools.lru_cache(maxsize=None)
+def capture_flows():
+    """
+    Returns the flows (values of demux_keys) found in every capture (capture_mode = 'interface'),
+    flow N is capture_flows()[N - 1].
+    """
+    if analysis_mode == 'streaming':
+        return common_flows([scan_flows(iter_flow_file(capture_file(direction), input_format, chunk_size),
+                                        demux_keys) for direction in directions()])
+    return common_flows([flow_codes(df, demux_keys)[1] for df in read_captures().values()])
+
+
+def get_flows():
+    """
+    Returns the flow numbers to analyse.
+    """
+    if flows is not None:
+        return flows
+    if capture_mode == 'interface':
+        return list(range(1, len(capture_flows()) + 1))
+    return discover_flows(csv_directory, input_format, directions=directions())
+
+
+def read_csv_files(flow_list=None):
+    """
+    Returns a dictionary of dataframes, df_tx1, df_rx1, df_tx2, df_rx2 etc. (df_rx1, df_rx2 etc. in
+    latency_mode 'rxonly').
+    """
+    # Flows to read, all flows by default
+    if flow_list is None:
+        flow_list = get_flows()
+    # Create a dictionary to hold dataframes
+    df_dict = {}
+
+    if capture_mode == 'interface':
+        # Split the capture of all flows into the flows (slices of the capture reordered by flow)
+        selected = [capture_flows()[flow - 1] for flow in flow_list]
+        with profiler.stage('read', flow=','.join(flow_name(flow) for flow in flow_list)) as record:
+            split = {direction: split_flows(df, demux_keys, selected) for direction, df in read_captures().items()}
+            record['rows'] = sum(len(df) for frames in split.values() for df in frames)
+        for i, flow in enumerate(flow_list):
+            for direction in directions():
+                df_dict[f'df_{direction}{flow}'] = split[direction][i]
+        return df_dict
+
+    # Read each file (tx & rx, or rx) and create a dataframe
+    for flow in flow_list:
+        with profiler.stage('read', flow=flow_name(flow)) as record:
+            for direction in directions():
+                # Read the files into dataframe names df_tx1, df_rx1 etc.
+                df_name = f'df_{direction}{flow}'
+                df_dict[df_name] = read_flow_file(os.path.join(csv_directory, f'expt-{direction}{flow}.csv'))
+                # Remove the last two rows
+                df_dict[df_name] = trim_rows(df_dict[df_name], 2)  #[1000:51000]
+            record['rows'] = sum(len(df_dict[f'df_{direction}{flow}']) for direction in directions())
+
+    return df_dict
+
+
+def tx_rx_latency(filename, df_tx, df_rx):
+    """
+    Joins the tx and rx packets of a flow and calculates the latency from the capture times (latency_mode 'txrx').
+    Returns the joined dataframe (one row per rx packet), the rx sequence keys, the tx time (in nanoseconds)
+    of each rx packet, the latency arrays ('latency', 'latency2') and the join.
+    """
+    rows = len(df_rx)
+
+    # Join the dataframes on the sequence number ('iperf.id' and 'iperf.id2'), one row per rx packet
+    with profiler.stage('join', filename, len(df_tx) + rows):
+        rx_keys = flow_keys(df_rx)
+        join = join_sequences(flow_keys(df_tx), rx_keys)
+        df = join_frames(df_tx, df_rx, join)
+
+    with profiler.stage('latency', filename, rows):
+        # Write txtime (in microseconds) using frame.epoch tx time/iperf.sec and .usec
+        df['time_tx'] = df['iperf.sec_x'] * 1e6 + df['iperf.usec_x']  #df['frame.time_epoch_x'] * 1e6
+
+        # Calculate the latency (in microseconds)
+        # rx capture - iperf tx
+        latency2 = ((df['frame.time_epoch_y'].to_numpy() - df['iperf.sec_x'].to_numpy()) * 1e6
+                    - df['iperf.usec_x'].to_numpy())
+        # rx capture - tx capture, from the exact nanosecond capture timestamps
+        time_ns_tx = df_tx['frame.time_ns'].to_numpy()[join.tx_index]
+        latency = np.where(join.tx_index >= 0, (df_rx['frame.time_ns'].to_numpy() - time_ns_tx) / 1e3, np.nan)
+        # tx capture time (rx capture time of packets not found at tx)
+        time_tx_ns = np.where(join.tx_index >= 0, time_ns_tx, df_rx['frame.time_ns'].to_numpy())
+
+    return df, rx_keys, time_tx_ns, {'latency': latency, 'latency2': latency2}, join
+
+
+def rx_latency(filename, df):
+    """
+    Calculates the latency from the rx capture time and the iperf tx time (latency_mode 'rxonly').
+    Returns the dataframe, its sequence keys, the iperf tx time (in nanoseconds) of each packet and
+    the latency array ('latency').
+    """
+    with profiler.stage('latency', filename, len(df)):
+        # Write txtime (in microseconds) using iperf.sec and .usec
+        df['time_tx'] = df['iperf.sec'] * 1e6 + df['iperf.usec']
+
+        # Calculate the latency (in microseconds)
+        # rx capture - iperf tx, from the exact nanosecond capture timestamp
+        # (int64, the csv columns are read as uint32)
+        time_tx_ns = (df['iperf.sec'].to_numpy(np.int64) * 1_000_000_000
+                      + df['iperf.usec'].to_numpy(np.int64) * 1_000)
+        latency = (df['frame.time_ns'].to_numpy(np.int64) - time_tx_ns) / 1e3
+        keys = flow_keys(df)
+
+    return df, keys, time_tx_ns, {'latency': latency}
+
+
+def correct_clock(filename, time_tx_ns, latencies):
+    """
+    Estimates the offset and drift between the tx and rx host clocks from the lower envelope of the latency
+    (txrx_clock.py), and removes them from the latency arrays in place, as set by clock_correction.
+    Returns the clock summary (offset, skew, drift and segments), or None.
+    """
+    if clock_correction is None:
+        return None
+    with profiler.stage('clock', filename, len(time_tx_ns)):
+        segments = estimate_clock(time_tx_ns, latencies['latency'], clock_window, clock_segments)
+        for latency in latencies.values():
+            correct_latency(latency, time_tx_ns, segments, clock_correction, clock_min_latency)
+    return clock_summary(segments)
+
+
+def extract_statistics(df_dict):
+    """
+    Extracts statistics related to latency, jitter, packet loss, and out-of-order packets.
+    Returns a dictionary containing the statistics.
+    """
+    stats_dict = {}
+
+    # Iterate over each flow's dataframes
+    # Pick the 1st, 3rd etc. items (the tx dataframes) based on their order in latency_mode 'txrx'
+    for filename in list(df_dict)[::len(directions())]:
+        if latency_mode == 'txrx':
+            # Get the corresponding rx dataframe
+            df_rx = df_dict[filename.replace('tx', 'rx')]
+            df, keys, time_tx_ns, latencies, join = tx_rx_latency(filename, df_dict[filename], df_rx)
+        else:
+            df, keys, time_tx_ns, latencies = rx_latency(filename, df_dict[filename])
+            df_rx, join = df, None
+        rows = len(df)
+
+        # Offset and drift between the tx and rx host clocks, removed from the latency arrays in place
+        clock = correct_clock(filename, time_tx_ns, latencies)
+        for column, values in latencies.items():
+            df[column] = values
+
+        # Jitter, packet loss, out-of-order and reordering metrics, with one sort of the flow
+        # (see txrx_metrics.py), as float32/uint32 columns
+        with profiler.stage('metrics', filename, rows):
+            metrics = flow_metrics(keys, df['latency'].to_numpy())
+            for column, values in metrics.columns.items():
+                df[column] = values
+
+        # Store the stats values in the dictionary
+        columns_to_keep = ['time_tx', time_column(), 'iperf.id', 'latency', *metrics.columns]
+        stats_dict[filename] = df[columns_to_keep]
+        stats_dict[filename].attrs['loss-bursts'] = metrics.loss_bursts
+        stats_dict[filename].attrs['reorder-density'] = metrics.reorder_density
+        # Latency histogram, for tail percentiles and merging with other flows and runs
+        with profiler.stage('histogram', filename, rows):
+            histogram = LatencyHistogram(histogram_digits)
+            histogram.record(df['latency'].to_numpy())
+        stats_dict[filename].attrs['latency-histogram'] = histogram
+        # Per window statistics over the tx time
+        with profiler.stage('windows', filename, rows if window_sizes else 0):
+            stats_dict[filename].attrs['windows'] = flow_windows(
+                keys, time_tx_ns, df['latency'].to_numpy(), df_rx['frame.len'].to_numpy(),
+                window_sizes) if window_sizes else None
+        if clock is not None:
+            stats_dict[filename].attrs['clock'] = clock
+        if join is not None:
+            # Packets only in tx (lost) or only in rx (spurious), and repeated sequence numbers
+            stats_dict[filename].attrs['join'] = {
+                'tx-only': len(join.tx_only),
+                'rx-only': len(join.rx_only),
+                'tx-duplicates': len(join.tx_duplicates),
+                'rx-duplicates': len(join.rx_duplicates),
+            }
+        # TSC calibration of the captures (input_format = 'pktgen'), by direction
+        inputs = {direction: df_dict[filename.replace(directions()[0], direction)] for direction in directions()}
+        calibration = {direction: df.attrs['tsc-calibration'] for direction, df in inputs.items()
+                       if 'tsc-calibration' in df.attrs}
+        if calibration:
+            stats_dict[filename].attrs['tsc-calibration'] = calibration
+
+    return stats_dict
+
+
+def analyze_flow(flow, settings=None):
+    """
+    Reads one flow and extracts its statistics (run in a worker process, with the settings of
+    worker_settings() in the main process).
+    Returns a compact result: the latency summary, join counts (latency_mode 'txrx'), clock summary
+    (clock_correction), window tables and downcast statistics.
+    """
+    apply_settings(settings)
+    stats_dict = extract_statistics(read_csv_files([flow]))
+    name, stats_df = next(iter(stats_dict.items()))
+    # Returned on their own, attrs are copied along with the dataframe
+    windows = stats_df.attrs.pop('windows')
+    result = {
+        'name': name,
+        'windows': windows,
+        'latency': stats_df['latency'].describe(),
+        'histogram': stats_df.attrs['latency-histogram'],
+        'stats': compact_stats(stats_df),
+        'profile': profiler.take(),
+    }
+    for key in ('join', 'clock', 'tsc-calibration'):
+        if key in stats_df.attrs:
+            result[key] = stats_df.attrs[key]
+    return result
+
+
+def analyze_flows():
+    """
+    Analyses every flow in parallel worker processes.
+    Returns a list of analyze_flow() results, in flow order.
+    """
+    results = run_parallel(functools.partial(analyze_flow, settings=worker_settings()), get_flows(), workers)
+    for result in results:
+        profiler.merge(result.pop('profile'))
+    return results
+
+
+def stream_flow(flow, settings=None):
+    """
+    Streaming (bounded-memory) statistics of one flow (run in a worker process, with the settings of
+    worker_settings() in the main process).
+    """
+    apply_settings(settings)
+    file_paths = {direction: os.path.join(csv_directory, f'expt-{direction}{flow}.csv') for direction in directions()}
+    if input_format in ('pcap', 'pktgen'):
+        file_paths = {direction: path.replace('.csv', '.pcap') for direction, path in file_paths.items()}
+    demux = None
+    if capture_mode == 'interface':
+        file_paths = {direction: capture_file(direction) for direction in directions()}
+        demux = (demux_keys, capture_flows()[flow - 1])
+    with profiler.stage('stream', flow_name(flow)) as record:
+        if latency_mode == 'txrx':
+            summary = stream_flow_statistics(file_paths['tx'], file_paths['rx'], input_format,
+                                             chunk_size=chunk_size, reorder_depth=reorder_depth, demux=demux,
+                                             window_sizes=window_sizes, histogram_digits=histogram_digits)
+        else:
+            summary = stream_rx_statistics(file_paths['rx'], input_format, chunk_size=chunk_size,
+                                           reorder_depth=reorder_depth, demux=demux, window_sizes=window_sizes,
+                                           histogram_digits=histogram_digits)
+        record['rows'] = summary['rows']
+    summary['profile'] = profiler.take()
+    return summary
+
+
+def extract_statistics_streaming():
+    """
+    Streaming (bounded-memory) version of read_csv_files() + extract_statistics().
+    Returns a dictionary containing a summary of the statistics of each flow.
+    """
+    flow_list = get_flows()
+    summaries = run_parallel(functools.partial(stream_flow, settings=worker_settings()), flow_list, workers)
+    for summary in summaries:
+        profiler.merge(summary.pop('profile'))
+    # Summaries are keyed as df_tx1, df_tx2 etc. same as extract_statistics()
+    return {flow_name(flow): summary for flow, summary in zip(flow_list, summaries)}
+
+
+def report_clock(clock):
+    """
+    Prints the clock offset and skew estimated for a flow, and the segments of a piecewise drift.
+    """
+    print(f"Clock ({clock_correction} corrected): offset {clock['offset']:.3f} us (minimum latency at the start), "
+          f"skew {clock['skew']:.4f} ppm, drift {clock['drift']:.3f} us over {clock['duration']:.1f} s")
+    if len(clock['segments']) > 1:
+        start = clock['segments'][0]['start_ns']
+        print(', '.join(f"{(segment['start_ns'] - start) / 1e9:.1f} s: {segment['skew']:.4f} ppm"
+                        for segment in clock['segments']))
+
+
+def report_tsc(calibration):
+    """
+    Prints the TSC calibration of a pktgen flow's captures (frequency, and wall time of a TSC value).
+    """
+    for direction, tsc in calibration.items():
+        print(f"TSC calibration ({direction}): {tsc['hz'] / 1e6:.6f} MHz, offset: TSC {tsc['tsc_ref']} at "
+              f"{tsc['time_ref_ns']} ns, residual {tsc['residual_ns']:.0f} ns")
+
+
+def report_histograms(histograms):
+    """
+    Prints the tail latency percentiles of each flow and of all flows together,
+    and saves the histograms to histogram_directory.
+    """
+    histograms = dict(histograms, all=LatencyHistogram.merged(histograms.values()))
+    print("======>Latency percentiles (us):")
+    print(pd.DataFrame({name: histogram.summary() for name, histogram in histograms.items()}))
+    if histogram_directory is not None:
+        os.makedirs(histogram_directory, exist_ok=True)
+        for name, histogram in histograms.items():
+            histogram.save(os.path.join(histogram_directory, f'{name}-{file_date}.npz'))
+
+
+def report_windows(windows):
+    """
+    Writes the time-window statistics of each flow ({flow: {size: table}}) to window_directory,
+    one csv file per window size.
+    """
+    windows = {name: tables for name, tables in windows.items() if tables is not None}
+    if windows and window_directory is not None:
+        for path in write_windows(windows, window_directory, file_date):
+            print(f"Window statistics written to {path}")
+
+
+def plot_windows(windows):
+    """
+    Renders the time-window statistics of each flow ({flow: {size: table}}) to plot_directory,
+    one plot per window size.
+    """
+    windows = {name: tables for name, tables in windows.items() if tables is not None}
+    if windows:
+        from txrx_render import render_windows
+        for size in window_sizes:
+            for path in render_windows({name: tables[size] for name, tables in windows.items()}, plot_directory,
+                                       f'windows-{size}-{file_date}', plot_formats):
+                print(f"Plot written to {path}")
+
+
+def report_profile():
+    """
+    Prints the time, memory and throughput of each analysis stage, and writes the json report
+    (and the cProfile dump) to profile_directory.
+    """
+    if not profile:
+        return
+    print("======>Stage profile:")
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(profiler.summary())
+    settings = {'latency_mode': latency_mode, 'input_format': input_format, 'capture_mode': capture_mode,
+                'analysis_mode': analysis_mode, 'flows': get_flows(), 'workers': workers, 'chunk_size': chunk_size,
+                'plot_mode': None if stats_only else plot_mode}
+    for path in profiler.write(profile_directory, f'profile-{file_date}', settings):
+        print(f"Profile written to {path}")
+
+
+def plot_statistics(stats_dict):
+    """
+    Generates plots using seaborn.
+    Create a time-series line plot for latency, jitter, packet loss, and out-of-order count
+    """
+    # Imported here, statistics-only runs do not load the plotting stack
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Set the plotting parameters
+    plotting = 'Subplots'  # 'Subplots', 'Separate'
+    sns.set_theme(style='whitegrid',
+                  context='notebook',
+                  font_scale=1,
+                  rc={'figure.figsize': (16, 9)})
+
+    # Prepare data for plots
+    time = time_column()
+    for file, df in stats_dict.items():
+        # Ensure the timestamp column is of datetime type and set as the index
+        df[time] = pd.to_datetime(df[time], unit='s')
+        # Normalize the timestamps to start from 0
+        df['time_from_start(s)'] = (df[time] - df[time].iloc[0]).dt.total_seconds()
+        # Kept as a column, not the index: duplicated packets have the same tx time (seaborn needs a unique index)
+        # df.set_index('time_from_start(s)', inplace=True)
+        # df.set_index('iperf.id', inplace=True)
+
+    # Define the columns you want to plot (excluding the capture time and 'iperf.id')
+    columns_to_plot = [column for column in next(iter(stats_dict.values())).columns if column not
+                       in ['time_tx', time, 'iperf.id', 'latency', 'jitter']]  #, 'lost', 'out-of-order']]
+
+    ' Time-Series & CDF plot for each flow '
+    for file, df in stats_dict.items():
+        # Create a figure and a list of subplots
+        fig, axes = plt.subplots(nrows=len(columns_to_plot), ncols=1, figsize=(10, 6), sharex=True)
+        # Plot each column on a separate subplot
+        for i, column in enumerate(columns_to_plot):
+            sns.scatterplot(ax=axes[i], data=df, x='time_from_start(s)', y=column)
+            axes[i].set_ylabel(column)
+            axes[i].set_title(f'Time Series of {column}')
+
+        # CDF plot (latency_mode 'rxonly', as in txrx-analysis-rxonly.py)
+        if latency_mode == 'rxonly':
+            # Create a figure and a list of subplots
+            fig, axes = plt.subplots(nrows=len(columns_to_plot), ncols=1, figsize=(10, 6))
+            # Plot each column on a separate subplot
+            for i, column in enumerate(columns_to_plot):
+                sns.ecdfplot(ax=axes[i], data=df, x=column, lw=2, stat='count', log_scale=(False, False))
+                axes[i].set_title(f'CDF of {column}')
+
+            # Adjust the layout
+            plt.suptitle("Packet Flow Statistics", y=1.02)
+            plt.tight_layout()
+
+    ' CDF plot - side-by-side latency plot for 1 ST and 1 BE flow '
+    # fig, axes = plt.subplots(1, 2, tight_layout=True)  # , sharex='col')
+    # sns.ecdfplot(ax=axes[0], data=stats_dict.get('df_tx1'), x='latency', lw=7, stat='proportion', log_scale=(False, False))
+    # sns.ecdfplot(ax=axes[1], data=stats_dict.get('df_tx2'), x='latency', lw=7, stat='proportion', log_scale=(False, False))
+    # axes[0].set_ylabel('Latency CDF [ST]')
+    # axes[1].set_ylabel('Latency CDF [BE]')
+    # # ax.set_xlabel('Latency (ms)')
+    # # ax.legend(loc='lower right')
+    # fig.suptitle('Cumulative Distribution Function (CDF) of Latency')  #, y=1)
+
+    ' All together - Time-Series & CDF for 1 ST and 1 BE flow, and all flows '
+    # One row for each of the first two flows (ST, BE) and a last row with all flows
+    flow_labels = dict(zip(list(stats_dict)[:2], ['ST', 'BE']))
+    fig, axes = plt.subplots(len(flow_labels) + 1, 3, squeeze=False)  # , sharex='col')
+    # Latency Time-Series
+    for row, (key, label) in enumerate(flow_labels.items()):
+        sns.scatterplot(ax=axes[row, 1], data=stats_dict.get(key), x='time_from_start(s)', y='latency')
+        axes[row, 1].set_title(f'Latency TimeSeries [{label}]')
+    for i, (key, df) in enumerate(stats_dict.items()):
+        sns.scatterplot(ax=axes[-1, 1], data=df, x='time_from_start(s)', y='latency', legend=True)
+                        # hue='Flows', style='Flows', size='Flows', palette='dark')
+    axes[-1, 1].set_title('Latency TimeSeries [All flows]')
+    # Important : Plot of received timestamp for these flows shows clear demarcation
+    # sns.scatterplot(data=df, x='iperf.id', y= 'frame.time_epoch')
+
+    # Latency CDF
+    for row, (key, label) in enumerate(flow_labels.items()):
+        sns.ecdfplot(ax=axes[row, 2], data=stats_dict.get(key), x='latency', lw=7, stat='proportion', log_scale=(False, False))
+        axes[row, 2].set_title(f'Latency CDF [{label}]')
+    for i, (key, df) in enumerate(stats_dict.items()):
+        sns.ecdfplot(ax=axes[-1, 2], data=df, x='latency', lw=7, stat='proportion', log_scale=(False, False), label=key)
+    axes[-1, 2].set_title('Latency CDF [All flows]')
+    axes[-1, 2].legend(loc='best')
+    # sns.stripplot(x='Flows', y='Latency (ms)', data=Time_Data)
+
+    # Latency Time-Series boxplot
+    # Define outlier properties for boxplots
+    flierprops = dict(marker='o', markersize=1)
+    bin_size = 20
+    # Binning the data and create another column which represents each time bin
+    for file, df in stats_dict.items():
+        df['Time'] = pd.cut(df['time_from_start(s)'], bins=bin_size, labels=False)
+    for row, key in enumerate(flow_labels):
+        sns.boxplot(ax=axes[row, 0], data=stats_dict.get(key), x='Time', y='latency', showfliers=True, flierprops=flierprops, label=key)
+    for i, (key, df) in enumerate(stats_dict.items()):
+        sns.boxplot(ax=axes[-1, 0], data=df, x='Time', y='latency', showfliers=False, flierprops=flierprops, label=key)
+    for row in range(len(flow_labels) + 1):
+        axes[row, 0].grid()
+    # sns.despine()
+
+    fig.suptitle('Latency vs Time - for Scheduled Traffic and Best Effort flows - [Scheduled Traffic (ST)]', y=1)
+    plt.tight_layout()
+
+
+def parse_args(argv=None):
+    """
+    Returns the command line options, their defaults are the settings above.
+    """
+    parser = argparse.ArgumentParser(description='Latency, jitter, packet loss and out-of-order statistics '
+                                                 'of iperf flows captured at tx and rx (or rx only).')
+    parser.add_argument('-m', '--latency-mode', choices=('txrx', 'rxonly'), default=latency_mode,
+                        help='txrx: rx capture - tx capture; rxonly: rx capture - iperf tx time (default: %(default)s)')
+    parser.add_argument('-d', '--directory', default=csv_directory,
+                        help="directory of the experiment's captures, the cache, histograms, windows, plots and "
+                             "profile are written into it (default: %(default)s)")
+    parser.add_argument('-f', '--flows', type=int, nargs='+', default=flows,
+                        help='flows to analyse, e.g. 1 2 (default: every flow found in the directory)')
+    parser.add_argument('-s', '--stats-only', action='store_true', default=stats_only,
+                        help='statistics only, no plots (matplotlib and seaborn are not imported)')
+    parser.add_argument('--input-format', choices=('csv', 'pcap', 'pktgen'), default=input_format,
+                        help='default: %(default)s')
+    parser.add_argument('--capture-mode', choices=('flow', 'interface'), default=capture_mode,
+                        help='default: %(default)s')
+    parser.add_argument('--demux-keys', nargs='+', choices=('udp.dstport', 'vlan.id', 'ip.src'), default=demux_keys,
+                        help='default: %(default)s')
+    parser.add_argument('--analysis-mode', choices=('memory', 'streaming'), default=analysis_mode,
+                        help='default: %(default)s')
+    parser.add_argument('--plot-mode', choices=('seaborn', 'render'), default=plot_mode, help='default: %(default)s')
+    parser.add_argument('-w', '--workers', type=int, default=workers,
+                        help='worker processes (default: one per cpu core)')
+    parser.add_argument('--clock-correction', choices=('drift', 'offset'), default=clock_correction,
+                        help='remove the drift (or offset and drift) between the tx and rx host clocks, in memory '
+                             'mode (default: no correction)')
+    parser.add_argument('--clock-segments', type=int, default=clock_segments,
+                        help='segments of the run with their own clock drift (default: %(default)s)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', default=use_cache,
+                        help='parse the captures without the cache of parsed files')
+    parser.add_argument('--profile', action='store_true', default=profile,
+                        help='profile the analysis stages, written as a json report')
+    return parser.parse_args(argv)
+
+
+def configure(args):
+    """
+    Sets the settings from the command line options.
+    The cache, histogram, window, plot and profile directories follow a changed csv_directory.
+    """
+    global latency_mode, csv_directory, flows, stats_only, input_format, capture_mode, demux_keys, analysis_mode, \
+        plot_mode, workers, use_cache, profile, clock_correction, clock_segments, cache_directory, \
+        histogram_directory, window_directory, plot_directory, profile_directory
+    if os.path.normpath(args.directory) != os.path.normpath(csv_directory):
+        def moved(path):
+            # Paths in csv_directory are moved to the new directory, others (and None) are kept
+            relative = os.path.relpath(path, csv_directory) if path is not None else os.pardir
+            return path if relative.startswith(os.pardir) else os.path.normpath(os.path.join(args.directory, relative))
+        cache_directory, histogram_directory, window_directory, plot_directory, profile_directory = map(
+            moved, (cache_directory, histogram_directory, window_directory, plot_directory, profile_directory))
+        csv_directory = args.directory
+    latency_mode = args.latency_mode
+    flows = args.flows
+    stats_only = args.stats_only
+    input_format = args.input_format
+    capture_mode = args.capture_mode
+    demux_keys = list(args.demux_keys)
+    analysis_mode = args.analysis_mode
+    plot_mode = args.plot_mode
+    workers = args.workers
+    use_cache = args.use_cache
+    profile = args.profile
+    clock_correction = args.clock_correction
+    clock_segments = args.clock_segments
+
+
+def main(argv=None):
+    configure(parse_args(argv))
+    apply_settings(None)
+
+    if capture_mode == 'interface':
+        for flow, key in enumerate(capture_flows(), 1):
+            print(f"Flow {flow}: {flow_label(demux_keys, key)}")
+
+    if analysis_mode == 'streaming':
+        if clock_correction is not None:
+            print("Clock correction is only applied in memory mode (analysis_mode = 'memory')")
+        # Statistics of each flow, without keeping the flows in memory
+        summary_dict = extract_statistics_streaming()
+        print(f"Number of flows: {len(summary_dict)}")
+        for file, summary in summary_dict.items():
+            print(f"======>Latency statistics for {file}:")
+            print(summary['latency'])
+            print(f"Jitter (mean rolling std): {summary['jitter']['mean']:.3f}, "
+                  f"lost: {summary['lost']}, out-of-order: {summary['out-of-order']}")
+            if 'tsc-calibration' in summary:
+                report_tsc(summary['tsc-calibration'])
+        with profiler.stage('report'):
+            report_histograms({file: summary['latency-histogram'] for file, summary in summary_dict.items()})
+            report_windows({file: summary['windows'] for file, summary in summary_dict.items()})
+        if plot_mode == 'render' and not stats_only:
+            with profiler.stage('plot'):
+                plot_windows({file: summary['windows'] for file, summary in summary_dict.items()})
+        report_profile()
+        return
+
+    # Read the files and extract the statistics of each flow, in parallel
+    results = analyze_flows()
+    stats_dict = {result['name']: result['stats'] for result in results}
+
+    # Print the number of flows
+    print(f"Number of flows: {len(results)}")
+
+    # Latency statistics for each flow
+    for result in results:
+        print(f"======>Latency statistics for {result['name']}:")
+        # Also provides jitter (i.e. latency_values.std())
+        print(result['latency'])
+        if 'join' in result:
+            print(', '.join(f"{key}: {value}" for key, value in result['join'].items()))
+        if 'clock' in result:
+            report_clock(result['clock'])
+        if 'tsc-calibration' in result:
+            report_tsc(result['tsc-calibration'])
+        print(f"Loss bursts (length: count): {result['stats'].attrs['loss-bursts']}")
+        print("Reorder density (displacement: fraction): "
+              + ', '.join(f"{key}: {value:.4f}" for key, value in result['stats'].attrs['reorder-density'].items()))
+
+    with profiler.stage('report'):
+        report_histograms({result['name']: result['histogram'] for result in results})
+        report_windows({result['name']: result['windows'] for result in results})
+
+    if stats_only:
+        report_profile()
+        return
+
+    # Plots for flows
+    rows = sum(len(stats_df) for stats_df in stats_dict.values())
+    if plot_mode == 'render':
+        from txrx_render import render_statistics
+        with profiler.stage('plot', rows=rows):
+            for path in render_statistics(stats_dict, plot_directory, time_column(), formats=plot_formats,
+                                          date=file_date):
+                print(f"Plot written to {path}")
+            plot_windows({result['name']: result['windows'] for result in results})
+        report_profile()
+        return
+    with profiler.stage('plot', rows=rows):
+        plot_statistics(stats_dict)
+    report_profile()
+
+    import matplotlib.pyplot as plt
+    # plt.show()
+    plt.show(block=True)
+    # plt.close()
+
+
+if __name__ == "__main__":
+    main()
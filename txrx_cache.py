@@ -0,0 +1,215 @@
+"""
+Columnar Cache of parsed captures
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Caches each parsed flow file (csv or pcap) as typed binary columns (one .npy
+file per column), so that later runs memory-map the cached columns instead of
+parsing the file again (e.g. when only a plot is changed and the script re-run).
+
+- Entries are keyed by the file's path, size, mtime and a content hash of
+  sampled blocks (start, middle and end of the file), so that a re-captured
+  or re-converted file is parsed again.
+- Capture timestamps are stored as int64 nanoseconds ('frame.time_ns'), parsed
+  from the csv text without float rounding. 'frame.time_epoch' is kept as well.
+- The cache directory is capped in size, least recently used entries are evicted.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Bump when the cached column layout changes
+CACHE_VERSION = 2
+# Bytes hashed from each of the start, middle and end of the file
+HASH_BLOCK = 1 << 20
+# Default size cap of the cache directory
+MAX_CACHE_BYTES = 256 << 20
+# Rows parsed at once when converting epoch strings to nanoseconds
+PARSE_BLOCK = 1 << 20
+
+
+def parse_epoch_ns(values):
+    """
+    Parses decimal epoch seconds strings (e.g. '1700000000.123456789', as printed
+    by tshark for frame.time_epoch) into int64 nanoseconds without float rounding.
+    """
+    values = np.asarray(values)
+    result = np.zeros(len(values), dtype=np.int64)
+    for start in range(0, len(values), PARSE_BLOCK):
+        text = values[start:start + PARSE_BLOCK].astype('S')
+        width = text.dtype.itemsize
+        chars = text.view(np.uint8).reshape(len(text), width)
+        point = chars == ord('.')
+        # Position of the decimal point, or the end of the string if there is none
+        point = np.where(point.any(axis=1), point.argmax(axis=1), (chars != 0).sum(axis=1))
+        value = np.zeros(len(text), dtype=np.int64)
+        for column in range(width):
+            # Power of ten of this character's digit in nanoseconds
+            exponent = np.where(column < point, point - column + 8, 9 - (column - point))
+            digit = chars[:, column].astype(np.int64) - ord('0')
+            valid = (digit >= 0) & (digit <= 9) & (exponent >= 0)
+            value += np.where(valid, digit * 10 ** np.clip(exponent, 0, 18), 0)
+        result[start:start + len(text)] = value
+    return result
+
+
+def parse_hex(values):
+    """
+    Parses hexadecimal strings (e.g. '0x0000', as printed by tshark for base.HEX fields like iperf.tos) into int64.
+    """
+    codes, unique = pd.factorize(np.asarray(values, dtype=object))
+    # Empty fields (NaN, code -1) are taken as 0, the last entry
+    return np.array([int(str(value), 16) for value in unique] + [0], dtype=np.int64)[codes]
+
+
+def parse_ipv4(values):
+    """
+    Parses dotted ipv4 address strings (e.g. '192.168.10.20', as printed by tshark for ip.src) into int64.
+    """
+    codes, unique = pd.factorize(np.asarray(values, dtype=object))
+    # Empty fields (NaN, code -1) are taken as 0, the last entry
+    return np.array([int.from_bytes(bytes(int(part) for part in str(value).split('.')), 'big')
+                     if str(value).count('.') == 3 else 0 for value in unique] + [0], dtype=np.int64)[codes]
+
+
+def parse_csv_columns(df):
+    """
+    Converts the text columns of a tshark csv dataframe to integers, and parses frame.time_epoch
+    into exact int64 'frame.time_ns'.
+    """
+    if 'iperf.tos' in df and not pd.api.types.is_numeric_dtype(df['iperf.tos']):
+        # String columns can't be memory-mapped from the cache
+        df['iperf.tos'] = parse_hex(df['iperf.tos'])
+    # Flow keys of a capture of several flows (tshark -e vlan.id -e ip.src), see txrx_demux.py
+    if 'ip.src' in df and not pd.api.types.is_numeric_dtype(df['ip.src']):
+        df['ip.src'] = parse_ipv4(df['ip.src']).astype(np.uint32)
+    if 'vlan.id' in df and pd.api.types.is_numeric_dtype(df['vlan.id']):
+        df['vlan.id'] = df['vlan.id'].fillna(0).astype(np.uint16)
+    epoch = df['frame.time_epoch'].fillna('0').to_numpy()
+    df['frame.time_ns'] = parse_epoch_ns(epoch)
+    df['frame.time_epoch'] = df['frame.time_ns'] / 1e9
+    return df
+
+
+def read_csv_flow(file_path):
+    """
+    Reads a tshark csv file, with frame.time_epoch also parsed into exact int64 'frame.time_ns'.
+    """
+    return parse_csv_columns(pd.read_csv(file_path, dtype={'frame.time_epoch': str}))
+
+
+def fingerprint(file_path):
+    """
+    Returns a hex digest of the file's path, size, mtime and sampled content.
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{CACHE_VERSION}:{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(file_path, 'rb') as f:
+        for offset in sorted({0, max(stat.st_size // 2 - HASH_BLOCK // 2, 0), max(stat.st_size - HASH_BLOCK, 0)}):
+            f.seek(offset)
+            digest.update(f.read(HASH_BLOCK))
+    return digest.hexdigest()
+
+
+def cacheable_column(column, values):
+    """
+    Returns the values of a column as a numeric array that can be memory-mapped: text columns of hex
+    (e.g. iperf.tos, base.HEX in the dissector) or decimal numbers are parsed, others raise ValueError.
+    """
+    if values.dtype != object and not isinstance(values.dtype, pd.StringDtype):
+        return np.asarray(values)
+    text = pd.Series(values, dtype=object).dropna().astype(str)
+    if len(text) and text.str.match(r'^0[xX][0-9a-fA-F]+$').all():
+        return parse_hex(values)
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    if numbers.notna().sum() == len(text):
+        return numbers.to_numpy()
+    raise ValueError(f"Column {column!r} is not numeric, it can't be memory-mapped from the cache")
+
+
+def _entry_size(entry):
+    return sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+
+
+def store(entry, df):
+    """
+    Writes the dataframe's columns as .npy files into the entry directory, and its attrs (e.g. the
+    TSC calibration of txrx_pktgen.py) with the column names.
+    Raises ValueError (before writing anything) if a column is not numeric or the attrs are not json.
+    """
+    arrays = [cacheable_column(column, df[column].to_numpy()) for column in df.columns]
+    try:
+        json.dumps(df.attrs)
+    except TypeError as error:
+        raise ValueError(f"attrs not cacheable: {error}") from None
+    tmp = entry + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, (column, values) in enumerate(zip(df.columns, arrays)):
+        np.save(os.path.join(tmp, f'{i}.npy'), values)
+        columns.append(column)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'columns': columns, 'rows': len(df), 'attrs': df.attrs}, f)
+    shutil.rmtree(entry, ignore_errors=True)
+    os.rename(tmp, entry)
+
+
+def load(entry):
+    """
+    Returns the dataframe of a cache entry, with its columns memory-mapped.
+    """
+    with open(os.path.join(entry, 'meta.json')) as f:
+        meta = json.load(f)
+    columns = {column: np.load(os.path.join(entry, f'{i}.npy'), mmap_mode='r')
+               for i, column in enumerate(meta['columns'])}
+    # Mark the entry as recently used
+    os.utime(entry)
+    df = pd.DataFrame(columns, copy=False)
+    df.attrs = meta.get('attrs', {})
+    return df
+
+
+def evict(cache_dir, max_bytes=MAX_CACHE_BYTES):
+    """
+    Removes the least recently used entries until the cache is at most max_bytes.
+    """
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+               if not name.endswith('.tmp') and os.path.isdir(os.path.join(cache_dir, name))]
+    entries.sort(key=lambda entry: os.path.getmtime(entry))
+    sizes = {entry: _entry_size(entry) for entry in entries}
+    total = sum(sizes.values())
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= sizes[entry]
+
+
+def cached_read(file_path, reader, cache_dir, max_bytes=MAX_CACHE_BYTES):
+    """
+    Returns reader(file_path), from the cache if the file was parsed before.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir, f"{reader.__name__}-{fingerprint(file_path)}")
+    if os.path.exists(os.path.join(entry, 'meta.json')):
+        return load(entry)
+
+    df = reader(file_path)
+    try:
+        store(entry, df)
+    except ValueError as error:
+        # Not cacheable (a text column), parsed again on the next run
+        print(f"Not cached: {file_path}: {error}")
+        return df
+    evict(cache_dir, max_bytes)
+    if os.path.exists(entry):
+        return load(entry)
+    return df
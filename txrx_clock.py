@@ -0,0 +1,182 @@
+"""
+Clock Offset and Drift Correction of Separate-Host Latency
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+With tx and rx on separate hosts (txrx-separate-hosts.sh, clocks synchronised
+by ptp4l/phc2sys as in archive-txrx-pcap.sh), the latency is the difference of
+two host clocks: any residual offset between them is added to every packet, and
+a drift (skew) adds a latency growing linearly with the run.
+The offset and skew are estimated from the packets themselves, as the lower
+envelope of the latency over the tx time (minimum-delay regression):
+- the minimum latency of each window of the tx time (e.g. 100 ms) is the path's
+  fixed delay plus the clock offset at that time, queueing only adds to it
+- the line below all window minima with the least area above it (the linear
+  program of Moon et al., solved exactly by the lower convex hull of the minima)
+  gives the offset and skew, insensitive to queueing and latency spikes
+- optionally piecewise: one line per segment of the run (a drift changing with
+  temperature, or a clock step of phc2sys)
+The packets are processed in chunks with vectorized numpy operations (O(n),
+temporaries of chunk_size rows), the fit is on the window minima only.
+The correction is subtracted from the latency arrays in place:
+- 'drift' : the latency keeps its value at the start of the run, the drift is removed
+- 'offset': offset and drift are removed, the lower envelope is set to a known
+            minimum latency (e.g. the propagation and transmission delay), 0 by default
+The skew is reported in ppm (us of latency per s of the run): positive when the
+rx clock runs faster than the tx clock.
+"""
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from txrx_windows import window_ns
+
+# Window of the tx time over which the minimum latency is taken
+CLOCK_WINDOW = '100ms'
+# Rows processed per chunk, bounds the temporary arrays
+CHUNK_ROWS = 1 << 22
+
+ClockSegment = namedtuple('ClockSegment', [
+    'start_ns',  # tx time (epoch, in nanoseconds) of the start of the segment
+    'end_ns',    # tx time of the end of the segment
+    'offset',    # lower envelope of the latency at start_ns (us): minimum latency + clock offset
+    'skew',      # slope of the lower envelope (ppm, i.e. us per s): drift of the rx clock against the tx clock
+    'windows',   # number of window minima the segment was fitted on
+])
+
+
+def _chunks(n, chunk_size):
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def _window_index(windows, ids):
+    """
+    Returns the index in windows (sorted window numbers) of window numbers, clipped to its range.
+    """
+    if windows[-1] - windows[0] == len(windows) - 1:
+        # No gap between the windows, the common case
+        return np.clip(ids - windows[0], 0, len(windows) - 1)
+    return np.minimum(np.searchsorted(windows, ids), len(windows) - 1)
+
+
+def window_minima(time_ns, latency, window=CLOCK_WINDOW, chunk_size=CHUNK_ROWS):
+    """
+    Returns the tx time (epoch ns) and latency of the packet with the minimum latency of each
+    window of the tx time (packets with a NaN latency, e.g. not found at tx, are skipped), in time order.
+    """
+    length = window_ns(window)
+    n = len(latency)
+    # Windows with packets (epoch-aligned, sorted), sparse: an outlier tx time adds one window.
+    # Found by hashing rather than sorting the packets
+    windows = np.empty(0, np.int64)
+    for chunk in _chunks(n, chunk_size):
+        windows = np.union1d(windows, pd.unique(time_ns[chunk][~np.isnan(latency[chunk])] // length))
+    if not len(windows):
+        return np.empty(0, np.int64), np.empty(0, np.float64)
+
+    # Minimum latency of each window (NaN latencies do not lower it), then the earliest packet reaching it
+    minima = np.full(len(windows), np.inf)
+    for chunk in _chunks(n, chunk_size):
+        values = latency[chunk]
+        valid = ~np.isnan(values)
+        np.minimum.at(minima, _window_index(windows, time_ns[chunk][valid] // length), values[valid])
+    times = np.full(len(windows), np.iinfo(np.int64).max)
+    for chunk in _chunks(n, chunk_size):
+        index = _window_index(windows, time_ns[chunk] // length)
+        found = latency[chunk] == minima[index]
+        np.minimum.at(times, index[found], time_ns[chunk][found])
+    return times, minima
+
+
+def lower_envelope(x, y):
+    """
+    Returns (intercept, slope) of the line below all points (x increasing) with the least sum of
+    distances to them: the edge of their lower convex hull above the mean of x.
+    """
+    if len(x) == 1:
+        return float(y[0]), 0.0
+    # Lower convex hull (monotone chain), on the window minima only
+    hull = []
+    for point in zip(x.tolist(), y.tolist()):
+        while len(hull) >= 2:
+            (x0, y0), (x1, y1) = hull[-2], hull[-1]
+            if (x1 - x0) * (point[1] - y0) - (y1 - y0) * (point[0] - x0) > 0:
+                break
+            hull.pop()
+        hull.append(point)
+    hull_x = np.array([point[0] for point in hull])
+    edge = min(max(int(np.searchsorted(hull_x, x.mean(), side='right')) - 1, 0), len(hull) - 2)
+    (x0, y0), (x1, y1) = hull[edge], hull[edge + 1]
+    slope = (y1 - y0) / (x1 - x0)
+    return y0 - slope * x0, slope
+
+
+def estimate_clock(time_ns, latency, window=CLOCK_WINDOW, segments=1, chunk_size=CHUNK_ROWS):
+    """
+    Estimates the lower envelope of the latency over the tx time, as one line (segments = 1) or
+    a line per segment of equal duration. Returns a list of ClockSegment (empty without latencies).
+    """
+    times, minima = window_minima(time_ns, latency, window, chunk_size)
+    if not len(times):
+        return []
+    start, end = int(times[0]), int(times[-1])
+    bounds = start + (end - start) * np.arange(segments + 1) // segments
+    segment = np.clip(np.searchsorted(bounds, times, side='right') - 1, 0, segments - 1)
+    result = []
+    for i in range(segments):
+        selected = segment == i
+        if not selected.any():
+            # No window minimum in the segment (a gap in the traffic), the previous line extends over it
+            continue
+        # Seconds from the start of the segment, the fit is in us and s (slope in ppm)
+        offset, skew = lower_envelope((times[selected] - bounds[i]) / 1e9, minima[selected])
+        result.append(ClockSegment(int(bounds[i]), int(bounds[i + 1]), offset, skew, int(selected.sum())))
+    return result
+
+
+def envelope(segments, time_ns):
+    """
+    Returns the lower envelope (us) at each tx time, of the segment the time is in.
+    """
+    starts = np.array([segment.start_ns for segment in segments], np.int64)
+    offsets = np.array([segment.offset for segment in segments])
+    skews = np.array([segment.skew for segment in segments])
+    index = np.clip(np.searchsorted(starts, time_ns, side='right') - 1, 0, len(segments) - 1)
+    return offsets[index] + skews[index] * ((time_ns - starts[index]) / 1e9)
+
+
+def correct_latency(latency, time_ns, segments, mode='drift', min_latency=0.0, chunk_size=CHUNK_ROWS):
+    """
+    Removes the clock drift ('drift') or offset and drift ('offset') of the segments from the
+    latency (us) in place, and returns it.
+    """
+    if not segments:
+        return latency
+    if mode not in ('drift', 'offset'):
+        raise ValueError(f"Invalid clock correction {mode!r}, expected 'drift' or 'offset'")
+    # Latency of the lower envelope after the correction
+    reference = segments[0].offset if mode == 'drift' else min_latency
+    for chunk in _chunks(len(latency), chunk_size):
+        latency[chunk] -= envelope(segments, time_ns[chunk]) - reference
+    return latency
+
+
+def clock_summary(segments):
+    """
+    Returns the offset (us, at the start), mean skew (ppm), total drift (us) and duration (s)
+    of the segments, and the segments.
+    """
+    if not segments:
+        return None
+    duration = (segments[-1].end_ns - segments[0].start_ns) / 1e9
+    drift = sum(segment.skew * (segment.end_ns - segment.start_ns) / 1e9 for segment in segments)
+    return {
+        'offset': segments[0].offset,
+        'skew': drift / duration if duration > 0 else segments[0].skew,
+        'drift': drift,
+        'duration': duration,
+        'segments': [segment._asdict() for segment in segments],
+    }
@@ -0,0 +1,118 @@
+"""
+Flow Demultiplexer for captures of several flows
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Splits one capture per interface and direction (expt-tx.pcap/expt-rx.pcap, or
+their csv conversions) into the per-flow tx and rx dataframes that
+extract_statistics() expects, instead of one BPF-filtered tshark process per
+flow and direction (several capture processes on one host drop packets, which
+shows up as loss in the statistics).
+
+- Flows are defined by the values of configurable header fields (DEMUX_KEYS),
+  e.g. ['udp.dstport'] for flows on different iperf ports, ['vlan.id'] for
+  VLAN-defined flows (as in archive-txrx-pcap.sh), or ['vlan.id', 'ip.src'].
+- Every packet gets a flow code with a hash-based group-by of the key columns
+  (O(n), no per-packet Python). The capture is reordered by flow code once
+  (stable radix sort, packets keep their capture order within a flow) and each
+  flow is a slice of the reordered capture, not a copy per flow.
+- Flow N of the experiment is the N-th flow (in key order) found in every
+  capture (tx and rx), so flows are numbered as with per-flow captures.
+"""
+
+import ipaddress
+import numpy as np
+import pandas as pd
+
+# Header fields defining a flow, any of 'udp.dstport', 'vlan.id', 'ip.src'
+DEMUX_KEYS = ['udp.dstport']
+
+
+def flow_codes(df, keys=DEMUX_KEYS):
+    """
+    Returns (codes, flows): for each packet the index of its flow in flows,
+    and the sorted list of flows, as tuples of the key values.
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    uniques = []
+    for key in keys:
+        key_codes, unique = pd.factorize(df[key].to_numpy(), sort=True)
+        # Packets without the field (NaN) are not part of any flow
+        codes = np.where((codes < 0) | (key_codes < 0), -1, codes * len(unique) + key_codes)
+        uniques.append(np.asarray(unique))
+    codes, used = pd.factorize(codes, sort=True)
+    if len(used) and used[0] < 0:
+        # Drop the code of packets without a key
+        codes = codes - 1
+        used = used[1:]
+    flows = []
+    for combined in used:
+        values = []
+        for unique in reversed(uniques):
+            combined, index = divmod(int(combined), len(unique))
+            values.append(unique[index].item())
+        flows.append(tuple(reversed(values)))
+    return codes, flows
+
+
+def common_flows(flow_lists):
+    """
+    Returns the sorted flows present in every one of the flow lists (e.g. of the tx and rx captures).
+    """
+    flow_lists = [set(flows) for flows in flow_lists]
+    return sorted(set.intersection(*flow_lists)) if flow_lists else []
+
+
+def scan_flows(chunks, keys=DEMUX_KEYS):
+    """
+    Returns the sorted flows of a capture read in chunks (streaming mode).
+    """
+    flows = set()
+    for chunk in chunks:
+        flows.update(flow_codes(chunk, keys)[1])
+    return sorted(flows)
+
+
+def split_flows(df, keys=DEMUX_KEYS, flows=None):
+    """
+    Returns a list with the rows of each of the given flows (all flows of the capture by default),
+    in capture order. The capture is reordered by flow once and the flows are slices of it;
+    a single flow is selected directly.
+    """
+    codes, found = flow_codes(df, keys)
+    if flows is None:
+        flows = found
+    position = {flow: i for i, flow in enumerate(found)}
+    if len(flows) == 1:
+        code = position.get(tuple(flows[0]), -2)
+        return [df.iloc[np.flatnonzero(codes == code)].reset_index(drop=True)]
+
+    # Stable sort of small integers is a radix sort
+    code_dtype = np.uint16 if len(found) < (1 << 16) - 1 else np.int64
+    selected = codes >= 0
+    order = np.flatnonzero(selected)[np.argsort(codes[selected].astype(code_dtype), kind='stable')]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[selected], minlength=len(found)))])
+    grouped = df.take(order).reset_index(drop=True)
+    empty = df.iloc[:0]
+    return [grouped.iloc[bounds[position[tuple(flow)]]:bounds[position[tuple(flow)] + 1]]
+            if tuple(flow) in position else empty for flow in flows]
+
+
+def select_flow(df, keys, flow):
+    """
+    Returns the rows of one flow, in capture order.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for key, value in zip(keys, flow):
+        mask &= df[key].to_numpy() == value
+    return df.iloc[np.flatnonzero(mask)]
+
+
+def flow_label(keys, flow):
+    """
+    Returns a readable description of a flow, e.g. 'vlan.id=10 ip.src=192.168.10.20'.
+    """
+    return ' '.join(f"{key}={ipaddress.IPv4Address(int(value)) if key == 'ip.src' and not isinstance(value, str) else value}"
+                    for key, value in zip(keys, flow))
@@ -0,0 +1,74 @@
+"""
+Flow Discovery and Parallel Flow Analysis
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Finds the flows of an experiment from the file names in the capture directory
+(expt-tx1.csv, expt-rx1.csv, expt-tx2.csv, ... or the .pcap files), instead of
+a hard-coded list, and runs the per-flow analysis in a process pool.
+Workers return compact results (summaries and downcast statistics columns)
+rather than the full flow dataframes.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+FLOW_FILE = re.compile(r'^expt-(tx|rx)(\d+)\.(csv|pcap)$')
+
+# Statistics columns kept in float64, the rest are downcast to float32 (uint32 for counters)
+PRECISE_COLUMNS = ['time_tx', 'frame.time_epoch', 'frame.time_epoch_x']
+
+
+def discover_flows(directory, input_format='csv', directions=('tx', 'rx')):
+    """
+    Returns the sorted flow numbers N for which expt-{direction}N.{csv|pcap}
+    exists in the directory for every one of the given directions.
+    """
+    extension = 'pcap' if input_format in ('pcap', 'pktgen') else 'csv'
+    found = {direction: set() for direction in directions}
+    for file_name in os.listdir(directory):
+        match = FLOW_FILE.match(file_name)
+        if match and match.group(1) in found and match.group(3) == extension:
+            found[match.group(1)].add(int(match.group(2)))
+    return sorted(set.intersection(*found.values()))
+
+
+def run_parallel(function, items, workers=None):
+    """
+    Returns [function(item) for item in items], computed in a pool of worker processes.
+    Runs in this process for a single item or worker.
+    The workers may be started by spawn or forkserver (the default on macOS, and on Linux from
+    Python 3.14), which import the function's module afresh: the function must get any setting
+    changed after import as an argument (e.g. functools.partial), not from module globals.
+    """
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(function, items))
+
+
+def compact_stats(df):
+    """
+    Returns the statistics dataframe with float32 metrics and uint32 counters,
+    keeping the timestamp columns in float64.
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if column in PRECISE_COLUMNS or values.dtype.kind not in 'fiu' or values.dtype.itemsize <= 4:
+            columns[column] = values
+        elif column in ('lost', 'out-of-order', 'iperf.id') and not np.isnan(values.astype(np.float64)).any() \
+                and (values >= 0).all() and (len(values) == 0 or values.max() < 2 ** 32):
+            columns[column] = values.astype(np.uint32)
+        else:
+            columns[column] = values.astype(np.float32)
+    compact = pd.DataFrame(columns, index=df.index)
+    compact.attrs = dict(df.attrs)
+    return compact
@@ -0,0 +1,183 @@
+"""
+Mergeable Latency Histograms
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Compact log-linear (HDR-style) histogram of a flow's latency values, with a
+fixed number of significant decimal digits. Unlike describe() on the latency
+column, histograms of different flows, runs or hosts can be merged exactly
+(bucket counts are added), and tail percentiles (p99.9, p99.999 for the TSN
+deadline checks) are read from a few thousand buckets instead of the packets.
+
+- Values are counted in integer units (default 1 ns = 0.001 us). Values below
+  2**sub_bits units have their own bucket, above that the bucket width doubles
+  with each power of two, so every bucket is within 10**-digits of its values.
+- Negative values (rx-only latency with unsynchronised clocks) are mirrored
+  into negative bucket indices.
+- Count, min, max and sum (mean) are exact; percentiles are exact to the
+  bucket precision.
+- A histogram is saved as a small .npz file (bucket indices and counts only).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Significant decimal digits of the bucket values
+SIGNIFICANT_DIGITS = 3
+# Size of the integer unit the values are counted in (0.001 us = 1 ns, for latency in microseconds)
+UNIT = 0.001
+# Percentiles of the latency deadline checks
+TAIL_PERCENTILES = (50, 99, 99.9, 99.999)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of latency values, stored as sparse (bucket index, count) arrays.
+    """
+
+    def __init__(self, significant_digits=SIGNIFICANT_DIGITS, unit=UNIT):
+        self.significant_digits = significant_digits
+        self.unit = unit
+        # Linear buckets below 2**sub_bits units, half of them per power of two above
+        self.sub_bits = int(np.ceil(np.log2(2 * 10 ** significant_digits)))
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _index(self, units):
+        """
+        Bucket index of non-negative integer values.
+        """
+        # Bit length of the value, exact below 2**53
+        shift = np.maximum(np.frexp(units.astype(np.float64))[1] - self.sub_bits, 0)
+        return (shift.astype(np.int64) << (self.sub_bits - 1)) + (units >> shift)
+
+    def _bounds(self, indices):
+        """
+        Lowest and highest value (in units) of non-negative bucket indices.
+        """
+        half = 1 << (self.sub_bits - 1)
+        shift = np.maximum(indices // half - 1, 0)
+        low = (indices - (shift << (self.sub_bits - 1))) << shift
+        return low, low + (np.int64(1) << shift) - 1
+
+    def bucket_indices(self, values):
+        """
+        Bucket index of each value (not NaN), increasing with the value.
+        """
+        units = np.rint(np.abs(values) / self.unit).astype(np.int64)
+        return np.where(values < 0, -1 - self._index(units), self._index(units))
+
+    def bucket_values(self, indices):
+        """
+        Representative value of each bucket index, the middle of its range.
+        """
+        negative = indices < 0
+        low, high = self._bounds(np.where(negative, -1 - indices, indices))
+        middle = (low + high) / 2 * self.unit
+        return np.where(negative, -middle, middle)
+
+    def record(self, values):
+        """
+        Adds the (non-NaN) values to the histogram.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += values.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._add(*np.unique(self.bucket_indices(values), return_counts=True))
+
+    def _add(self, indices, counts):
+        merged, inverse = np.unique(np.concatenate([self.indices, indices]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]),
+                                  minlength=len(merged)).astype(np.int64)
+        self.indices = merged
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram of the same precision. Returns self.
+        """
+        if (other.significant_digits, other.unit) != (self.significant_digits, self.unit):
+            raise ValueError(f"Cannot merge histograms of different precision: "
+                             f"{(self.significant_digits, self.unit)} and {(other.significant_digits, other.unit)}")
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._add(other.indices, other.counts)
+        return self
+
+    @classmethod
+    def merged(cls, histograms):
+        """
+        Returns a new histogram with the counts of all the histograms.
+        """
+        histograms = list(histograms)
+        result = cls(histograms[0].significant_digits, histograms[0].unit) if histograms else cls()
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def quantile(self, q):
+        """
+        Value at quantile q (0..1), by nearest rank, to the precision of the buckets.
+        """
+        return self.percentiles([q * 100]).iloc[0]
+
+    def percentiles(self, percentiles=TAIL_PERCENTILES):
+        """
+        Returns a Series of the values at the given percentiles.
+        """
+        index = [f'p{percentile:g}' for percentile in percentiles]
+        if not self.count:
+            return pd.Series(np.nan, index=index, name='latency')
+        # Negative buckets are stored in reverse order of their values
+        values = self.bucket_values(self.indices)
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(self.counts[order])
+        ranks = np.maximum(np.ceil(np.asarray(percentiles, dtype=np.float64) / 100 * self.count), 1)
+        result = values[order][np.searchsorted(cumulative, ranks)]
+        return pd.Series(np.clip(result, self.min, self.max), index=index, name='latency')
+
+    def summary(self, percentiles=TAIL_PERCENTILES):
+        """
+        Returns the count, mean, min, max and percentiles as a Series.
+        """
+        mean = self.total / self.count if self.count else np.nan
+        head = pd.Series({'count': float(self.count), 'mean': mean,
+                          'min': self.min if self.count else np.nan}, name='latency')
+        tail = pd.Series({'max': self.max if self.count else np.nan}, name='latency')
+        return pd.concat([head, self.percentiles(percentiles), tail])
+
+    def save(self, file_path):
+        """
+        Writes the histogram to a .npz file.
+        """
+        np.savez_compressed(file_path, indices=self.indices, counts=self.counts,
+                            meta=np.array([self.significant_digits, self.unit, self.count,
+                                           self.total, self.min, self.max], dtype=np.float64))
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Reads a histogram written by save().
+        """
+        with np.load(file_path) as data:
+            significant_digits, unit, count, total, minimum, maximum = data['meta']
+            histogram = cls(int(significant_digits), float(unit))
+            histogram.indices = data['indices']
+            histogram.counts = data['counts']
+        histogram.count = int(count)
+        histogram.total = float(total)
+        histogram.min = float(minimum)
+        histogram.max = float(maximum)
+        return histogram
@@ -0,0 +1,387 @@
+"""
+Typed CSV Ingest for the tshark field list
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Reads the csv files written by the tshark conversion of the capture scripts
+(Section 4a, `tshark -T fields -E header=y -E separator=, -e udp.dstport ...`)
+with a schema of the field list, instead of pd.read_csv() without dtypes:
+
+- Only the fields of the schema are kept, each in a compact dtype (uint16 ports,
+  lengths and tos, uint32 iperf fields, see CSV_SCHEMA) instead of int64/float64.
+- frame.time_epoch is parsed into int64 nanoseconds ('frame.time_ns') from the
+  text, without float rounding. iperf.tos (hex) and ip.src (dotted) are parsed
+  into integers as well, so every column can be memory-mapped from the cache.
+- Rows with an empty field (frames without the iperf header) are dropped, by
+  every engine; only the flow keys vlan.id and ip.src may be empty (0).
+- Engines:
+  'numpy'  : the file is split into blocks at line ends, read one block at a time
+             (not memory-mapped, so the file's pages do not add to the resident
+             memory); each block's field boundaries are found from the separator
+             positions and the fields are parsed with vectorized digit arithmetic,
+             one character position of all rows at a time, in place, in a thread
+             pool (numpy releases the GIL), into preallocated columns.
+  'pyarrow': pyarrow's multi-threaded csv reader (if installed), the text
+             fields are parsed from its string buffers as in 'numpy'.
+  'pandas' : pd.read_csv() and downcasting, for files the other engines can't
+             read (e.g. quoted or aggregated fields).
+  'auto'   : 'pyarrow' if installed, else 'numpy'; 'pandas' if the file is irregular.
+- trim_rows() drops the trailing rows (the last two rows of a capture) as views
+  of the columns, without copying them.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from txrx_cache import parse_csv_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pa_compute
+except ImportError:
+    pa = None
+
+# Parser and dtype of each tshark field (-e) written by the capture scripts
+CSV_SCHEMA = {
+    'udp.dstport': ('decimal', np.uint16),
+    'frame.time_epoch': ('epoch', np.int64),  # kept as float64 seconds, and int64 'frame.time_ns'
+    'frame.len': ('decimal', np.uint16),
+    'iperf.tos': ('hex', np.uint16),
+    'iperf.id': ('decimal', np.uint32),
+    'iperf.id2': ('decimal', np.uint32),
+    'iperf.sec': ('decimal', np.uint32),
+    'iperf.usec': ('decimal', np.uint32),
+    # Flow keys of a capture of several flows (txrx_demux.py)
+    'vlan.id': ('decimal', np.uint16),
+    'ip.src': ('ipv4', np.uint32),
+}
+# Fields which may be empty (0), the flow keys of frames without a vlan tag or ipv4 header. Rows with
+# another field empty (frames without the iperf header, which tshark still exports) are dropped,
+# as by read_pcap()
+OPTIONAL_FIELDS = ('vlan.id', 'ip.src')
+# Default engine, 'auto', 'numpy', 'pyarrow', 'pandas'
+CSV_ENGINE = 'auto'
+# Bytes of csv text parsed at once by a thread of the 'numpy' engine (about 100k rows)
+BLOCK_BYTES = 8 << 20
+# Bytes of csv text read at once by pyarrow
+ARROW_BLOCK_BYTES = 16 << 20
+
+
+# Digit values of hex (and decimal) characters
+HEX_DIGITS = np.zeros(256, dtype=np.uint8)
+HEX_DIGITS[np.frombuffer(b'0123456789abcdef', dtype=np.uint8)] = np.arange(16)
+HEX_DIGITS[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+
+def _parse_digits(data, start, length, base=10):
+    """
+    Parses the digits data[start:start + length] of each row into int64 (0 for empty fields),
+    one character position of all rows at a time, in place.
+    """
+    width = int(length.max()) if len(length) else 0
+    # Fields of the same width in every row (e.g. iperf.sec, the epoch seconds) need no mask
+    fixed = width and int(length.min()) == width
+    value = np.zeros(len(start), dtype=np.int64)
+    position = start.copy()
+    for i in range(width):
+        char = np.take(data, position, mode='clip')
+        position += 1
+        digit = HEX_DIGITS[char] if base == 16 else char - np.uint8(ord('0'))
+        if fixed:
+            value *= base
+            value += digit
+        else:
+            used = length > i
+            np.multiply(value, base, out=value, where=used)
+            np.add(value, digit, out=value, where=used)
+    return value
+
+
+def _parse_epoch(data, start, end):
+    """
+    Parses seconds with decimals into int64 nanoseconds (decimals past 9 are truncated).
+    """
+    # tshark writes 9 decimals, the point is 10 characters before the end
+    point = end - 10
+    if not ((point >= start) & (np.take(data, point, mode='clip') == ord('.'))).all():
+        points = np.flatnonzero(data == ord('.'))
+        point = points[np.minimum(np.searchsorted(points, start), len(points) - 1)] if len(points) else end
+        point = np.where((point >= start) & (point < end), point, end)
+    decimals = np.clip(end - point - 1, 0, 9)
+    seconds = _parse_digits(data, start, point - start)
+    return seconds * 1_000_000_000 + _parse_digits(data, point + 1, decimals) * 10 ** (9 - decimals)
+
+
+def _parse_ipv4(data, start, end):
+    """
+    Parses dotted ipv4 addresses into int64.
+    """
+    length = end - start
+    value = np.zeros(len(start), dtype=np.int64)
+    octet = np.zeros(len(start), dtype=np.int64)
+    width = int(length.max()) if len(length) else 0
+    for i in range(width):
+        used = i < length
+        char = np.take(data, start + i, mode='clip').astype(np.int64)
+        point = used & (char == ord('.'))
+        value = np.where(point, value * 256 + octet, value)
+        octet = np.where(point, 0, np.where(used, octet * 10 + char - ord('0'), octet))
+    return value * 256 + octet
+
+
+def _parse_field(data, start, end, kind):
+    """
+    Parses the text data[start:end] of each row as the given kind of field, into int64.
+    Empty fields are 0.
+    """
+    if kind == 'epoch':
+        return _parse_epoch(data, start, end)
+    if kind == 'ipv4':
+        return _parse_ipv4(data, start, end)
+    length = end - start
+    if kind == 'hex':
+        # Skip the 0x prefix
+        prefixed = (length >= 2) & (np.take(data, start + 1, mode='clip') == ord('x'))
+        return _parse_digits(data, start + 2 * prefixed, length - 2 * prefixed, 16)
+    return _parse_digits(data, start, length)
+
+
+def _line_ends(data):
+    """
+    Returns the end offset of each line (the newline, or the end of the data for a last line without one).
+    """
+    ends = np.flatnonzero(data == ord('\n'))
+    if len(data) and data[-1] != ord('\n'):
+        ends = np.append(ends, len(data))
+    return ends
+
+
+def _parse_block(data, fields, columns, out, valid, row):
+    """
+    Parses the complete lines of data into the output columns, from row `row`.
+    fields maps the column index in the csv header to the field name. Returns the number of rows.
+    valid is set to whether each row has all fields but OPTIONAL_FIELDS.
+    """
+    line_end = _line_ends(data)
+    rows = len(line_end)
+    line_start = np.concatenate([[0], line_end[:-1] + 1])
+    separators = np.flatnonzero(data == ord(','))
+    if len(separators) != rows * (columns - 1):
+        raise ValueError("Irregular csv, not one value per field in every row")
+    separators = separators.reshape(rows, columns - 1)
+    if rows and ((separators[:, 0] < line_start).any() or (separators[:, -1] >= line_end).any()):
+        raise ValueError("Irregular csv, not one value per field in every row")
+    # Without the \r of \r\n line ends
+    carriage = (line_end > line_start) & (data[np.maximum(line_end - 1, 0)] == ord('\r'))
+    complete = np.ones(rows, dtype=bool)
+    for index, field in fields.items():
+        start = line_start if index == 0 else separators[:, index - 1] + 1
+        end = line_end - carriage if index == columns - 1 else separators[:, index]
+        if field not in OPTIONAL_FIELDS:
+            complete &= end > start
+        out[field][row:row + rows] = _parse_field(data, start, end, CSV_SCHEMA[field][0])
+    valid[row:row + rows] = complete
+    return rows
+
+
+def _blocks(data, block_bytes):
+    """
+    Returns the (start, end) byte offsets of blocks of data which end at a line end.
+    """
+    bounds = [0]
+    while bounds[-1] < len(data):
+        end = bounds[-1] + block_bytes
+        if end >= len(data):
+            bounds.append(len(data))
+            break
+        newline = np.flatnonzero(data[end:end + (1 << 16)] == ord('\n'))
+        while not len(newline) and end < len(data):
+            # Very long line, look further
+            end += 1 << 16
+            newline = np.flatnonzero(data[end:end + (1 << 16)] == ord('\n'))
+        bounds.append(min(end + int(newline[0]) + 1, len(data)) if len(newline) else len(data))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _header(data):
+    """
+    Returns the field names of the csv header line and the offset of the first data line.
+    """
+    newline = np.flatnonzero(data[:1 << 16] == ord('\n'))
+    end = int(newline[0]) if len(newline) else len(data)
+    names = data[:end].tobytes().decode().strip().split(',')
+    return [name.strip() for name in names], end + 1
+
+
+def _to_frame(out, names, valid):
+    """
+    Builds the dataframe of the parsed int64 columns in the csv column order, in their schema dtypes,
+    with the valid rows only.
+    """
+    if not valid.all():
+        out = {field: values[valid] for field, values in out.items()}
+    columns = {}
+    for name in names:
+        if name not in out:
+            continue
+        if name == 'frame.time_epoch':
+            columns[name] = out[name] / 1e9
+        else:
+            columns[name] = out[name].astype(CSV_SCHEMA[name][1], copy=False)
+    if 'frame.time_epoch' in out:
+        columns['frame.time_ns'] = out['frame.time_epoch']
+    return pd.DataFrame(columns, copy=False)
+
+
+def _layout(file_path, block_bytes):
+    """
+    Returns the csv header's field names, the schema fields by column index, and the (start, end)
+    file offsets of blocks of about block_bytes of data lines.
+    Only the header and the block ends are read (from the memory-mapped file).
+    """
+    if os.path.getsize(file_path) == 0:
+        raise ValueError(f"Empty csv file {file_path}")
+    data = np.memmap(file_path, dtype=np.uint8, mode='r')
+    names, offset = _header(data)
+    fields = {index: name for index, name in enumerate(names) if name in CSV_SCHEMA}
+    blocks = [(offset + start, offset + end) for start, end in _blocks(data[offset:], block_bytes)]
+    return names, fields, blocks
+
+
+def _read_block(file_path, block):
+    """
+    Reads a block of the file into memory (freed after parsing it, unlike the pages of a
+    memory-mapped file, which stay resident until it is closed).
+    """
+    return np.fromfile(file_path, dtype=np.uint8, count=block[1] - block[0], offset=block[0])
+
+
+def _read_numpy(file_path, threads=None, block_bytes=BLOCK_BYTES):
+    """
+    'numpy' engine: blocks read and parsed by a thread pool.
+    """
+    names, fields, blocks = _layout(file_path, block_bytes)
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count() or 1) as pool:
+        # Rows of each block, to parse the blocks in parallel into preallocated columns
+        rows = list(pool.map(lambda block: len(_line_ends(_read_block(file_path, block))), blocks))
+        first_row = np.concatenate([[0], np.cumsum(rows)]).astype(int)
+        out = {field: np.empty(first_row[-1], dtype=CSV_SCHEMA[field][1]) for field in fields.values()}
+        valid = np.empty(first_row[-1], dtype=bool)
+        list(pool.map(lambda i: _parse_block(_read_block(file_path, blocks[i]), fields, len(names), out, valid,
+                                             first_row[i]),
+                      range(len(blocks))))
+    return _to_frame(out, names, valid)
+
+
+def _read_pyarrow(file_path, threads=None):
+    """
+    'pyarrow' engine: decimal fields converted by pyarrow, text fields parsed from its string buffers.
+    """
+    with open(file_path) as f:
+        names = [name.strip() for name in f.readline().strip().split(',')]
+    fields = [name for name in names if name in CSV_SCHEMA]
+    column_types = {field: pa.string() if CSV_SCHEMA[field][0] != 'decimal' else pa.from_numpy_dtype(CSV_SCHEMA[field][1])
+                    for field in fields}
+    if threads is not None:
+        pa.set_cpu_count(threads)
+    table = pa_csv.read_csv(file_path,
+                            read_options=pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_BYTES),
+                            convert_options=pa_csv.ConvertOptions(include_columns=fields, column_types=column_types))
+    out = {}
+    valid = np.ones(table.num_rows, dtype=bool)
+    for field in fields:
+        column = table.column(field)
+        if CSV_SCHEMA[field][0] == 'decimal':
+            if field not in OPTIONAL_FIELDS:
+                valid &= column.is_valid().to_numpy(zero_copy_only=False)
+            out[field] = column.fill_null(0).to_numpy()
+            continue
+        # Text fields are parsed from the string buffers of each chunk (offsets and characters)
+        parts = []
+        for chunk in column.chunks:
+            offsets = np.frombuffer(chunk.buffers()[1], dtype=np.int32)[chunk.offset:chunk.offset + len(chunk) + 1]
+            characters = chunk.buffers()[2]
+            data = np.frombuffer(characters, dtype=np.uint8) if characters is not None else np.zeros(1, dtype=np.uint8)
+            parts.append(_parse_field(data, offsets[:-1].astype(np.int64), offsets[1:].astype(np.int64),
+                                      CSV_SCHEMA[field][0]))
+        if field not in OPTIONAL_FIELDS:
+            valid &= column.is_valid().to_numpy(zero_copy_only=False)
+            valid &= (pa_compute.utf8_length(column).fill_null(0).to_numpy() > 0)
+        out[field] = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    return _to_frame(out, names, valid)
+
+
+def _read_pandas(file_path):
+    """
+    'pandas' engine: read_csv_flow() (without the rows missing a field of the schema) and
+    downcasting to the schema dtypes.
+    """
+    df = pd.read_csv(file_path, dtype={'frame.time_epoch': str})
+    required = [column for column in df.columns if column in CSV_SCHEMA and column not in OPTIONAL_FIELDS]
+    df = parse_csv_columns(df.dropna(subset=required).reset_index(drop=True))
+    columns = {}
+    for column in df.columns:
+        if column in CSV_SCHEMA and column != 'frame.time_epoch':
+            columns[column] = df[column].fillna(0).to_numpy().astype(CSV_SCHEMA[column][1])
+        elif column in CSV_SCHEMA or column == 'frame.time_ns':
+            columns[column] = df[column].to_numpy()
+    return pd.DataFrame(columns, copy=False)
+
+
+def read_tshark_csv(file_path, engine=CSV_ENGINE, threads=None):
+    """
+    Reads a tshark csv file (fields of CSV_SCHEMA) into compact typed columns,
+    with frame.time_epoch also parsed into exact int64 'frame.time_ns'.
+    threads: threads of the 'numpy' and 'pyarrow' engines (None: one per cpu core).
+    """
+    if engine == 'auto':
+        engine = 'pyarrow' if pa is not None else 'numpy'
+        try:
+            return read_tshark_csv(file_path, engine, threads)
+        except ValueError:
+            # Irregular file (pyarrow's ArrowInvalid is a ValueError too)
+            engine = 'pandas'
+    if engine == 'numpy':
+        return _read_numpy(file_path, threads)
+    if engine == 'pyarrow':
+        if pa is None:
+            raise ImportError("engine='pyarrow' needs pyarrow (pip install pyarrow)")
+        return _read_pyarrow(file_path, threads)
+    return _read_pandas(file_path)
+
+
+def iter_tshark_csv(file_path, chunk_size=1_000_000):
+    """
+    Reads a tshark csv file in chunks of about chunk_size rows (streaming mode),
+    as dataframes of the columns of read_tshark_csv() ('numpy' engine).
+    """
+    if os.path.getsize(file_path) == 0:
+        return
+    data = np.memmap(file_path, dtype=np.uint8, mode='r')
+    _, offset = _header(data)
+    # Block size in bytes from the length of the first lines
+    line_ends = _line_ends(data[offset:offset + (1 << 16)])
+    line_bytes = int(line_ends[-1]) // len(line_ends) + 1 if len(line_ends) else 1
+    del data
+    names, fields, blocks = _layout(file_path, max(chunk_size * line_bytes, 1))
+    for block in blocks:
+        block = _read_block(file_path, block)
+        rows = len(_line_ends(block))
+        out = {field: np.empty(rows, dtype=CSV_SCHEMA[field][1]) for field in fields.values()}
+        valid = np.empty(rows, dtype=bool)
+        _parse_block(block, fields, len(names), out, valid, 0)
+        yield _to_frame(out, names, valid)
+
+
+def trim_rows(df, rows=2):
+    """
+    Returns the dataframe without its last `rows` rows, as views of its columns (not a copy).
+    """
+    keep = max(len(df) - rows, 0)
+    trimmed = pd.DataFrame({column: df[column].to_numpy()[:keep] for column in df.columns}, copy=False)
+    trimmed.attrs = dict(df.attrs)
+    return trimmed
@@ -0,0 +1,182 @@
+"""
+Sequence-indexed tx/rx Join
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Replaces pd.merge(df_tx, df_rx, on=['iperf.id', 'iperf.id2'], how='right')
+in extract_statistics(). iperf.id2 (upper) and iperf.id (lower 32 bits) are
+combined into one int64 sequence key. Since iperf sequence numbers are close
+to dense and monotonic, tx and rx are aligned by direct indexing into a table
+over the key range, or by a sorted merge when the keys are too sparse for that.
+
+Compared to the hash join:
+- Repeated tx sequence numbers don't multiply rx rows, the first tx packet is
+  matched and the repeats are reported as duplicates.
+- A 32-bit iperf.id that wraps around (iperf.id2 unused) is unwrapped, and
+  sequence numbers that restart from 0 (iperf restarted) start a new epoch.
+- tx packets never received (tx-only, lost) and rx packets without a tx
+  packet (rx-only, spurious) are returned as outputs.
+"""
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Use a direct index table when the tx key range is at most this many times the number of tx packets
+DENSE_FACTOR = 4
+# A drop in sequence number larger than this (to a non-negative sequence number) is taken as an iperf restart
+RESTART_GAP = 1 << 20
+# Keys of successive restart epochs are offset by this much
+EPOCH_SHIFT = 40
+
+JoinResult = namedtuple('JoinResult', [
+    'tx_index',       # per rx packet, index of the matching tx packet (-1 if none)
+    'tx_only',        # indices of tx packets which were never received (lost)
+    'rx_only',        # indices of rx packets without a tx packet (spurious)
+    'tx_duplicates',  # indices of repeated tx sequence numbers (not matched)
+    'rx_duplicates',  # indices of repeated rx sequence numbers (matched to the same tx packet)
+])
+
+
+def combine_keys(ids, ids2):
+    """
+    Combines iperf.id2 (upper) and iperf.id (lower 32 bits) into one int64 key.
+    Negative (FIN) sequence numbers of 64-bit iperf stay negative.
+    """
+    return (np.asarray(ids2).astype(np.int64) << 32) | (np.asarray(ids).astype(np.int64) & 0xffffffff)
+
+
+def sequence_keys(ids, ids2, restart_gap=RESTART_GAP):
+    """
+    Returns the int64 sequence key of each packet, in arrival order.
+    A 32-bit iperf.id (iperf.id2 all zero) is unwrapped across 2**32,
+    and each restart of the sequence numbers is moved to its own epoch.
+    """
+    keys = combine_keys(ids, ids2)
+    if not len(keys):
+        return keys
+    diff_values = np.diff(keys)
+    if not np.any(np.asarray(ids2)):
+        # Wraparound of the 32-bit sequence number, backwards or forwards (FIN packets)
+        wraps = (diff_values < -(1 << 31)).astype(np.int64) - (diff_values > (1 << 31))
+        if wraps.any():
+            keys = keys + (np.concatenate([[0], np.cumsum(wraps)]) << 32)
+            diff_values = np.diff(keys)
+    # Restarts, a large drop back to a non-negative sequence number
+    restarts = (diff_values < -restart_gap) & (keys[1:] >= 0)
+    if restarts.any():
+        keys = keys + (np.concatenate([[0], np.cumsum(restarts)]) << EPOCH_SHIFT)
+    return keys
+
+
+def flow_keys(df):
+    """
+    Returns the sequence keys of a flow dataframe with iperf.id and iperf.id2 columns.
+    """
+    return sequence_keys(df['iperf.id'].to_numpy(), df['iperf.id2'].to_numpy())
+
+
+def _first_occurrence_dense(keys, low, span):
+    """
+    Table over the key range [low, low + span) with the index of the first packet of each key (-1 if none).
+    """
+    offsets = keys - low
+    table = np.full(span, -1, dtype=np.int64)
+    table[offsets] = np.arange(len(keys))
+    # Repeated keys, resolve them to the first occurrence
+    counts = np.bincount(offsets, minlength=span)
+    repeated = np.flatnonzero(counts[offsets] > 1)
+    if len(repeated):
+        unique_keys, first = np.unique(offsets[repeated], return_index=True)
+        table[unique_keys] = repeated[first]
+    return table
+
+
+def _repeats(keys, candidates=None):
+    """
+    Returns the indices of repeated keys, all but the first occurrence.
+    Only the candidate indices (default all) are checked.
+    """
+    if candidates is None:
+        candidates = np.arange(len(keys))
+    if not len(candidates):
+        return np.zeros(0, dtype=np.int64)
+    _, first = np.unique(keys[candidates], return_index=True)
+    repeated = np.ones(len(candidates), dtype=bool)
+    repeated[first] = False
+    return candidates[repeated]
+
+
+def join_sequences(tx_keys, rx_keys, dense_factor=DENSE_FACTOR):
+    """
+    Aligns rx packets with the tx packets of the same sequence key.
+    Returns a JoinResult.
+    """
+    tx_keys = np.asarray(tx_keys, dtype=np.int64)
+    rx_keys = np.asarray(rx_keys, dtype=np.int64)
+    n_tx = len(tx_keys)
+    tx_index = np.full(len(rx_keys), -1, dtype=np.int64)
+    first_tx = np.zeros(n_tx, dtype=bool)
+    rx_duplicates = None
+
+    if n_tx:
+        low, high = tx_keys.min(), tx_keys.max()
+        span = int(high - low) + 1
+        if span <= dense_factor * n_tx + 1024:
+            # Dense keys, direct indexing
+            table = _first_occurrence_dense(tx_keys, low, span)
+            offsets = rx_keys - low
+            in_range = (offsets >= 0) & (offsets < span)
+            tx_index[in_range] = table[offsets[in_range]]
+            first_tx[table[table >= 0]] = True
+            # Repeated rx keys can only be among keys counted more than once (or outside the tx range)
+            counts = np.bincount(offsets[in_range], minlength=span)
+            candidates = np.flatnonzero(~in_range)
+            candidates = np.union1d(candidates, np.flatnonzero(in_range)[counts[offsets[in_range]] > 1])
+            rx_duplicates = _repeats(rx_keys, candidates)
+        else:
+            # Sparse keys, sorted merge (stable sort keeps the first occurrence first)
+            order = np.argsort(tx_keys, kind='stable')
+            sorted_keys = tx_keys[order]
+            first = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+            unique_keys, unique_index = sorted_keys[first], order[first]
+            position = np.minimum(np.searchsorted(unique_keys, rx_keys), len(unique_keys) - 1)
+            found = unique_keys[position] == rx_keys
+            tx_index[found] = unique_index[position[found]]
+            first_tx[unique_index] = True
+    if rx_duplicates is None:
+        rx_duplicates = _repeats(rx_keys)
+
+    matched_tx = np.zeros(n_tx, dtype=bool)
+    matched_tx[tx_index[tx_index >= 0]] = True
+
+    return JoinResult(
+        tx_index=tx_index,
+        tx_only=np.flatnonzero(first_tx & ~matched_tx),
+        rx_only=np.flatnonzero(tx_index < 0),
+        tx_duplicates=np.flatnonzero(~first_tx),
+        rx_duplicates=np.sort(rx_duplicates),
+    )
+
+
+def join_frames(df_tx, df_rx, result, on=('iperf.id', 'iperf.id2'), suffixes=('_x', '_y')):
+    """
+    Builds the joined dataframe of a JoinResult, one row per rx packet in rx order.
+    Columns are named as by pd.merge(df_tx, df_rx, on=on, how='right', suffixes=suffixes),
+    tx columns are NaN for rx-only packets.
+    """
+    matched = result.tx_index >= 0
+    index = np.where(matched, result.tx_index, 0)
+    columns = {}
+    for column in df_tx.columns:
+        if column in on:
+            continue
+        values = df_tx[column].to_numpy()[index] if len(df_tx) else np.zeros(len(index))
+        name = column + suffixes[0] if column in df_rx.columns else column
+        columns[name] = np.where(matched, values, np.nan)
+    for column in df_rx.columns:
+        name = column + suffixes[1] if column in df_tx.columns and column not in on else column
+        columns[name] = df_rx[column].to_numpy()
+    return pd.DataFrame(columns)
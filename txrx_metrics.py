@@ -0,0 +1,139 @@
+"""
+Per-packet Flow Metrics
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Computes every per-packet metric of extract_statistics() in one pass over numpy
+arrays, with a single sort of the flow by sequence number (previously the flow
+was sorted twice, for the rolling jitter and for the loss count).
+Columns are returned as compact typed arrays (float32 metrics, uint32 counters).
+
+Metrics, per rx packet in arrival order, from the latency (in microseconds, NaN if unknown):
+- jitter         : rolling std of the latency over the previous 20 packets in sequence order (as before)
+- jitter-rfc3550 : RFC 3550 interarrival jitter, J += (|D(i-1,i)| - J) / 16 over the
+                   transit time (latency) of consecutive packets in arrival order
+- lost           : cumulative count of missing sequence numbers, in sequence order (as before)
+- out-of-order   : cumulative count of packets with a lower sequence number than the previous packet (as before)
+- reorder-extent : RFC 4737 reordering extent, the number of packets received between the first
+                   packet with a higher sequence number and this (reordered) packet, 0 if in order
+Per flow:
+- loss bursts     : number of runs of consecutive missing sequence numbers, by run length
+- reorder density : RFC 5236 reorder density, the fraction of packets displaced by -DT..DT
+                    positions from their position in sequence order
+"""
+
+from collections import namedtuple
+import numpy as np
+
+# Rolling window (in packets) of the rolling std jitter
+JITTER_WINDOW = 20
+# Gain of the RFC 3550 interarrival jitter estimator
+RFC3550_GAIN = 1 / 16
+# Packets per block of the RFC 3550 jitter recurrence (the block's scale factor (16/15)**block must fit a float64)
+RFC3550_BLOCK = 1024
+# Displacement threshold DT of the reorder density (RFC 5236 uses 3 as an example)
+DISPLACEMENT_THRESHOLD = 3
+
+FlowMetrics = namedtuple('FlowMetrics', [
+    'columns',          # per rx packet in arrival order, column name -> compact typed array
+    'loss_bursts',      # {burst length: number of bursts} of missing sequence numbers
+    'reorder_density',  # {displacement: fraction of packets}, for displacements -DT..DT
+])
+
+
+def rolling_std(values, window=JITTER_WINDOW):
+    """
+    Rolling sample std of the previous `window` values, NaN if any of them is NaN
+    (same as pd.Series.rolling(window).std()).
+    """
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+    missing = np.isnan(values)
+    # Centered on the median to keep the cumulative sums small
+    centered = np.where(missing, 0.0, values - np.nanmedian(values) if not missing.all() else 0.0)
+    sums = np.concatenate([[0.0], np.cumsum(centered)])
+    squares = np.concatenate([[0.0], np.cumsum(centered * centered)])
+    gaps = np.concatenate([[0], np.cumsum(missing)])
+    total = sums[window:] - sums[:-window]
+    variance = (squares[window:] - squares[:-window] - total * total / window) / (window - 1)
+    result[window - 1:] = np.where(gaps[window:] - gaps[:-window] == 0, np.sqrt(np.maximum(variance, 0)), np.nan)
+    return result
+
+
+def rfc3550_jitter(transit, gain=RFC3550_GAIN, block=RFC3550_BLOCK):
+    """
+    RFC 3550 interarrival jitter after each packet, J(i) = J(i-1) + (|D(i-1,i)| - J(i-1)) * gain,
+    with D the difference of the transit times of consecutive packets. J starts at 0.
+    The recurrence is evaluated in closed form, a block of packets at a time.
+    """
+    jitter = np.zeros(len(transit))
+    differences = np.abs(np.diff(transit)) * gain
+    decay = 1 - gain
+    # decay**-k, k = 1..block
+    scale = decay ** -np.arange(1, block + 1, dtype=np.float64)
+    previous = 0.0
+    for start in range(0, len(differences), block):
+        chunk = differences[start:start + block]
+        # J(k) = decay**k * (J(0) + sum over j <= k of decay**-j * gain * |D(j)|)
+        jitter[start + 1:start + 1 + len(chunk)] = (previous + np.cumsum(chunk * scale[:len(chunk)])) / scale[:len(chunk)]
+        previous = jitter[start + len(chunk)]
+    return jitter
+
+
+def flow_metrics(keys, latency, window=JITTER_WINDOW, threshold=DISPLACEMENT_THRESHOLD):
+    """
+    Returns the FlowMetrics of a flow's rx packets, given their sequence keys and
+    latency (in microseconds, NaN if unknown), in arrival order.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    latency = np.asarray(latency, dtype=np.float64)
+    n = len(keys)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    # Rolling jitter and loss, in sequence order, scattered back to arrival order
+    jitter = np.empty(n, dtype=np.float32)
+    jitter[order] = rolling_std(latency[order], window)
+    # Missing sequence numbers before each packet
+    missing = np.maximum(np.diff(sorted_keys) - 1, 0)
+    lost = np.empty(n, dtype=np.uint32)
+    lost[order] = np.concatenate([[0], np.cumsum(missing)])[:n]
+
+    # RFC 3550 jitter, in arrival order over the packets with a latency
+    valid = ~np.isnan(latency)
+    jitter_rfc3550 = np.full(n, np.nan, dtype=np.float32)
+    jitter_rfc3550[valid] = rfc3550_jitter(latency[valid])
+
+    # Out-of-order counter and RFC 4737 reordering extent, in arrival order
+    out_of_order = np.concatenate([[0], np.cumsum(np.diff(keys) < 0)])[:n].astype(np.uint32)
+    reorder_extent = np.zeros(n, dtype=np.uint32)
+    if n > 1:
+        highest = np.maximum.accumulate(keys)
+        # Reordered: lower than the highest sequence number received before it
+        reordered = np.flatnonzero(keys[1:] < highest[:-1]) + 1
+        # The first packet with a higher sequence number than the reordered packet
+        first_higher = np.searchsorted(highest, keys[reordered], side='right')
+        reorder_extent[reordered] = reordered - first_higher
+
+    # RFC 5236 displacement, arrival position - position in sequence order
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+    displacement = np.arange(n) - position
+    within = np.abs(displacement) <= threshold
+    density = np.bincount(displacement[within] + threshold, minlength=2 * threshold + 1) / max(n, 1)
+
+    burst_lengths, burst_counts = np.unique(missing[missing > 0], return_counts=True)
+    return FlowMetrics(
+        columns={
+            'jitter': jitter,
+            'jitter-rfc3550': jitter_rfc3550,
+            'lost': lost,
+            'out-of-order': out_of_order,
+            'reorder-extent': reorder_extent,
+        },
+        loss_bursts=dict(zip(burst_lengths.tolist(), burst_counts.tolist())),
+        reorder_density=dict(zip(range(-threshold, threshold + 1), density.tolist())),
+    )
@@ -0,0 +1,433 @@
+"""
+Native Pcap/Pcapng Reader for iperf captures
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Reads the capture files written by tshark (e.g. `tshark -s 128 -w expt-rx1.pcap`)
+directly, without converting them to csv with `tshark -T fields`.
+The capture is memory-mapped and the packet records are viewed as a
+structured numpy array. When every record has the same length (fixed
+snaplen, as with `-s 128`), the whole file is read as one strided view.
+Records of other lengths are walked in short runs.
+The ethernet/vlan/ipv4/udp headers and the iperf header fields (offsets as in
+wireshark-dissector-iperf.lua) are then decoded with vectorized numpy indexing.
+
+The returned dataframe has the same columns as the tshark csv field list in
+the capture scripts, so it can be used wherever the csv dataframe is used:
+udp.dstport, frame.time_epoch, frame.len, iperf.tos, iperf.id, iperf.id2, iperf.sec, iperf.usec
+plus frame.time_ns, the capture time in int64 nanoseconds, and vlan.id and ip.src
+(as integers) for splitting a capture of several flows (txrx_demux.py).
+
+Only ipv4/udp packets to the iperf ports are returned (tshark would emit
+empty iperf fields for the rest).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Columns emitted by the tshark `args=` field list in the capture scripts
+TSHARK_FIELDS = ['udp.dstport', 'frame.time_epoch', 'frame.len',
+                 'iperf.tos', 'iperf.id', 'iperf.id2', 'iperf.sec', 'iperf.usec']
+
+# Header fields returned after the tshark fields, to split a capture into flows (the tshark names)
+DEMUX_FIELDS = ['vlan.id', 'ip.src']
+
+# UDP ports decoded as iperf, same as the DissectorTable entry in wireshark-dissector-iperf.lua
+IPERF_PORTS = (5001, 5039)
+# Bytes of iperf header needed to decode up to iperf.tos (offset 62, 2 bytes)
+IPERF_HEADER_LEN = 64
+
+# Link-layer types: header length and offset of the ethertype/protocol field
+LINKTYPES = {
+    1: (14, 12),    # Ethernet
+    113: (16, 14),  # Linux cooked capture (tshark -i any)
+    276: (20, 0),   # Linux cooked capture v2
+}
+
+PCAP_MAGIC_US = 0xa1b2c3d4
+PCAP_MAGIC_NS = 0xa1b23c4d
+PCAPNG_SHB = 0x0a0d0d0a
+PCAPNG_IDB = 0x00000001
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+
+# Maximum number of records checked at once when striding over fixed-length records
+MAX_RUN = 1 << 20
+
+
+def open_capture(file_path):
+    """
+    Memory-maps a capture file and returns it as a uint8 array.
+    """
+    if os.path.getsize(file_path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(file_path, dtype=np.uint8, mode='r')
+
+
+def _u32(buf, pos, byteorder):
+    return int.from_bytes(buf[pos:pos + 4].tobytes(), byteorder)
+
+
+def _strided_runs(buf, pos, end, header_dtype, length_of, stride_of, accept, max_run=MAX_RUN):
+    """
+    Walks consecutive records starting at pos and yields (pos, count, stride, headers) runs.
+    Each run is a strided view of at most max_run records that all have the same length.
+    length_of(header) gives the record length, stride_of(length) the record size in the file
+    and accept(headers, length) the mask of records that continue the run.
+    """
+    header_size = np.dtype(header_dtype).itemsize
+    run = min(16, max_run)
+    while pos + header_size <= end:
+        first = np.ndarray((1,), dtype=header_dtype, buffer=buf, offset=pos)
+        length = int(length_of(first)[0])
+        stride = stride_of(length)
+        if stride < header_size or pos + stride > end:
+            # Truncated (e.g. still being written) or corrupt record
+            break
+        count = min(run, (end - pos - header_size) // stride + 1)
+        headers = np.ndarray((count,), dtype=header_dtype, buffer=buf, offset=pos, strides=(stride,))
+        ok = accept(headers, length)
+        # Number of leading records which continue the run
+        count = count if ok.all() else int(np.argmin(ok))
+        count = max(count, 1)
+        if pos + count * stride > end:
+            count = (end - pos) // stride
+        yield pos, count, stride, headers[:count]
+        pos += count * stride
+        # Grow the run length while records keep the same length, shrink it otherwise
+        run = min(run * 2, max_run) if count == len(ok) else min(16, max_run)
+
+
+def _iter_pcap_runs(buf, max_run, state):
+    """
+    Yields (timestamp_ns, data_offset, caplen, origlen, linktype) arrays of a classic pcap,
+    one tuple per run of equal-length records, continuing from state['pos'].
+    """
+    if 'pos' not in state:
+        magic = _u32(buf, 0, 'little')
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            byteorder, endian = 'little', '<'
+        else:
+            byteorder, endian = 'big', '>'
+            magic = _u32(buf, 0, 'big')
+        state.update(pos=24, endian=endian,
+                     ts_scale=1 if magic == PCAP_MAGIC_NS else 1000,
+                     linktype=_u32(buf, 20, byteorder) & 0xffff)
+    endian, ts_scale, linktype = state['endian'], state['ts_scale'], state['linktype']
+
+    header_dtype = np.dtype([('sec', endian + 'u4'), ('frac', endian + 'u4'),
+                             ('caplen', endian + 'u4'), ('origlen', endian + 'u4')])
+    runs = _strided_runs(buf, state['pos'], len(buf), header_dtype,
+                         length_of=lambda h: h['caplen'],
+                         stride_of=lambda length: 16 + length,
+                         accept=lambda h, length: h['caplen'] == length,
+                         max_run=max_run)
+    for pos, count, stride, headers in runs:
+        state['pos'] = pos + count * stride
+        yield (headers['sec'].astype(np.int64) * 1_000_000_000 + headers['frac'].astype(np.int64) * ts_scale,
+               pos + 16 + stride * np.arange(count, dtype=np.int64),
+               headers['caplen'].astype(np.int64),
+               headers['origlen'].astype(np.int64),
+               np.full(count, linktype, dtype=np.int64))
+
+
+def _idb_resolution(buf, pos, block_len, byteorder):
+    """
+    Returns the timestamp resolution of a pcapng interface description block
+    as (base, exponent), i.e. units of base**-exponent seconds.
+    """
+    opt = pos + 16
+    end = pos + block_len - 4
+    while opt + 4 <= end:
+        code = int.from_bytes(buf[opt:opt + 2].tobytes(), byteorder)
+        length = int.from_bytes(buf[opt + 2:opt + 4].tobytes(), byteorder)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = int(buf[opt + 4])
+            return (2, value & 0x7f) if value & 0x80 else (10, value)
+        opt += 4 + (length + 3) // 4 * 4
+    return 10, 6
+
+
+def _to_ns(ticks, resolution):
+    """
+    Converts pcapng timestamp ticks in the given (base, exponent) resolution to nanoseconds.
+    """
+    base, exponent = resolution
+    if base == 10:
+        if exponent <= 9:
+            return ticks * 10 ** (9 - exponent)
+        return ticks // 10 ** (exponent - 9)
+    sec = ticks >> exponent
+    frac = ticks - (sec << exponent)
+    return sec * 1_000_000_000 + (frac * 1_000_000_000 >> exponent)
+
+
+def _iter_pcapng_runs(buf, max_run, state):
+    """
+    Yields (timestamp_ns, data_offset, caplen, origlen, linktype) arrays of a pcapng,
+    continuing from state['pos'].
+    Enhanced packet blocks of equal length are read as strided runs,
+    all other blocks are walked one by one.
+    """
+    if 'pos' not in state:
+        state.update(pos=0, byteorder='little', endian='<', interfaces=[])
+    interfaces = state['interfaces']
+    byteorder, endian = state['byteorder'], state['endian']
+    pos, end = state['pos'], len(buf)
+    while pos + 12 <= end:
+        block_type = _u32(buf, pos, byteorder)
+        if block_type == PCAPNG_SHB:
+            # Section header, it also sets the byte order of the section
+            if _u32(buf, pos + 8, 'little') == PCAPNG_BYTE_ORDER_MAGIC:
+                byteorder, endian = 'little', '<'
+            else:
+                byteorder, endian = 'big', '>'
+        block_len = _u32(buf, pos + 4, byteorder)
+        if block_len < 12 or pos + block_len > end:
+            break
+
+        if block_type == PCAPNG_SHB:
+            interfaces = []
+            state.update(byteorder=byteorder, endian=endian, interfaces=interfaces)
+            pos += block_len
+        elif block_type == PCAPNG_IDB:
+            linktype = int.from_bytes(buf[pos + 8:pos + 10].tobytes(), byteorder)
+            interfaces.append((linktype, _idb_resolution(buf, pos, block_len, byteorder)))
+            pos += block_len
+        elif block_type == PCAPNG_EPB:
+            header_dtype = np.dtype([('type', endian + 'u4'), ('length', endian + 'u4'),
+                                     ('interface', endian + 'u4'), ('ts_high', endian + 'u4'),
+                                     ('ts_low', endian + 'u4'), ('caplen', endian + 'u4'),
+                                     ('origlen', endian + 'u4')])
+            runs = _strided_runs(buf, pos, end, header_dtype,
+                                 length_of=lambda h: h['length'],
+                                 stride_of=lambda length: length,
+                                 accept=lambda h, length: (h['type'] == PCAPNG_EPB) & (h['length'] == length),
+                                 max_run=max_run)
+            # Only the first run is taken here, the next block decides how to continue
+            run = next(runs, None)
+            if run is None:
+                break
+            run_pos, count, stride, headers = run
+            ticks = (headers['ts_high'].astype(np.int64) << 32) | headers['ts_low'].astype(np.int64)
+            interface = headers['interface'].astype(np.int64)
+            for index in np.unique(interface):
+                linktype, resolution = interfaces[index]
+                selected = interface == index
+                ticks[selected] = _to_ns(ticks[selected], resolution)
+            pos = run_pos + count * stride
+            state['pos'] = pos
+            yield (ticks,
+                   run_pos + 28 + stride * np.arange(count, dtype=np.int64),
+                   headers['caplen'].astype(np.int64),
+                   headers['origlen'].astype(np.int64),
+                   np.array([lt for lt, _ in interfaces], dtype=np.int64)[interface])
+        else:
+            # Other blocks (statistics, name resolution, etc.) are skipped
+            pos += block_len
+        state['pos'] = pos
+
+
+def iter_records(buf, max_run=MAX_RUN, state=None):
+    """
+    Yields (timestamp_ns, data_offset, caplen, origlen, linktype) arrays
+    for runs of at most max_run packets of a memory-mapped pcap or pcapng capture.
+    With a state dictionary, reading continues from where the previous call with
+    the same state stopped, so a capture that is still being written can be read
+    incrementally (an incomplete record at the end is left for the next call).
+    """
+    if state is None:
+        state = {}
+    if 'format' not in state:
+        if len(buf) < 24:
+            return
+        state['format'] = 'pcapng' if _u32(buf, 0, 'little') == PCAPNG_SHB else 'pcap'
+    if state['format'] == 'pcapng':
+        yield from _iter_pcapng_runs(buf, max_run, state)
+    else:
+        yield from _iter_pcap_runs(buf, max_run, state)
+
+
+def read_records(buf):
+    """
+    Returns (timestamp_ns, data_offset, caplen, origlen, linktype) arrays,
+    one entry per captured packet, for a memory-mapped pcap or pcapng capture.
+    """
+    runs = list(iter_records(buf))
+    if not runs:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty, empty
+    return tuple(np.concatenate(arrays) for arrays in zip(*runs))
+
+
+def _gather_be(buf, positions, size):
+    """
+    Reads big-endian unsigned integers of the given byte size at each position.
+    """
+    positions = np.minimum(positions, len(buf) - size)
+    value = np.zeros(len(positions), dtype=np.uint64)
+    for i in range(size):
+        value = (value << np.uint64(8)) | buf[positions + i].astype(np.uint64)
+    return value.astype(np.int64)
+
+
+def decode_udp(buf, offsets, linktype):
+    """
+    Walks the link-layer, vlan and ipv4 headers of each packet.
+    Returns (headers, payload, mask): the udp.dstport, vlan.id (outer tag, 0 if untagged) and
+    ip.src columns, the offset of the udp payload, and the mask of unfragmented (or first fragment)
+    ipv4/udp packets.
+    """
+    n = len(offsets)
+    header_len = np.zeros(n, dtype=np.int64)
+    proto_offset = np.zeros(n, dtype=np.int64)
+    known = np.zeros(n, dtype=bool)
+    for lt, (hlen, poff) in LINKTYPES.items():
+        selected = linktype == lt
+        header_len[selected] = hlen
+        proto_offset[selected] = poff
+        known |= selected
+
+    # Skip up to two vlan tags (802.1Q/802.1ad)
+    l3 = offsets + header_len
+    ethertype = _gather_be(buf, offsets + proto_offset, 2)
+    vlan = np.zeros(n, dtype=np.int64)
+    for tag in range(2):
+        tagged = (ethertype == 0x8100) | (ethertype == 0x88a8)
+        if tag == 0:
+            vlan = np.where(tagged, _gather_be(buf, l3, 2) & 0x0fff, 0)
+        ethertype = np.where(tagged, _gather_be(buf, l3 + 2, 2), ethertype)
+        l3 = l3 + 4 * tagged
+
+    # IPv4 header, unfragmented (or first fragment) udp
+    version_ihl = _gather_be(buf, l3, 1)
+    ihl = (version_ihl & 0x0f) * 4
+    protocol = _gather_be(buf, l3 + 9, 1)
+    fragment_offset = _gather_be(buf, l3 + 6, 2) & 0x1fff
+    udp = l3 + ihl
+    payload = udp + 8
+
+    headers = {
+        'udp.dstport': _gather_be(buf, udp + 2, 2),
+        'vlan.id': vlan,
+        'ip.src': _gather_be(buf, l3 + 12, 4),
+    }
+    mask = (known & (ethertype == 0x0800) & ((version_ihl >> 4) == 4) & (ihl >= 20)
+            & (protocol == 17) & (fragment_offset == 0))
+    return headers, payload, mask
+
+
+def decode_iperf(buf, offsets, caplen, linktype, ports=IPERF_PORTS):
+    """
+    Decodes the udp destination port and iperf header fields of each packet.
+    Returns (columns, mask), where mask selects ipv4/udp packets to iperf ports
+    which were captured with the complete iperf header.
+    """
+    headers, payload, mask = decode_udp(buf, offsets, linktype)
+    dstport = headers['udp.dstport']
+    mask &= payload + IPERF_HEADER_LEN <= offsets + caplen
+    if ports is not None:
+        mask &= (dstport >= ports[0]) & (dstport <= ports[1])
+
+    columns = {
+        **headers,
+        'iperf.tos': _gather_be(buf, payload + 62, 2),
+        'iperf.id': _gather_be(buf, payload, 4),
+        'iperf.id2': _gather_be(buf, payload + 12, 4),
+        'iperf.sec': _gather_be(buf, payload + 4, 4),
+        'iperf.usec': _gather_be(buf, payload + 8, 4),
+    }
+    return columns, mask
+
+
+def _to_frame(buf, records, ports):
+    """
+    Decodes the given packet records into a dataframe with the tshark csv columns.
+    """
+    ts, offsets, caplen, origlen, linktype = records
+    columns, mask = decode_iperf(buf, offsets, caplen, linktype, ports=ports)
+
+    df = pd.DataFrame({
+        'udp.dstport': columns['udp.dstport'][mask],
+        'frame.time_epoch': ts[mask] / 1e9,
+        'frame.time_ns': ts[mask],
+        'frame.len': origlen[mask],
+        'iperf.tos': columns['iperf.tos'][mask],
+        'iperf.id': columns['iperf.id'][mask],
+        'iperf.id2': columns['iperf.id2'][mask],
+        'iperf.sec': columns['iperf.sec'][mask],
+        'iperf.usec': columns['iperf.usec'][mask],
+        'vlan.id': columns['vlan.id'][mask].astype(np.uint16),
+        'ip.src': columns['ip.src'][mask].astype(np.uint32),
+    })
+    return df[TSHARK_FIELDS + ['frame.time_ns'] + DEMUX_FIELDS]
+
+
+def read_pcap(file_path, ports=IPERF_PORTS):
+    """
+    Reads a pcap/pcapng capture of iperf packets.
+    Returns a dataframe with the tshark csv columns (TSHARK_FIELDS),
+    the exact capture time in int64 nanoseconds ('frame.time_ns') and the DEMUX_FIELDS.
+    """
+    buf = open_capture(file_path)
+    return _to_frame(buf, read_records(buf), ports)
+
+
+def iter_record_chunks(buf, chunk_size=1_000_000):
+    """
+    Yields the (timestamp_ns, data_offset, caplen, origlen, linktype) arrays of a memory-mapped
+    capture in chunks of about chunk_size packets.
+    """
+    pending, pending_count = [], 0
+    for records in iter_records(buf, max_run=chunk_size):
+        pending.append(records)
+        pending_count += len(records[0])
+        if pending_count >= chunk_size:
+            yield tuple(np.concatenate(arrays) for arrays in zip(*pending))
+            pending, pending_count = [], 0
+    if pending:
+        yield tuple(np.concatenate(arrays) for arrays in zip(*pending))
+
+
+def iter_pcap(file_path, chunk_size=1_000_000, ports=IPERF_PORTS):
+    """
+    Reads a pcap/pcapng capture of iperf packets in chunks of about chunk_size packets.
+    Yields dataframes with the tshark csv columns (TSHARK_FIELDS).
+    """
+    buf = open_capture(file_path)
+    for records in iter_record_chunks(buf, chunk_size):
+        yield _to_frame(buf, records, ports)
+
+
+class CaptureFollower:
+    """
+    Follows a capture file which is still being written (e.g. by tshark -w),
+    poll() returns the iperf packets appended since the previous poll.
+    """
+
+    def __init__(self, file_path, ports=IPERF_PORTS):
+        self.file_path = file_path
+        self.ports = ports
+        self.size = 0
+        self._state = {}
+
+    def poll(self):
+        """
+        Returns a dataframe of the newly completed packets (None if there are none).
+        """
+        if not os.path.exists(self.file_path):
+            return None
+        size = os.path.getsize(self.file_path)
+        if size == self.size:
+            return None
+        self.size = size
+        buf = open_capture(self.file_path)
+        runs = list(iter_records(buf, state=self._state))
+        if not runs:
+            return None
+        return _to_frame(buf, tuple(np.concatenate(arrays) for arrays in zip(*runs)), self.ports)
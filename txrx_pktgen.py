@@ -0,0 +1,195 @@
+"""
+Pktgen-DPDK Latency Packet Reader
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Reads the captures of Pktgen-DPDK flows (txrx-dpdk.sh), whose latency packets
+carry a sequence number and the tx TSC (cpu cycle counter) timestamp instead
+of the iperf header. The payload fields are decoded as in
+wireshark-dissector-pktgendpdk.lua, with vectorized numpy indexing over the
+memory-mapped capture (see txrx_pcap.py), so multi-Mpps captures are read
+without per-packet Python loops:
+magic1 (6 bytes), magic (4 bytes LE), sequence (4 bytes LE), timestamp (8 bytes LE, TSC)
+
+The TSC timestamp is converted to wall time with a linear fit against the
+capture timestamps of the same file (TSC frequency, unless given, and offset,
+taken so that no packet is captured before its TSC time). The returned dataframe
+has the iperf columns of read_pcap(), so pktgen flows go through the same
+join, loss, reordering and latency analysis as iperf flows:
+- iperf.id  : pktgen sequence number (32 bits, unwrapped by the join), iperf.id2 is 0
+- iperf.sec, iperf.usec : tx TSC timestamp converted to wall time
+- pktgen.timestamp : the raw TSC timestamp
+
+In txrx mode the latency is rx capture - tx capture and does not depend on the
+TSC conversion. In rx-only mode it is rx capture - converted TSC time, and as the
+offset is fitted on the rx capture, it is relative to the lowest one-way delay.
+"""
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from txrx_pcap import TSHARK_FIELDS, DEMUX_FIELDS, open_capture, read_records, iter_record_chunks, decode_udp
+
+# UDP ports decoded as pktgen, same as the DissectorTable entry in wireshark-dissector-pktgendpdk.lua
+PKTGEN_PORTS = (1000, 9999)
+# Bytes of pktgen latency header (magic1, magic, sequence, timestamp)
+PKTGEN_HEADER_LEN = 22
+# Magic number of the latency packets (pktgen_dpdk.magic in wireshark, TSTAMP_MAGIC of Pktgen-DPDK),
+# other packets to the ports are skipped, None to keep every packet to the ports
+PKTGEN_MAGIC = 0xf00dcafe
+
+# Packets the TSC is calibrated on in chunks (iter_pktgen), the first chunks are held back until then
+TSC_CALIBRATION_PACKETS = 10_000
+
+TscCalibration = namedtuple('TscCalibration', [
+    'hz',           # TSC frequency (ticks per second)
+    'tsc_ref',      # TSC value of the reference point
+    'time_ref_ns',  # wall time of the reference point (epoch, in nanoseconds)
+    'residual_ns',  # std of the capture time around the fit
+])
+
+
+def _gather_le(buf, positions, size):
+    """
+    Reads little-endian unsigned integers of the given byte size (4 or 8) at each position.
+    """
+    positions = np.minimum(positions, len(buf) - size)
+    values = buf[positions[:, None] + np.arange(size)]
+    return values.view(f'<u{size}').ravel().astype(np.int64)
+
+
+def decode_pktgen(buf, offsets, caplen, linktype, ports=PKTGEN_PORTS, magic=PKTGEN_MAGIC):
+    """
+    Decodes the udp destination port and pktgen latency header fields of each packet.
+    Returns (columns, mask), where mask selects ipv4/udp packets to pktgen ports
+    which were captured with the complete latency header (and have the given magic number).
+    """
+    headers, payload, mask = decode_udp(buf, offsets, linktype)
+    dstport = headers['udp.dstport']
+    mask &= payload + PKTGEN_HEADER_LEN <= offsets + caplen
+    if ports is not None:
+        mask &= (dstport >= ports[0]) & (dstport <= ports[1])
+    columns = {
+        **headers,
+        'pktgen.magic': _gather_le(buf, payload + 6, 4),
+        'pktgen.id': _gather_le(buf, payload + 10, 4),
+        'pktgen.timestamp': _gather_le(buf, payload + 14, 8),
+    }
+    if magic is not None:
+        mask &= columns['pktgen.magic'] == magic
+    return columns, mask
+
+
+def calibrate_tsc(tsc, time_ns, hz=None):
+    """
+    Fits capture time = time_ref_ns + (tsc - tsc_ref) / hz.
+    hz is the least squares slope unless given, the offset is the lower envelope
+    (the earliest capture relative to its TSC time).
+    """
+    tsc = np.asarray(tsc, dtype=np.int64)
+    time_ns = np.asarray(time_ns, dtype=np.int64)
+    if not len(tsc):
+        raise ValueError("Cannot calibrate the TSC without packets")
+    tsc_ref, time_ref = tsc[0], time_ns[0]
+    # Centred on the first packet, the differences are exact in float64
+    ticks = (tsc - tsc_ref).astype(np.float64)
+    elapsed = (time_ns - time_ref).astype(np.float64)
+    if hz is None:
+        ticks_centred = ticks - ticks.mean()
+        if not np.any(ticks_centred):
+            raise ValueError("Cannot calibrate the TSC frequency from fewer than 2 distinct timestamps")
+        hz = 1e9 * (ticks_centred ** 2).sum() / (ticks_centred * (elapsed - elapsed.mean())).sum()
+    residual = elapsed - ticks * 1e9 / hz
+    return TscCalibration(float(hz), int(tsc_ref), int(time_ref + np.floor(residual.min())), float(residual.std()))
+
+
+def tsc_to_ns(tsc, calibration):
+    """
+    Converts TSC timestamps to wall time (epoch, in int64 nanoseconds).
+    """
+    ticks = (np.asarray(tsc, dtype=np.int64) - calibration.tsc_ref).astype(np.float64)
+    return calibration.time_ref_ns + np.rint(ticks * 1e9 / calibration.hz).astype(np.int64)
+
+
+def set_wall_time(df, calibration):
+    """
+    Sets iperf.sec and iperf.usec (truncated to microseconds, as iperf does) from the TSC timestamps.
+    The calibration is kept in df.attrs['tsc-calibration'] (as a dict, stored with the cache entry).
+    """
+    time_ns = tsc_to_ns(df['pktgen.timestamp'].to_numpy(), calibration)
+    df['iperf.sec'] = time_ns // 1_000_000_000
+    df['iperf.usec'] = time_ns % 1_000_000_000 // 1_000
+    df.attrs['tsc-calibration'] = calibration._asdict()
+    return df
+
+
+def _to_frame(buf, records, ports, magic):
+    """
+    Decodes the given packet records into a dataframe with the tshark csv columns of iperf flows.
+    """
+    ts, offsets, caplen, origlen, linktype = records
+    columns, mask = decode_pktgen(buf, offsets, caplen, linktype, ports=ports, magic=magic)
+    n = int(mask.sum())
+    df = pd.DataFrame({
+        'udp.dstport': columns['udp.dstport'][mask],
+        'frame.time_epoch': ts[mask] / 1e9,
+        'frame.time_ns': ts[mask],
+        'frame.len': origlen[mask],
+        'iperf.tos': np.zeros(n, dtype=np.int64),
+        'iperf.id': columns['pktgen.id'][mask],
+        'iperf.id2': np.zeros(n, dtype=np.int64),
+        'iperf.sec': np.zeros(n, dtype=np.int64),
+        'iperf.usec': np.zeros(n, dtype=np.int64),
+        'pktgen.timestamp': columns['pktgen.timestamp'][mask],
+        'vlan.id': columns['vlan.id'][mask].astype(np.uint16),
+        'ip.src': columns['ip.src'][mask].astype(np.uint32),
+    })
+    return df[TSHARK_FIELDS + ['frame.time_ns', 'pktgen.timestamp'] + DEMUX_FIELDS]
+
+
+def _calibrate_chunks(chunks, tsc_hz):
+    return calibrate_tsc(np.concatenate([chunk['pktgen.timestamp'].to_numpy() for chunk in chunks]),
+                         np.concatenate([chunk['frame.time_ns'].to_numpy() for chunk in chunks]), tsc_hz)
+
+
+def read_pktgen(file_path, ports=PKTGEN_PORTS, magic=PKTGEN_MAGIC, tsc_hz=None):
+    """
+    Reads a pcap/pcapng capture of pktgen latency packets.
+    Returns a dataframe with the columns of read_pcap(), the TSC timestamps converted to
+    iperf.sec/iperf.usec with a calibration against the capture time (tsc_hz: fixed TSC frequency).
+    """
+    buf = open_capture(file_path)
+    df = _to_frame(buf, read_records(buf), ports, magic)
+    if len(df):
+        set_wall_time(df, calibrate_tsc(df['pktgen.timestamp'].to_numpy(), df['frame.time_ns'].to_numpy(), tsc_hz))
+    return df
+
+
+def iter_pktgen(file_path, chunk_size=1_000_000, ports=PKTGEN_PORTS, magic=PKTGEN_MAGIC, tsc_hz=None):
+    """
+    Reads a pcap/pcapng capture of pktgen latency packets in chunks of about chunk_size packets.
+    The TSC is calibrated on the first TSC_CALIBRATION_PACKETS packets (or all, in a shorter capture),
+    and the same conversion is used for the rest. Raises ValueError if they have fewer than
+    2 distinct TSC timestamps, as read_pktgen().
+    """
+    buf = open_capture(file_path)
+    calibration = None
+    pending = []
+    for records in iter_record_chunks(buf, chunk_size):
+        df = _to_frame(buf, records, ports, magic)
+        if calibration is not None:
+            yield set_wall_time(df, calibration)
+            continue
+        pending.append(df)
+        if sum(len(chunk) for chunk in pending) >= TSC_CALIBRATION_PACKETS:
+            calibration = _calibrate_chunks(pending, tsc_hz)
+            for chunk in pending:
+                yield set_wall_time(chunk, calibration)
+            pending = []
+    if sum(len(chunk) for chunk in pending):
+        calibration = _calibrate_chunks(pending, tsc_hz)
+        pending = [set_wall_time(chunk, calibration) for chunk in pending]
+    yield from pending
+
@@ -0,0 +1,180 @@
+"""
+Stage Profiling of the Analysis Scripts
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Instrumentation of the analysis stages (reading the captures, joining, metrics,
+histograms, plots, ...), to see where the time of a slow analysis goes.
+For each stage and flow:
+- wall time and cpu time (of the process running the stage)
+- resident memory (RSS) at the start and its peak during the stage, sampled by
+  a thread every few milliseconds
+- rows processed and rows (packets) per second
+Stages run in the worker processes are returned with the flow's result and
+merged into one report, written as a json file. Optionally the stages of one
+name, or the slowest stage, are also run under cProfile, and the profile is
+written as a .prof file (pstats format, e.g. for snakeviz or
+python -m pstats).
+When disabled, stage() only yields, without timers or threads.
+"""
+
+import os
+import json
+import time
+import marshal
+import resource
+import platform
+import threading
+import cProfile
+import contextlib
+import numpy as np
+import pandas as pd
+
+
+def resident_memory():
+    """
+    Returns the resident memory (RSS) of this process in bytes.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Peak rather than current RSS where /proc is not available (ru_maxrss is in kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler(threading.Thread):
+    """
+    Samples the resident memory of the process until stopped, keeping the peak.
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = resident_memory()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, resident_memory())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, resident_memory())
+        return self.peak
+
+
+class StageProfiler:
+    """
+    Records the measurements of the stages run with `with profiler.stage(name, flow) as record:`,
+    the stage sets record['rows'] to the number of rows it processed.
+    cprofile: None, a stage name to run those stages under cProfile, or 'hottest' for all stages,
+    keeping the profile of the slowest one.
+    """
+
+    def __init__(self, enabled=False, cprofile=None, interval=0.005):
+        self.enabled = enabled
+        self.cprofile = cprofile
+        self.interval = interval
+        self.records = []
+        # Profile of the slowest profiled stage: (wall time, record, pstats dictionary)
+        self.profile = None
+        self._active = 0
+
+    @contextlib.contextmanager
+    def stage(self, name, flow=None, rows=None):
+        if not self.enabled or self._active:
+            # Disabled, or within another stage (its measurements include this one)
+            yield {}
+            return
+        record = {'stage': name, 'flow': flow, 'pid': os.getpid(), 'rows': rows}
+        profile = cProfile.Profile() if self.cprofile in (name, 'hottest') else None
+        self._active += 1
+        start_rss = resident_memory()
+        sampler = MemorySampler(self.interval)
+        sampler.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak_rss = sampler.stop()
+            self._active -= 1
+            record.update({
+                'wall_s': round(wall, 4),
+                'cpu_s': round(cpu, 4),
+                'start_rss_mb': round(start_rss / 2 ** 20, 1),
+                'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+                'rows_per_s': round(record['rows'] / wall) if record['rows'] is not None and wall > 0 else None,
+            })
+            self.records.append(record)
+            if profile is not None and (self.profile is None or wall > self.profile[0]):
+                profile.create_stats()
+                self.profile = (wall, dict(record), profile.stats)
+
+    def take(self):
+        """
+        Returns the records and profile of this process (e.g. to return them from a worker), and clears them.
+        """
+        taken = {'records': self.records, 'profile': self.profile}
+        self.records, self.profile = [], None
+        return taken
+
+    def merge(self, taken):
+        """
+        Adds the records and profile returned by take() in another process.
+        """
+        if not taken:
+            return
+        self.records += taken['records']
+        if taken['profile'] is not None and (self.profile is None or taken['profile'][0] > self.profile[0]):
+            self.profile = taken['profile']
+
+    def summary(self):
+        """
+        Returns the totals per stage (wall and cpu time, peak RSS, rows and rows per second), slowest first.
+        """
+        if not self.records:
+            return pd.DataFrame()
+        df = pd.DataFrame(self.records)
+        df['rows'] = df['rows'].astype(np.float64)
+        summary = df.groupby('stage', sort=False).agg(
+            calls=('wall_s', 'size'), wall_s=('wall_s', 'sum'), cpu_s=('cpu_s', 'sum'),
+            peak_rss_mb=('peak_rss_mb', 'max'), rows=('rows', 'sum'))
+        summary['rows_per_s'] = (summary['rows'] / summary['wall_s']).where(summary['rows'] > 0).round()
+        return summary.sort_values('wall_s', ascending=False)
+
+    def write(self, output_directory, name, settings=None):
+        """
+        Writes the json report (stages, totals per stage, environment and settings) and the
+        cProfile dump of the slowest profiled stage. Returns the written file paths.
+        """
+        os.makedirs(output_directory, exist_ok=True)
+        paths = []
+        summary = self.summary()
+        report = {
+            'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                            'platform': platform.platform(), 'cpus': os.cpu_count()},
+            'settings': settings or {},
+            'stages': self.records,
+            'summary': json.loads(summary.reset_index().to_json(orient='records')) if len(summary) else [],
+        }
+        if self.profile is not None:
+            wall, record, stats = self.profile
+            path = os.path.join(output_directory, f'{name}-{record["stage"]}.prof')
+            with open(path, 'wb') as f:
+                marshal.dump(stats, f)
+            report['cprofile'] = {'stage': record['stage'], 'flow': record['flow'], 'wall_s': wall, 'file': path}
+            paths.append(path)
+        path = os.path.join(output_directory, f'{name}.json')
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=1, default=str)
+        paths.insert(0, path)
+        return paths
@@ -0,0 +1,264 @@
+"""
+Decimating Headless Plot Renderer
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Alternative to plot_statistics() of the analysis scripts for flows of millions
+of packets. The packets are aggregated before anything reaches matplotlib, so
+the render time does not depend on the number of packets:
+- Time series  : per pixel column, the min/max envelope and percentile lines
+                 (instead of one scatter point per packet)
+- CDF          : ECDF from a fine histogram of the values
+- Box plots    : box statistics per time bin, drawn with Axes.bxp()
+The figures are drawn on the Agg canvas (no pyplot, no X display needed, e.g.
+over ssh without -X) and written to png/svg files.
+"""
+
+import os
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Pixel columns of a time series plot
+PIXEL_COLUMNS = 1600
+# Value bins of the per-column histograms (the vertical resolution of the envelopes)
+VALUE_BINS = 1024
+# Percentile lines of the time series envelopes
+ENVELOPE_PERCENTILES = (50, 99)
+# Bins of the ECDF histograms
+ECDF_BINS = 4096
+# Time bins of the box plots, same as plot_statistics()
+BOX_BINS = 20
+FIGURE_SIZE = (16, 9)
+DPI = 100
+
+
+def _edges(values, bins):
+    """
+    Returns bins + 1 edges over the range of the (non-NaN) values.
+    """
+    low, high = (np.nanmin(values), np.nanmax(values)) if np.isfinite(values).any() else (0.0, 1.0)
+    if high <= low:
+        high = low + 1.0
+    return np.linspace(low, high, bins + 1)
+
+
+def _bin(values, edges):
+    index = ((values - edges[0]) * ((len(edges) - 1) / (edges[-1] - edges[0]))).astype(np.int64)
+    return np.clip(index, 0, len(edges) - 2, out=index)
+
+
+def binned_histograms(x, y, x_edges, y_edges):
+    """
+    Returns the (x bins, y bins) counts of the (x, y) points without NaN, in one pass.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    cells = _bin(x, x_edges)
+    cells *= len(y_edges) - 1
+    cells += _bin(y, y_edges)
+    counts = np.bincount(cells, minlength=(len(x_edges) - 1) * (len(y_edges) - 1))
+    return counts.reshape(len(x_edges) - 1, len(y_edges) - 1)
+
+
+def histogram_quantiles(counts, y_edges, percentiles):
+    """
+    Returns the percentiles of each row of a histogram (rows, y bins), at the bin centres.
+    NaN for empty rows.
+    """
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1:]
+    centres = (y_edges[:-1] + y_edges[1:]) / 2
+    result = np.full((len(percentiles), len(counts)), np.nan)
+    for i, percentile in enumerate(percentiles):
+        # First bin whose cumulative count reaches the percentile's rank
+        rank = np.maximum(np.ceil(total * percentile / 100), 1)
+        index = np.argmax(cumulative >= rank, axis=1)
+        result[i] = np.where(total[:, 0] > 0, centres[index], np.nan)
+    return result
+
+
+def time_envelope(x, y, columns=PIXEL_COLUMNS, value_bins=VALUE_BINS, percentiles=ENVELOPE_PERCENTILES):
+    """
+    Returns the column centres, min, max and percentiles (one row per percentile) of y per pixel column of x.
+    """
+    x_edges = _edges(np.asarray(x, dtype=np.float64), columns)
+    y_edges = _edges(np.asarray(y, dtype=np.float64), value_bins)
+    counts = binned_histograms(x, y, x_edges, y_edges)
+    occupied = counts > 0
+    filled = occupied.any(axis=1)
+    low = np.where(filled, y_edges[np.argmax(occupied, axis=1)], np.nan)
+    high = np.where(filled, y_edges[value_bins - np.argmax(occupied[:, ::-1], axis=1)], np.nan)
+    centres = (x_edges[:-1] + x_edges[1:]) / 2
+    return centres, low, high, histogram_quantiles(counts, y_edges, percentiles)
+
+
+def histogram_ecdf(values, bins=ECDF_BINS):
+    """
+    Returns the bin edges and the proportion of values at or below each edge.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    edges = _edges(values, bins)
+    counts = np.bincount(_bin(values, edges), minlength=bins)
+    return edges, np.concatenate([[0.0], np.cumsum(counts) / max(len(values), 1)])
+
+
+def box_statistics(counts, y_edges):
+    """
+    Returns the box statistics (for Axes.bxp) of each row of a histogram (time bins, y bins),
+    as by pd.cut() + boxplot, with the quartiles and whiskers to the histogram resolution.
+    """
+    low_quartile, median, high_quartile = histogram_quantiles(counts, y_edges, (25, 50, 75))
+    centres = (y_edges[:-1] + y_edges[1:]) / 2
+    stats = []
+    for row in range(len(counts)):
+        if not counts[row].any():
+            continue
+        iqr = high_quartile[row] - low_quartile[row]
+        # Whiskers, the furthest values within 1.5 IQR of the quartiles
+        present = centres[counts[row] > 0]
+        within = present[(present >= low_quartile[row] - 1.5 * iqr) & (present <= high_quartile[row] + 1.5 * iqr)]
+        stats.append({'label': str(row), 'med': median[row], 'q1': low_quartile[row], 'q3': high_quartile[row],
+                      'whislo': within.min(), 'whishi': within.max(), 'fliers': []})
+    return stats
+
+
+def plot_envelope(ax, envelope, label=None):
+    centres, low, high, percentiles = envelope
+    lines = ax.fill_between(centres, low, high, alpha=0.3, step='mid', linewidth=0, label=label)
+    colour = lines.get_facecolor()[0]
+    for percentile, values in zip(ENVELOPE_PERCENTILES, percentiles):
+        ax.plot(centres, values, color=colour, lw=0.8, alpha=0.5 + 0.5 * (percentile == 50))
+
+
+def plot_ecdf(ax, ecdf, label=None):
+    edges, proportion = ecdf
+    ax.plot(edges, proportion, lw=2, drawstyle='steps-post', label=label)
+    ax.set_ylabel('Proportion')
+
+
+def plot_boxes(ax, counts, y_edges):
+    ax.bxp(box_statistics(counts, y_edges), showfliers=False)
+
+
+def _save(fig, output_directory, name, formats):
+    FigureCanvasAgg(fig)
+    fig.tight_layout()
+    paths = []
+    for extension in formats:
+        path = os.path.join(output_directory, f'{name}.{extension}')
+        fig.savefig(path, dpi=DPI)
+        paths.append(path)
+    return paths
+
+
+def render_statistics(stats_dict, output_directory, time_column='frame.time_epoch_x', columns=None,
+                      formats=('png',), flow_labels=('ST', 'BE'), date=None):
+    """
+    Renders the plots of plot_statistics() from pre-aggregated data and writes them to
+    output_directory (one file per figure and format, named with the date of the run if given).
+    Returns the written file paths.
+    - One figure per flow, time series of each of the columns (default: all but the time, id and latency)
+    - One figure with the latency box plots per time bin, time series and CDF of the first flows and all flows
+    Each flow's packets are aggregated once, the figures are drawn from the aggregates.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    if columns is None:
+        columns = [column for column in next(iter(stats_dict.values())).columns
+                   if column not in ['time_tx', time_column, 'iperf.id', 'latency', 'jitter']]
+    suffix = f'-{date}' if date else ''
+    # Seconds from the first packet with a time (rx-only rows have no tx time) of each flow, and latency
+    times, latencies = {}, {}
+    for file, df in stats_dict.items():
+        time = df[time_column].to_numpy(np.float64)
+        timed = np.flatnonzero(np.isfinite(time))
+        times[file] = time - time[timed[0]] if len(timed) else time
+        latencies[file] = df['latency'].to_numpy(np.float64)
+    paths = []
+
+    ' Time-Series plot for each flow '
+    for file, df in stats_dict.items():
+        fig = Figure(figsize=(10, 6))
+        axes = fig.subplots(nrows=len(columns), ncols=1, sharex=True, squeeze=False)[:, 0]
+        for ax, column in zip(axes, columns):
+            plot_envelope(ax, time_envelope(times[file], df[column].to_numpy()))
+            ax.set_ylabel(column)
+            ax.set_title(f'Time Series of {column}')
+            ax.grid(True)
+        axes[-1].set_xlabel('time_from_start(s)')
+        paths += _save(fig, output_directory, f'{file}-timeseries{suffix}', formats)
+
+    ' All together - Time-Series & CDF for 1 ST and 1 BE flow, and all flows '
+    envelopes = {file: time_envelope(times[file], latencies[file]) for file in stats_dict}
+    ecdfs = {file: histogram_ecdf(latencies[file]) for file in stats_dict}
+    # Box plot histograms over the time bins of each flow (pd.cut() of its own time range, as in plot_statistics())
+    # and the same latency range for all flows, summed by bin for the all flows row
+    latency_edges = _edges(np.array([np.nanmin(latency) for latency in latencies.values() if np.isfinite(latency).any()]
+                                    + [np.nanmax(latency) for latency in latencies.values()
+                                       if np.isfinite(latency).any()]), ECDF_BINS)
+    boxes = {file: binned_histograms(times[file], latencies[file], _edges(times[file], BOX_BINS), latency_edges)
+             for file in stats_dict}
+
+    labels = dict(zip(list(stats_dict)[:len(flow_labels)], flow_labels))
+    fig = Figure(figsize=FIGURE_SIZE)
+    axes = fig.subplots(len(labels) + 1, 3, squeeze=False)
+    for row, (key, label) in enumerate(labels.items()):
+        plot_boxes(axes[row, 0], boxes[key], latency_edges)
+        plot_envelope(axes[row, 1], envelopes[key])
+        axes[row, 1].set_title(f'Latency TimeSeries [{label}]')
+        plot_ecdf(axes[row, 2], ecdfs[key])
+        axes[row, 2].set_title(f'Latency CDF [{label}]')
+    for key in stats_dict:
+        plot_envelope(axes[-1, 1], envelopes[key], label=key)
+        plot_ecdf(axes[-1, 2], ecdfs[key], label=key)
+    plot_boxes(axes[-1, 0], sum(boxes.values()), latency_edges)
+    axes[-1, 1].set_title('Latency TimeSeries [All flows]')
+    axes[-1, 2].set_title('Latency CDF [All flows]')
+    axes[-1, 2].legend(loc='best')
+    for row in range(len(labels) + 1):
+        axes[row, 0].set_xlabel('Time')
+        axes[row, 0].set_ylabel('latency')
+        for ax in axes[row]:
+            ax.grid(True)
+        axes[row, 1].set_xlabel('time_from_start(s)')
+        axes[row, 1].set_ylabel('latency')
+        axes[row, 2].set_xlabel('latency')
+    fig.suptitle('Latency vs Time - for Scheduled Traffic and Best Effort flows - [Scheduled Traffic (ST)]')
+    paths += _save(fig, output_directory, f'latency{suffix}', formats)
+    return paths
+
+
+def render_windows(tables, output_directory, name='windows', formats=('png',)):
+    """
+    Renders the time-window statistics of txrx_windows.py ({flow: table}, e.g. from read_windows())
+    and writes them to output_directory: latency percentiles and max, loss ratio, reordered packets
+    and throughput per window. Returns the written file paths.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    fig = Figure(figsize=FIGURE_SIZE)
+    axes = fig.subplots(4, 1, sharex=True)
+    for flow, table in tables.items():
+        time = table['time_from_start(s)'].to_numpy()
+        percentiles = [column for column in table.columns if column.startswith('latency-p')]
+        colour = None
+        for column in percentiles:
+            lines = axes[0].plot(time, table[column].to_numpy(), color=colour, lw=1.5 if colour is None else 0.8,
+                                 label=f'{flow} {column[len("latency-"):]}')
+            colour = lines[0].get_color()
+        axes[0].plot(time, table['latency-max'].to_numpy(), color=colour, lw=0.5, ls=':', label=f'{flow} max')
+        axes[1].plot(time, table['loss-ratio'].to_numpy(), color=colour, drawstyle='steps-post', label=flow)
+        axes[2].plot(time, table['reordered'].to_numpy(), color=colour, drawstyle='steps-post', label=flow)
+        axes[3].plot(time, table['throughput(Mbps)'].to_numpy(), color=colour, drawstyle='steps-post', label=flow)
+    for ax, column in zip(axes, ['latency', 'loss-ratio', 'reordered', 'throughput(Mbps)']):
+        ax.set_ylabel(column)
+        ax.set_title(f'{column} per window')
+        ax.grid(True)
+    axes[0].legend(loc='best', fontsize='small')
+    axes[-1].set_xlabel('time_from_start(s)')
+    return _save(fig, output_directory, name, formats)
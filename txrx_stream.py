@@ -0,0 +1,491 @@
+"""
+Streaming Packet Flow Statistics
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Bounded-memory alternative to extract_statistics() of the analysis scripts,
+for long (soak test) captures that do not fit in memory.
+The tx and rx files (csv or pcap) are read in chunks. Loss, out-of-order,
+rolling jitter and latency summaries are updated incrementally per chunk.
+Peak memory depends on the chunk size and the reorder depth, not on the
+length of the capture.
+
+- tx packets are buffered until the rx packets with the same sequence number
+  arrive (rx may lag tx), and evicted once they are more than reorder_depth
+  sequence numbers behind the rx side.
+- rx packets are kept in a reorder buffer of reorder_depth sequence numbers,
+  and released in sequence order for the loss and rolling jitter calculations,
+  which the in-memory path does on the id-sorted flow.
+- Quantiles are taken from a histogram of the latency values at a fixed
+  resolution, so they match the in-memory describe() to within that resolution.
+  The count, mean, std, min and max match exactly.
+"""
+
+import numpy as np
+import pandas as pd
+from txrx_pcap import iter_pcap
+from txrx_pktgen import iter_pktgen
+from txrx_join import combine_keys
+from txrx_ingest import iter_tshark_csv
+from txrx_metrics import JITTER_WINDOW, rolling_std
+from txrx_hdr import LatencyHistogram, SIGNIFICANT_DIGITS
+from txrx_demux import select_flow
+from txrx_windows import WindowStatistics, reordered_packets, gap_losses
+
+
+def iter_flow_file(file_path, input_format='csv', chunk_size=1_000_000, trim=2, demux=None):
+    """
+    Yields a flow's csv or pcap (iperf or pktgen) file as dataframes of about chunk_size rows,
+    with the capture time in int64 nanoseconds ('frame.time_ns').
+    The last `trim` rows of the file are dropped, as in read_csv_files().
+    demux: (keys, flow) to read one flow of a capture of several flows (see txrx_demux.py).
+    """
+    if input_format == 'pcap':
+        chunks = iter_pcap(file_path, chunk_size)
+    elif input_format == 'pktgen':
+        chunks = iter_pktgen(file_path, chunk_size)
+    else:
+        # Typed csv chunks, exact capture time in nanoseconds (txrx_ingest.py)
+        chunks = iter_tshark_csv(file_path, chunk_size)
+    held = None
+    for chunk in chunks:
+        if held is not None:
+            chunk = pd.concat([held, chunk], ignore_index=True)
+        # Hold back the last rows until it is known whether they are the end of the file
+        cut = max(len(chunk) - trim, 0)
+        held = chunk.iloc[cut:]
+        if cut:
+            yield chunk.iloc[:cut] if demux is None else select_flow(chunk.iloc[:cut], *demux)
+
+
+def sequence_keys(df):
+    """
+    Returns the iperf sequence number (iperf.id2 upper and iperf.id lower 32 bits) as int64.
+    Chunks are keyed independently, so wraparound/restarts are not unwrapped as in txrx_join.
+    """
+    return combine_keys(df['iperf.id'].to_numpy(), df['iperf.id2'].to_numpy())
+
+
+class RunningSummary:
+    """
+    describe()-style summary of a stream of values.
+    Count, mean, std (Chan's parallel update), min and max are exact.
+    Quantiles come from a sparse histogram of the values at the given resolution.
+    """
+
+    def __init__(self, name, resolution=0.01):
+        self.name = name
+        self.resolution = resolution
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.bins = np.zeros(0, dtype=np.int64)
+        self.bin_counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        # Merge count, mean and sum of squared deviations of the chunk
+        n = len(values)
+        mean = values.mean()
+        m2 = np.square(values - mean).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        # Merge the chunk's histogram into the running histogram
+        bins = np.round(values / self.resolution).astype(np.int64)
+        merged, inverse = np.unique(np.concatenate([self.bins, bins]), return_inverse=True)
+        weights = np.concatenate([self.bin_counts, np.ones(len(bins), dtype=np.int64)])
+        self.bin_counts = np.bincount(inverse, weights=weights, minlength=len(merged)).astype(np.int64)
+        self.bins = merged
+
+    def quantile(self, q):
+        """
+        Linearly interpolated quantile, as pandas does it on the raw values.
+        """
+        if not self.count:
+            return np.nan
+        cumulative = np.cumsum(self.bin_counts)
+        position = (self.count - 1) * q
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        values = self.bins[np.searchsorted(cumulative, [lower, upper], side='right')] * self.resolution
+        values = np.clip(values, self.min, self.max)
+        return values[0] + (position - lower) * (values[1] - values[0])
+
+    def describe(self):
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        return pd.Series({
+            'count': float(self.count),
+            'mean': self.mean if self.count else np.nan,
+            'std': std,
+            'min': self.min if self.count else np.nan,
+            '25%': self.quantile(0.25),
+            '50%': self.quantile(0.5),
+            '75%': self.quantile(0.75),
+            'max': self.max if self.count else np.nan,
+        }, name=self.name)
+
+
+class FlowAccumulator:
+    """
+    Incremental loss, out-of-order, rolling jitter and latency statistics of a flow.
+    rx packets are fed in arrival order with update(), finish() releases the reorder buffer.
+    With window_sizes, also the time-window statistics (txrx_windows.py) of the packets' tx time;
+    windows more than window_lag seconds older than the buffered packets are closed.
+    """
+
+    def __init__(self, reorder_depth=10_000, resolution=0.01, window_sizes=None, window_lag=1.0,
+                 histogram_digits=SIGNIFICANT_DIGITS):
+        self.reorder_depth = reorder_depth
+        self.windows = WindowStatistics(window_sizes) if window_sizes else None
+        self.window_lag = window_lag
+        self.latency = RunningSummary('latency', resolution)
+        self.histogram = LatencyHistogram(histogram_digits)
+        self.jitter = RunningSummary('jitter', resolution)
+        self.rows = 0
+        self.lost = 0
+        self.out_of_order = 0
+        # Packets which arrived after their place in the sequence order was already released
+        self.late = 0
+        self._last_arrival = None
+        self._last_released = None
+        self._pending_keys = np.zeros(0, dtype=np.int64)
+        self._pending_latency = np.zeros(0)
+        self._pending_time = np.zeros(0, dtype=np.int64)
+        self._jitter_tail = np.zeros(0)
+        self._highest = None
+
+    def update(self, keys, latency, time_ns=None, length=None):
+        """
+        Adds rx packets (sequence keys and latency in microseconds) in arrival order,
+        with their tx time (epoch ns) and frame length for the window statistics.
+        """
+        if not len(keys):
+            return
+        self.rows += len(keys)
+        self.latency.update(latency)
+        self.histogram.record(latency)
+        if self.windows is not None:
+            reordered, self._highest = reordered_packets(keys, self._highest)
+            self.windows.record(time_ns, latency, length, reordered)
+        elif time_ns is None:
+            time_ns = np.zeros(len(keys), dtype=np.int64)
+
+        # Out-of-order in arrival order, sequence number lower than the previous packet
+        arrival = keys if self._last_arrival is None else np.concatenate([[self._last_arrival], keys])
+        self.out_of_order += int(np.count_nonzero(np.diff(arrival) < 0))
+        self._last_arrival = keys[-1]
+
+        self._pending_keys = np.concatenate([self._pending_keys, keys])
+        self._pending_latency = np.concatenate([self._pending_latency, latency])
+        self._pending_time = np.concatenate([self._pending_time, time_ns])
+        self._release(self._pending_keys.max() - self.reorder_depth)
+        if self.windows is not None and len(self._pending_time):
+            # Losses are counted when the gaps are released, at the time of a buffered packet
+            self.windows.close(self._pending_time.min() - self.window_lag * 1e9)
+
+    def finish(self):
+        self._release(None)
+
+    def _release(self, watermark):
+        """
+        Releases the buffered packets up to the watermark sequence number in sequence order.
+        """
+        order = np.argsort(self._pending_keys, kind='stable')
+        keys = self._pending_keys[order]
+        latency = self._pending_latency[order]
+        time = self._pending_time[order]
+        n = len(keys) if watermark is None else int(np.searchsorted(keys, watermark, side='right'))
+        self._pending_keys, self._pending_latency, self._pending_time = keys[n:], latency[n:], time[n:]
+        keys, latency, time = keys[:n], latency[:n], time[:n]
+        if not n:
+            return
+
+        if self._last_released is not None:
+            # Packets reordered by more than reorder_depth, they fill a gap already counted as lost
+            late = keys < self._last_released
+            if late.any():
+                self.late += int(np.count_nonzero(late))
+                self.lost -= int(np.count_nonzero(late))
+                if self.windows is not None:
+                    self.windows.record_lost(time[late], -np.ones(np.count_nonzero(late)))
+                keys, latency, time = keys[~late], latency[~late], time[~late]
+            keys_with_last = np.concatenate([[self._last_released], keys])
+        else:
+            keys_with_last = keys
+        if not len(keys):
+            return
+
+        # Lost packets, gaps in the sequence order
+        diff_values = np.diff(keys_with_last)
+        self.lost += int((diff_values[diff_values > 1] - 1).sum())
+        if self.windows is not None:
+            self.windows.record_lost(*gap_losses(keys, time, self._last_released))
+        self._last_released = keys[-1]
+
+        # Rolling jitter over the sequence order, continued from the previous release
+        series = np.concatenate([self._jitter_tail, latency])
+        jitter = rolling_std(series, JITTER_WINDOW)
+        self.jitter.update(jitter[len(self._jitter_tail):])
+        self._jitter_tail = series[-(JITTER_WINDOW - 1):]
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'latency': self.latency.describe(),
+            'latency-histogram': self.histogram,
+            'jitter': self.jitter.describe(),
+            'lost': self.lost,
+            'out-of-order': self.out_of_order,
+            'late': self.late,
+            'windows': self.windows.tables() if self.windows is not None else None,
+        }
+
+
+class StreamJoin:
+    """
+    Matches streamed rx packets to tx packets with the same sequence key.
+    tx chunks are read ahead until they cover the rx chunk's capture time (plus `lag`,
+    for rx lagging tx or clock offsets), and evicted once they are reorder_depth
+    sequence numbers behind the rx chunk. Evicted tx packets that were never
+    received are counted in tx_only.
+    """
+
+    def __init__(self, tx_chunks, reorder_depth=10_000, lag=1.0):
+        self._tx_chunks = iter(tx_chunks)
+        self.reorder_depth = reorder_depth
+        self.lag = lag
+        self.tx_rows = 0
+        self.tx_only = 0
+        self._exhausted = False
+        self._last_time = -np.inf
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._time = np.zeros(0, dtype=np.int64)
+        self._matched = np.zeros(0, dtype=bool)
+
+    def _read(self):
+        chunk = next(self._tx_chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            return
+        self.tx_rows += len(chunk)
+        time = chunk['frame.time_ns'].to_numpy(np.int64)
+        self._last_time = time[-1]
+        keys = np.concatenate([self._keys, sequence_keys(chunk)])
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._time = np.concatenate([self._time, time])[order]
+        self._matched = np.concatenate([self._matched, np.zeros(len(chunk), dtype=bool)])[order]
+
+    def _evict(self, watermark):
+        n = int(np.searchsorted(self._keys, watermark))
+        self.tx_only += int(np.count_nonzero(~self._matched[:n]))
+        self._keys, self._time, self._matched = self._keys[n:], self._time[n:], self._matched[n:]
+
+    def match(self, rx_keys, rx_time):
+        """
+        Returns the tx capture time (ns) of each rx packet, and whether a tx packet matched.
+        rx_time is the rx capture time in ns.
+        """
+        watermark = rx_keys.min() - self.reorder_depth
+        while not self._exhausted and self._last_time <= rx_time.max() + self.lag * 1e9:
+            self._read()
+            self._evict(watermark)
+        self._evict(watermark)
+
+        if not len(self._keys):
+            return np.zeros(len(rx_keys), dtype=np.int64), np.zeros(len(rx_keys), dtype=bool)
+        index = np.minimum(np.searchsorted(self._keys, rx_keys), len(self._keys) - 1)
+        found = self._keys[index] == rx_keys
+        self._matched[index[found]] = True
+        return self._time[index], found
+
+    def finish(self):
+        while not self._exhausted:
+            self._read()
+            self._evict(np.iinfo(np.int64).max)
+        self._evict(np.iinfo(np.int64).max)
+
+
+def stream_flow_statistics(file_path_tx, file_path_rx, input_format='csv',
+                           chunk_size=1_000_000, reorder_depth=10_000, lag=1.0, demux=None, window_sizes=None,
+                           histogram_digits=SIGNIFICANT_DIGITS):
+    """
+    Streaming statistics of a flow captured at tx and rx, latency = rx capture - tx capture.
+    Returns a summary dictionary (see FlowAccumulator.summary()).
+    window_sizes: time-window statistics over the tx capture time (rx time of packets not found at tx).
+    histogram_digits: significant digits of the latency histogram.
+    """
+    join = StreamJoin(iter_flow_file(file_path_tx, input_format, chunk_size, demux=demux), reorder_depth, lag)
+    accumulator = FlowAccumulator(reorder_depth, window_sizes=window_sizes, histogram_digits=histogram_digits)
+    attrs = {}
+    for df_rx in iter_flow_file(file_path_rx, input_format, chunk_size, demux=demux):
+        attrs = df_rx.attrs
+        keys = sequence_keys(df_rx)
+        time_rx = df_rx['frame.time_ns'].to_numpy(np.int64)
+        time_tx, found = join.match(keys, time_rx)
+        # Latency (in microseconds), rx capture - tx capture
+        accumulator.update(keys, np.where(found, (time_rx - time_tx) / 1e3, np.nan),
+                           np.where(found, time_tx, time_rx), df_rx['frame.len'].to_numpy())
+    join.finish()
+    accumulator.finish()
+
+    summary = accumulator.summary()
+    summary['tx_rows'] = join.tx_rows
+    summary['tx-only'] = join.tx_only
+    if 'tsc-calibration' in attrs:
+        summary['tsc-calibration'] = {'rx': attrs['tsc-calibration']}
+    return summary
+
+
+def stream_rx_statistics(file_path_rx, input_format='csv', chunk_size=1_000_000, reorder_depth=10_000,
+                         demux=None, window_sizes=None, histogram_digits=SIGNIFICANT_DIGITS):
+    """
+    Streaming statistics of a flow captured at rx only, latency = rx capture - iperf tx time.
+    Returns a summary dictionary (see FlowAccumulator.summary()).
+    window_sizes: time-window statistics over the iperf tx time.
+    histogram_digits: significant digits of the latency histogram.
+    """
+    accumulator = FlowAccumulator(reorder_depth, window_sizes=window_sizes, histogram_digits=histogram_digits)
+    attrs = {}
+    for df_rx in iter_flow_file(file_path_rx, input_format, chunk_size, demux=demux):
+        attrs = df_rx.attrs
+        # Latency (in microseconds), rx capture - iperf tx
+        time_tx = df_rx['iperf.sec'].to_numpy(np.int64) * 1_000_000_000 + df_rx['iperf.usec'].to_numpy(np.int64) * 1_000
+        latency = (df_rx['frame.time_ns'].to_numpy(np.int64) - time_tx) / 1e3
+        accumulator.update(sequence_keys(df_rx), latency, time_tx, df_rx['frame.len'].to_numpy())
+    accumulator.finish()
+    summary = accumulator.summary()
+    if 'tsc-calibration' in attrs:
+        # TSC calibration of pktgen captures, the iperf tx time of the latency
+        summary['tsc-calibration'] = {'rx': attrs['tsc-calibration']}
+    return summary
+
+
+class LiveFlow:
+    """
+    Incremental statistics of a flow whose captures are still being written.
+    Packets are added as they are read from the captures (add_tx/add_rx), and
+    update() matches the pending rx packets to tx packets and feeds them to a
+    FlowAccumulator, in O(new packets) per call.
+    The rx capture may be read ahead of the tx capture: an rx packet waits for its
+    tx packet until the tx capture is max_lag seconds past it (or the rx capture
+    is max_wait seconds past it), and is then counted without latency.
+    Without tx (rx only), latency is rx capture - iperf tx time.
+    """
+
+    def __init__(self, with_tx=True, reorder_depth=10_000, max_lag=1.0, max_wait=10.0):
+        self.with_tx = with_tx
+        self.reorder_depth = reorder_depth
+        self.max_lag = max_lag
+        self.max_wait = max_wait
+        self.accumulator = FlowAccumulator(reorder_depth)
+        self.tx_rows = 0
+        self.tx_only = 0
+        self._tx_newest = np.iinfo(np.int64).min
+        self._rx_newest = np.iinfo(np.int64).min
+        self._released = np.iinfo(np.int64).min
+        self._tx_keys = np.zeros(0, dtype=np.int64)
+        self._tx_time = np.zeros(0, dtype=np.int64)
+        self._tx_matched = np.zeros(0, dtype=bool)
+        self._rx_keys = np.zeros(0, dtype=np.int64)
+        self._rx_time = np.zeros(0, dtype=np.int64)
+
+    def add_tx(self, df_tx):
+        keys = sequence_keys(df_tx)
+        time = df_tx['frame.time_ns'].to_numpy(np.int64)
+        if not len(keys):
+            return
+        self.tx_rows += len(keys)
+        self._tx_newest = max(self._tx_newest, time.max())
+        if np.all(np.diff(keys) > 0) and (not len(self._tx_keys) or keys[0] > self._tx_keys[-1]):
+            # In-order tx packets are appended, no need to sort the buffer
+            self._tx_keys = np.concatenate([self._tx_keys, keys])
+            self._tx_time = np.concatenate([self._tx_time, time])
+            self._tx_matched = np.concatenate([self._tx_matched, np.zeros(len(keys), dtype=bool)])
+            return
+        keys = np.concatenate([self._tx_keys, keys])
+        order = np.argsort(keys, kind='stable')
+        self._tx_keys = keys[order]
+        self._tx_time = np.concatenate([self._tx_time, time])[order]
+        self._tx_matched = np.concatenate([self._tx_matched, np.zeros(len(time), dtype=bool)])[order]
+
+    def add_rx(self, df_rx):
+        keys = sequence_keys(df_rx)
+        time = df_rx['frame.time_ns'].to_numpy(np.int64)
+        if not len(keys):
+            return
+        self._rx_newest = max(self._rx_newest, time.max())
+        if not self.with_tx:
+            # Latency (in microseconds), rx capture - iperf tx
+            latency = (time - df_rx['iperf.sec'].to_numpy(np.int64) * 1_000_000_000
+                       - df_rx['iperf.usec'].to_numpy(np.int64) * 1_000) / 1e3
+            self.accumulator.update(keys, latency)
+            return
+        self._rx_keys = np.concatenate([self._rx_keys, keys])
+        self._rx_time = np.concatenate([self._rx_time, time])
+
+    def update(self):
+        """
+        Releases the pending rx packets whose tx packet was found or is not expected any more.
+        """
+        if not len(self._rx_keys):
+            return
+        if len(self._tx_keys):
+            index = np.minimum(np.searchsorted(self._tx_keys, self._rx_keys), len(self._tx_keys) - 1)
+            found = self._tx_keys[index] == self._rx_keys
+        else:
+            index = np.zeros(len(self._rx_keys), dtype=np.int64)
+            found = np.zeros(len(self._rx_keys), dtype=bool)
+        expired = ((self._rx_time + self.max_lag * 1e9 < self._tx_newest)
+                   | (self._rx_time + self.max_wait * 1e9 < self._rx_newest))
+        resolved = found | expired
+        # Release the leading resolved packets, to keep the arrival order
+        n = len(resolved) if resolved.all() else int(np.argmin(resolved))
+        if not n:
+            return
+        found, index = found[:n], index[:n]
+        time_tx = self._tx_time[index] if len(self._tx_keys) else np.zeros(n, dtype=np.int64)
+        # Latency (in microseconds), rx capture - tx capture
+        latency = np.where(found, (self._rx_time[:n] - time_tx) / 1e3, np.nan)
+        self.accumulator.update(self._rx_keys[:n], latency)
+        if len(self._tx_keys):
+            self._tx_matched[index[found]] = True
+        self._rx_keys, self._rx_time = self._rx_keys[n:], self._rx_time[n:]
+
+        # Evict tx packets which are reorder_depth behind every rx packet still to come
+        self._released = max(self._released, int(self.accumulator._last_arrival))
+        watermark = self._released - self.reorder_depth
+        if len(self._rx_keys):
+            watermark = min(watermark, self._rx_keys.min() - self.reorder_depth)
+        self._evict(watermark)
+
+    def _evict(self, watermark):
+        n = int(np.searchsorted(self._tx_keys, watermark))
+        self.tx_only += int(np.count_nonzero(~self._tx_matched[:n]))
+        self._tx_keys, self._tx_time, self._tx_matched = self._tx_keys[n:], self._tx_time[n:], self._tx_matched[n:]
+
+    def finish(self):
+        """
+        Releases everything still pending, at the end of the captures.
+        """
+        self._rx_newest = np.iinfo(np.int64).max
+        self.update()
+        self._evict(np.iinfo(np.int64).max)
+        self.accumulator.finish()
+
+    def summary(self):
+        summary = self.accumulator.summary()
+        summary['tx_rows'] = self.tx_rows
+        summary['tx-only'] = self.tx_only
+        return summary
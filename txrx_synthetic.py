@@ -0,0 +1,212 @@
+"""
+Synthetic iperf Captures
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Generates the tx and rx captures of a synthetic iperf UDP flow, for benchmarking
+the analysis scripts without running an experiment:
+- pcap files with the packet layout of the capture scripts (Ethernet, IPv4, UDP,
+  iperf header as in wireshark-dissector-iperf.lua, snap length 128)
+- csv files with the tshark field list of the capture scripts (TSHARK_FIELDS)
+Loss, reordering, duplicates and the latency distribution are configurable.
+Flows are generated and written in chunks, so the size of a flow is limited by
+the disk, not the memory.
+"""
+
+import numpy as np
+from txrx_pcap import TSHARK_FIELDS, PCAP_MAGIC_NS
+
+# Start of the synthetic captures (epoch, in nanoseconds)
+START_NS = 1_700_000_000 * 10 ** 9
+# iperf payload length (iperf -l 100) and capture snap length (tshark -s 128)
+PAYLOAD_LEN = 100
+SNAPLEN = 128
+ETHERNET_LEN = 14
+IPV4_LEN = 20
+UDP_LEN = 8
+FRAME_LEN = ETHERNET_LEN + IPV4_LEN + UDP_LEN + PAYLOAD_LEN
+
+# Latency distributions, as functions of (rng, n, mean) returning latency in nanoseconds
+LATENCY_DISTRIBUTIONS = {
+    'constant': lambda rng, n, mean: np.full(n, mean, dtype=np.float64),
+    'exponential': lambda rng, n, mean: rng.exponential(mean, n),
+    'gamma': lambda rng, n, mean: rng.gamma(2, mean / 2, n),
+    'normal': lambda rng, n, mean: np.abs(rng.normal(mean, mean / 4, n)),
+    # Heavy tail (Lomax, shape 3)
+    'pareto': lambda rng, n, mean: rng.pareto(3, n) * 2 * mean,
+}
+
+
+def flow_chunks(n, rate=100_000, loss=0.01, reorder=0.001, reorder_delay_ns=100_000, duplicates=0.0001,
+                latency='gamma', latency_mean_ns=40_000, seed=0, chunk_size=1_000_000):
+    """
+    Yields (tx, rx) dictionaries of packet columns (time_ns, seq, sec, usec) of a synthetic flow,
+    chunk_size tx packets at a time, with the rx packets in arrival order.
+    - rate            : packets per second
+    - loss            : fraction of packets lost
+    - reorder         : fraction of packets delayed by another reorder_delay_ns (received out of order)
+    - duplicates      : fraction of rx packets received twice
+    - latency         : one of LATENCY_DISTRIBUTIONS, with mean latency_mean_ns
+    """
+    rng = np.random.default_rng(seed)
+    distribution = LATENCY_DISTRIBUTIONS[latency]
+    period_ns = 1e9 / rate
+    carried = {'time_ns': np.zeros(0, dtype=np.int64), 'seq': np.zeros(0, dtype=np.int64)}
+    for start in range(0, n, chunk_size):
+        seq = np.arange(start, min(start + chunk_size, n), dtype=np.int64)
+        time_tx = START_NS + (seq * period_ns).astype(np.int64)
+
+        received = rng.random(len(seq)) >= loss
+        delay = distribution(rng, len(seq), latency_mean_ns) + (rng.random(len(seq)) < reorder) * reorder_delay_ns
+        time_rx = time_tx + delay.astype(np.int64)
+        repeated = received & (rng.random(len(seq)) < duplicates)
+        rx_time = np.concatenate([carried['time_ns'], time_rx[received], time_rx[repeated] + 1_000])
+        rx_seq = np.concatenate([carried['seq'], seq[received], seq[repeated]])
+        order = np.argsort(rx_time, kind='stable')
+        rx_time, rx_seq = rx_time[order], rx_seq[order]
+
+        # rx packets after the start of the next chunk may arrive after its packets, carry them over
+        if seq[-1] + 1 < n:
+            ready = rx_time < START_NS + int((seq[-1] + 1) * period_ns)
+            carried = {'time_ns': rx_time[~ready], 'seq': rx_seq[~ready]}
+            rx_time, rx_seq = rx_time[ready], rx_seq[ready]
+        yield (_with_iperf_time({'time_ns': time_tx, 'seq': seq}, period_ns),
+               _with_iperf_time({'time_ns': rx_time, 'seq': rx_seq}, period_ns))
+
+
+def _with_iperf_time(packets, period_ns):
+    """
+    Adds the iperf tx timestamp (sec, usec) of each packet, its tx capture time truncated to microseconds.
+    """
+    time_tx = START_NS + (packets['seq'] * period_ns).astype(np.int64)
+    packets['sec'] = time_tx // 10 ** 9
+    packets['usec'] = time_tx % 10 ** 9 // 1_000
+    return packets
+
+
+def _digits(values, width, pad=False):
+    """
+    Returns the decimal digits of non-negative integers as an (n, width) array of ascii codes,
+    and a mask of the digits printed (without leading zeros, unless pad).
+    """
+    values = np.asarray(values)
+    values = values.astype(np.uint32 if not len(values) or values.max() < 2 ** 32 else np.uint64)
+    digits = np.empty((len(values), width), dtype=np.uint8)
+    for column in range(width - 1, -1, -1):
+        values, digit = np.divmod(values, 10)
+        digits[:, column] = digit
+    digits += ord('0')
+    if pad:
+        return digits, np.ones(digits.shape, dtype=bool)
+    printed = np.cumsum(digits != ord('0'), axis=1) > 0
+    printed[:, -1] = True
+    return digits, printed
+
+
+def _text(n, text):
+    """
+    The same text in every row, as (n, len(text)) ascii codes and mask.
+    """
+    codes = np.frombuffer(text.encode(), dtype=np.uint8)
+    return np.broadcast_to(codes, (n, len(codes))), np.ones((n, len(codes)), dtype=bool)
+
+
+def csv_chunk(packets, port=5010, header=False):
+    """
+    Returns the packets as csv text with the tshark field list of the capture scripts (TSHARK_FIELDS),
+    formatted as tshark prints them (frame.time_epoch with 9 decimals, iperf.tos in hex).
+    """
+    n = len(packets['seq'])
+    fields = {
+        'udp.dstport': [_text(n, str(port))],
+        'frame.time_epoch': [_digits(packets['time_ns'] // 10 ** 9, 10), _text(n, '.'),
+                             _digits(packets['time_ns'] % 10 ** 9, 9, pad=True)],
+        'frame.len': [_text(n, str(FRAME_LEN))],
+        # base.HEX in the dissector
+        'iperf.tos': [_text(n, '0x0000')],
+        'iperf.id': [_digits(packets['seq'] & 0xffffffff, 10)],
+        'iperf.id2': [_digits(packets['seq'] >> 32, 10)],
+        'iperf.sec': [_digits(packets['sec'], 10)],
+        'iperf.usec': [_digits(packets['usec'], 6)],
+    }
+    parts = []
+    for i, field in enumerate(TSHARK_FIELDS):
+        parts += fields[field] + [_text(n, ',' if i < len(TSHARK_FIELDS) - 1 else '\n')]
+    codes = np.concatenate([codes for codes, _ in parts], axis=1)
+    printed = np.concatenate([printed for _, printed in parts], axis=1)
+    text = codes[printed].tobytes()
+    return (','.join(TSHARK_FIELDS) + '\n').encode() + text if header else text
+
+
+def pcap_chunk(packets, port=5010):
+    """
+    Returns the packets as nanosecond pcap records (Ethernet/IPv4/UDP/iperf, snap length SNAPLEN).
+    """
+    n = len(packets['seq'])
+    caplen = min(FRAME_LEN, SNAPLEN)
+    records = np.zeros((n, 16 + caplen), dtype=np.uint8)
+    header = records[:, :16].view('<u4')
+    header[:, 0] = packets['time_ns'] // 10 ** 9
+    header[:, 1] = packets['time_ns'] % 10 ** 9
+    header[:, 2] = caplen
+    header[:, 3] = FRAME_LEN
+    frame = records[:, 16:]
+
+    def put(offset, values, dtype):
+        width = np.dtype(dtype).itemsize
+        frame[:, offset:offset + width] = np.asarray(values).astype(dtype).view(np.uint8).reshape(-1, width)
+
+    put(12, np.full(n, 0x0800), '>u2')                                   # ethertype ipv4
+    ip = ETHERNET_LEN
+    frame[:, ip] = 0x45                                                  # version 4, ihl 5
+    put(ip + 2, np.full(n, IPV4_LEN + UDP_LEN + PAYLOAD_LEN), '>u2')     # total length
+    frame[:, ip + 8] = 64                                                # ttl
+    frame[:, ip + 9] = 17                                                # udp
+    frame[:, ip + 12:ip + 16] = [192, 168, 10, 10]
+    frame[:, ip + 16:ip + 20] = [192, 168, 10, 20]
+    udp = ip + IPV4_LEN
+    put(udp, np.full(n, 40000), '>u2')
+    put(udp + 2, np.full(n, port), '>u2')
+    put(udp + 4, np.full(n, UDP_LEN + PAYLOAD_LEN), '>u2')
+    payload = udp + UDP_LEN
+    put(payload, packets['seq'] & 0xffffffff, '>u4')                     # iperf.id
+    put(payload + 4, packets['sec'], '>u4')                              # iperf.sec
+    put(payload + 8, packets['usec'], '>u4')                             # iperf.usec
+    put(payload + 12, packets['seq'] >> 32, '>u4')                       # iperf.id2
+    return records.tobytes()
+
+
+def pcap_header(snaplen=SNAPLEN):
+    """
+    Global header of a nanosecond-resolution Ethernet pcap file.
+    """
+    return np.array([PCAP_MAGIC_NS, 2 | (4 << 16), 0, 0, snaplen, 1], dtype='<u4').tobytes()
+
+
+def write_flow(directory, flow, n, formats=('csv', 'pcap'), port=5010, **parameters):
+    """
+    Writes expt-txN and expt-rxN files of a synthetic flow N in the given formats,
+    generating the flow once. Returns the written file paths.
+    Parameters are those of flow_chunks().
+    """
+    files = {(direction, extension): open(f'{directory}/expt-{direction}{flow}.{extension}', 'wb')
+             for direction in ('tx', 'rx') for extension in formats}
+    try:
+        for (direction, extension), f in files.items():
+            if extension == 'pcap':
+                f.write(pcap_header())
+        header = True
+        for tx, rx in flow_chunks(n, **parameters):
+            for (direction, extension), f in files.items():
+                packets = tx if direction == 'tx' else rx
+                if extension == 'pcap':
+                    f.write(pcap_chunk(packets, port))
+                else:
+                    f.write(csv_chunk(packets, port, header))
+            header = False
+    finally:
+        for f in files.values():
+            f.close()
+    return [f.name for f in files.values()]
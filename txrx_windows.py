@@ -0,0 +1,351 @@
+"""
+Time-Window Statistics of a flow
+
+Author        : Joydeep Pal
+Date Created  : Oct-2026
+
+Description:
+Pre-aggregated per-window statistics of each flow, for soak tests: how latency,
+loss, reordering and throughput changed over a long run, without reloading the
+packets. Instead of binning the packets for seaborn box plots (pd.cut() in
+plot_statistics(), where the per-bin numbers are not kept), packets are counted
+into tumbling windows of their tx time (epoch-aligned, e.g. 10 ms, 100 ms, 1 s)
+in one vectorized pass:
+- packets, bytes and throughput (rx frame lengths) of the packets sent in the window
+- lost: missing sequence numbers, in the window of the next packet in sequence order
+  (same count as the 'lost' column of txrx_metrics.py)
+- reordered: packets with a sequence number lower than one received before (RFC 4737)
+- latency count, mean, min, max and percentiles, from a sparse (window, bucket)
+  histogram with the bucket layout of txrx_hdr.py (hash group-by, no sort of the packets)
+
+Counters are kept for the smallest window only, the larger windows (multiples of
+it) are summed from them. They are allocated in periods (of the largest window)
+which have packets only, sparse in time, so an outlier time (e.g. a tx time of 0)
+costs one period rather than every window in between. In streaming mode, windows older than the packets
+still buffered are closed into table rows, so memory does not grow with the run.
+The tables are written as csv files (one per window size, one row per flow and
+window), small enough for dashboards and the plotter (txrx_render.render_windows()).
+"""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from txrx_hdr import LatencyHistogram
+
+# Window sizes, each a multiple of the smallest
+WINDOW_SIZES = ('10ms', '100ms', '1s')
+# Latency percentiles of each window
+WINDOW_PERCENTILES = (50, 99, 99.9)
+# Significant decimal digits of the latency buckets of the window percentiles
+WINDOW_DIGITS = 2
+# Bits of the latency bucket in the (window, bucket) histogram cells
+CELL_BITS = 20
+UNITS_NS = {'ns': 1, 'us': 1_000, 'ms': 1_000_000, 's': 1_000_000_000}
+COUNTERS = {
+    'packets': (np.int64, 0),
+    'bytes': (np.int64, 0),
+    'lost': (np.int64, 0),
+    'reordered': (np.int64, 0),
+    'latency-count': (np.int64, 0),
+    'latency-sum': (np.float64, 0.0),
+    'latency-min': (np.float64, np.inf),
+    'latency-max': (np.float64, -np.inf),
+}
+
+
+def window_ns(size):
+    """
+    Returns the length in nanoseconds of a window size such as '10ms', '100us' or '1s'.
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*(ns|us|ms|s)\s*', str(size))
+    if match is None:
+        raise ValueError(f"Invalid window size {size!r}, expected e.g. '10ms', '100us', '1s'")
+    return int(match.group(1)) * UNITS_NS[match.group(2)]
+
+
+class WindowStatistics:
+    """
+    Per window counters and latency histogram of a flow, for tumbling windows of the given sizes.
+    Packets are added with record() (any order of time), lost packets with record_lost().
+    """
+
+    def __init__(self, sizes=WINDOW_SIZES, significant_digits=WINDOW_DIGITS, percentiles=WINDOW_PERCENTILES):
+        self.sizes = list(sizes)
+        lengths = [window_ns(size) for size in self.sizes]
+        self.window_ns = min(lengths)
+        if any(length % self.window_ns for length in lengths):
+            raise ValueError(f"Window sizes {self.sizes} are not multiples of the smallest one")
+        self.factors = {size: length // self.window_ns for size, length in zip(self.sizes, lengths)}
+        # Smallest windows of the largest window, the counters are closed in whole periods
+        self.period = int(np.lcm.reduce(list(self.factors.values())))
+        self.percentiles = percentiles
+        self.histogram = LatencyHistogram(significant_digits)
+        # Smallest window number (epoch-aligned) of the first and last packet
+        self.start = None
+        self.end = None
+        # Packets and losses in windows which were already closed, not counted
+        self.dropped = 0
+        # Counters of the smallest windows, a block of self.period windows per period number in _periods (sorted)
+        self._periods = np.zeros(0, dtype=np.int64)
+        self._counters = {name: np.zeros(0, dtype=dtype) for name, (dtype, _) in COUNTERS.items()}
+        # Sparse histogram: (window - first window) << CELL_BITS | latency bucket offset
+        self._origin = None
+        self._cells = np.zeros(0, dtype=np.int64)
+        self._cell_counts = np.zeros(0, dtype=np.int64)
+        self._closed = None
+        self._rows = {size: [] for size in self.sizes}
+
+    def _windows(self, time_ns):
+        """
+        Returns the window numbers of the times, and the mask of those in open windows.
+        """
+        windows = np.asarray(time_ns, dtype=np.int64) // self.window_ns
+        keep = np.ones(len(windows), dtype=bool) if self._closed is None else windows >= self._closed
+        return windows, keep
+
+    def _index(self, windows, periods=None):
+        """
+        Returns the counter index of windows, in the blocks of the given (default the current) periods.
+        """
+        periods = self._periods if periods is None else periods
+        return np.searchsorted(periods, windows // self.period) * self.period + windows % self.period
+
+    def _extend(self, windows):
+        """
+        Adds counter blocks for the periods of the windows without one, returns their counter index.
+        """
+        low, high = int(windows.min()), int(windows.max())
+        self.start = low if self.start is None else min(self.start, low)
+        self.end = high if self.end is None else max(self.end, high)
+        if self._origin is None:
+            self._origin = low // self.period * self.period
+        # Few distinct periods per call, found by hashing rather than sorting the windows
+        periods = np.sort(pd.unique(windows // self.period))
+        added = np.setdiff1d(periods, self._periods, assume_unique=True)
+        if len(added):
+            merged = np.union1d(self._periods, added)
+            moved = (np.searchsorted(merged, self._periods)[:, None] * self.period + np.arange(self.period)).ravel()
+            for name, (dtype, fill) in COUNTERS.items():
+                values = np.full(len(merged) * self.period, fill, dtype=dtype)
+                values[moved] = self._counters[name]
+                self._counters[name] = values
+            self._periods = merged
+        return self._index(windows)
+
+    def _count(self, name, index, weights=None):
+        counts = np.bincount(index, weights=weights, minlength=len(self._counters[name]))
+        self._counters[name] += counts.astype(self._counters[name].dtype)
+
+    def record(self, time_ns, latency, length=None, reordered=None):
+        """
+        Adds packets with their tx time (epoch ns), latency (in microseconds, NaN if unknown),
+        frame length (bytes) and reordered flag.
+        """
+        windows, keep = self._windows(time_ns)
+        latency = np.asarray(latency, dtype=np.float64)
+        if not keep.all():
+            self.dropped += int(np.count_nonzero(~keep))
+            windows, latency = windows[keep], latency[keep]
+            length = None if length is None else np.asarray(length)[keep]
+            reordered = None if reordered is None else np.asarray(reordered)[keep]
+        if not len(windows):
+            return
+        index = self._extend(windows)
+        self._count('packets', index)
+        if length is not None:
+            self._count('bytes', index, np.asarray(length, dtype=np.float64))
+        if reordered is not None:
+            self._count('reordered', index[np.asarray(reordered, dtype=bool)])
+        valid = ~np.isnan(latency)
+        index, latency = index[valid], latency[valid]
+        if not len(latency):
+            return
+        self._count('latency-count', index)
+        self._count('latency-sum', index, latency)
+        np.minimum.at(self._counters['latency-min'], index, latency)
+        np.maximum.at(self._counters['latency-max'], index, latency)
+
+        # (window, latency bucket) cells, grouped by hashing rather than sorting the packets
+        cells = ((windows[valid] - self._origin) << CELL_BITS) | (self.histogram.bucket_indices(latency)
+                                                                 + (1 << (CELL_BITS - 1)))
+        codes, cells = pd.factorize(cells)
+        merged, inverse = np.unique(np.concatenate([self._cells, cells]), return_inverse=True)
+        self._cell_counts = np.bincount(inverse, weights=np.concatenate([self._cell_counts, np.bincount(codes)]),
+                                        minlength=len(merged)).astype(np.int64)
+        self._cells = merged
+
+    def record_lost(self, time_ns, counts=None):
+        """
+        Adds lost packets (counts of each, default 1) in the windows of the given times.
+        """
+        windows, keep = self._windows(time_ns)
+        counts = np.ones(len(windows)) if counts is None else np.asarray(counts, dtype=np.float64)
+        if not keep.all():
+            self.dropped += int(np.count_nonzero(~keep))
+            windows, counts = windows[keep], counts[keep]
+        if len(windows):
+            self._count('lost', self._extend(windows), counts)
+
+    def close(self, before_ns=None):
+        """
+        Closes the windows before the given time (all windows by default) into table rows.
+        Later packets in closed windows are not counted (see dropped).
+        """
+        periods = len(self._periods)
+        if before_ns is not None:
+            periods = int(np.searchsorted(self._periods, int(before_ns) // self.window_ns // self.period))
+        if not periods:
+            return
+        boundary = (int(self._periods[periods - 1]) + 1) * self.period
+        closing = periods * self.period
+        window_of_cell = (self._cells >> CELL_BITS) + self._origin
+        closed_cells = window_of_cell < boundary
+        for size in self.sizes:
+            self._rows[size].append(self._table(size, self._periods[:periods],
+                                                {name: values[:closing] for name, values in self._counters.items()},
+                                                window_of_cell[closed_cells], self._cells[closed_cells],
+                                                self._cell_counts[closed_cells]))
+        self._counters = {name: values[closing:] for name, values in self._counters.items()}
+        self._cells, self._cell_counts = self._cells[~closed_cells], self._cell_counts[~closed_cells]
+        self._periods = self._periods[periods:]
+        self._closed = boundary
+
+    def _table(self, size, periods, counters, window_of_cell, cells, cell_counts):
+        """
+        Returns the rows of the windows of a size from the counters of the smallest windows
+        (a block per period number in periods) and their histogram cells.
+        """
+        factor = self.factors[size]
+        rows = len(counters['packets']) // factor
+        columns = {}
+        for name, values in counters.items():
+            values = values.reshape(rows, factor)
+            columns[name] = values.min(axis=1) if name == 'latency-min' else \
+                values.max(axis=1) if name == 'latency-max' else values.sum(axis=1)
+        windows = (periods[:, None] * self.period + np.arange(0, self.period, factor)).ravel() // factor
+
+        # Percentiles from the cells summed over the smallest windows of each window
+        cells = ((self._index(window_of_cell, periods) // factor) << CELL_BITS) | (cells & ((1 << CELL_BITS) - 1))
+        merged, inverse = np.unique(cells, return_inverse=True)
+        merged_counts = np.bincount(inverse, weights=cell_counts, minlength=len(merged)).astype(np.int64)
+        cumulative = np.cumsum(merged_counts)
+        row_of_cell = merged >> CELL_BITS
+        buckets = (merged & ((1 << CELL_BITS) - 1)) - (1 << (CELL_BITS - 1))
+        total = columns['latency-count']
+        first_cell = np.searchsorted(row_of_cell, np.arange(rows))
+        before = np.where(first_cell > 0, cumulative[np.maximum(first_cell - 1, 0)], 0) if len(merged) else 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = columns['latency-sum'] / total
+        seconds = self.window_ns * factor / 1e9
+        table = pd.DataFrame({
+            'window': windows,
+            'time': windows * (self.window_ns * factor) / 1e9,
+            'packets': columns['packets'],
+            'bytes': columns['bytes'],
+            'throughput(Mbps)': columns['bytes'] * 8 / seconds / 1e6,
+            'lost': columns['lost'],
+            'loss-ratio': columns['lost'] / np.maximum(columns['packets'] + columns['lost'], 1),
+            'reordered': columns['reordered'],
+            'latency-count': total,
+            'latency-mean': mean,
+            'latency-min': np.where(total > 0, columns['latency-min'], np.nan),
+        })
+        for percentile in self.percentiles:
+            if len(merged):
+                rank = np.maximum(np.ceil(total * percentile / 100), 1)
+                position = np.minimum(np.searchsorted(cumulative, before + rank), len(merged) - 1)
+                values = np.clip(self.histogram.bucket_values(buckets[position]),
+                                 columns['latency-min'], columns['latency-max'])
+            else:
+                values = np.zeros(rows)
+            table[f'latency-p{percentile:g}'] = np.where(total > 0, values, np.nan)
+        table['latency-max'] = np.where(total > 0, columns['latency-max'], np.nan)
+        return table
+
+    def tables(self):
+        """
+        Closes all windows and returns a table per window size, from the window of the first
+        packet to the window of the last one: the windows of each period with packets (empty
+        ones included, latency NaN), periods without any are left out.
+        """
+        self.close()
+        empty = np.zeros(0, dtype=np.int64)
+        tables = {}
+        for size in self.sizes:
+            factor = self.factors[size]
+            rows = self._rows[size] or [self._table(size, empty, {name: np.zeros(0, dtype=dtype)
+                                                           for name, (dtype, _) in COUNTERS.items()}, empty, empty, empty)]
+            table = pd.concat(rows, ignore_index=True)
+            if self.start is not None:
+                window = table['window'].to_numpy()
+                table = table[(window >= self.start // factor) & (window <= self.end // factor)].reset_index(drop=True)
+            table = table.drop(columns='window')
+            table.insert(1, 'time_from_start(s)', table['time'] - table['time'].iloc[0] if len(table) else 0.0)
+            tables[size] = table
+        return tables
+
+
+def reordered_packets(keys, highest=None):
+    """
+    Returns whether each packet (sequence keys in arrival order) has a lower sequence
+    number than one received before it (RFC 4737), and the highest key so far.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    if not len(keys):
+        return np.zeros(0, dtype=bool), highest
+    running = np.maximum.accumulate(keys if highest is None else np.concatenate([[highest], keys]))
+    previous = running[:-1] if highest is not None else np.concatenate([[keys[0]], running[:-1]])
+    return keys < previous, int(running[-1])
+
+
+def gap_losses(sorted_keys, sorted_time_ns, last_key=None):
+    """
+    Returns the times and counts of missing sequence numbers, each gap at the time of the
+    packet after it, from keys in sequence order (and the last key before them).
+    """
+    keys = sorted_keys if last_key is None else np.concatenate([[last_key], sorted_keys])
+    missing = np.diff(keys) - 1
+    gaps = np.flatnonzero(missing > 0)
+    return sorted_time_ns[gaps + (0 if last_key is not None else 1)], missing[gaps]
+
+
+def flow_windows(keys, time_ns, latency, length=None, sizes=WINDOW_SIZES, significant_digits=WINDOW_DIGITS):
+    """
+    Returns the window tables (one per size) of a flow's rx packets, given in arrival order with
+    their sequence keys, tx time (epoch ns), latency (in microseconds) and frame length.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    time_ns = np.asarray(time_ns, dtype=np.int64)
+    statistics = WindowStatistics(sizes, significant_digits)
+    if len(keys):
+        statistics.record(time_ns, latency, length, reordered_packets(keys)[0])
+        # Nearly sorted in arrival order, the stable sort is close to linear
+        order = np.argsort(keys, kind='stable')
+        statistics.record_lost(*gap_losses(keys[order], time_ns[order]))
+    return statistics.tables()
+
+
+def write_windows(tables, output_directory, suffix):
+    """
+    Writes the window tables of each flow ({flow: {size: table}}) as one csv file per window size,
+    windows-<size>-<suffix>.csv with a 'flow' column. Returns the written file paths.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    sizes = dict.fromkeys(size for flow_tables in tables.values() for size in flow_tables)
+    paths = []
+    for size in sizes:
+        frames = [table.assign(flow=flow)[['flow', *table.columns]]
+                  for flow, flow_tables in tables.items() for table in [flow_tables.get(size)] if table is not None]
+        path = os.path.join(output_directory, f'windows-{size}-{suffix}.csv')
+        pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def read_windows(file_path):
+    """
+    Reads a window table written by write_windows(), as {flow: table}.
+    """
+    df = pd.read_csv(file_path)
+    return {flow: table.drop(columns='flow').reset_index(drop=True) for flow, table in df.groupby('flow', sort=False)}